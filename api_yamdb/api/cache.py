@@ -0,0 +1,103 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'catalogue-version:{}'
+RESPONSE_KEY = 'catalogue-response:{}:{}:{}'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def get_catalogue_version(catalogue):
+    return caches[settings.CATALOGUE_VERSION_CACHE].get_or_set(
+        VERSION_KEY.format(catalogue), time.time_ns(), None
+    )
+
+
+def bump_catalogue_version(*catalogues):
+    """Делает недействительными все закэшированные страницы каталогов.
+
+    Версия — время последнего изменения в наносекундах, поэтому она же
+    служит значением Last-Modified. Версии хранятся в общем кэше
+    CATALOGUE_VERSION_CACHE, и изменение из любого процесса, в том числе
+    из management-команд, сбрасывает кэш всех воркеров.
+    """
+    versions = caches[settings.CATALOGUE_VERSION_CACHE]
+    for catalogue in catalogues:
+        key = VERSION_KEY.format(catalogue)
+        versions.set(
+            key, max(time.time_ns(), (versions.get(key) or 0) + 1), None
+        )
+
+
+def catalogue_cache_stats():
+    """Попадания и промахи кэша ответов по каталогам в этом процессе."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_catalogue_cache_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def count_cache_access(catalogue, outcome):
+    with _stats_lock:
+        _stats[f'{catalogue}.{outcome}'] += 1
+        hits = _stats[f'{catalogue}.hit']
+        misses = _stats[f'{catalogue}.miss']
+    logger.debug(
+        'Кэш каталога %s: %s (попаданий %d, промахов %d)',
+        catalogue, outcome, hits, misses
+    )
+
+
+def response_cache_key(catalogue, request):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    url = f'{request.scheme}://{request.get_host()}{request.path}?{query}'
+    return RESPONSE_KEY.format(
+        catalogue,
+        get_catalogue_version(catalogue),
+        hashlib.md5(url.encode()).hexdigest()
+    )
+
+
+class CatalogueCacheMixin:
+    """Кэширует успешные ответы до изменения каталога."""
+    cache_catalogue = None
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        key = response_cache_key(self.cache_catalogue, request)
+        data = cache.get(key)
+        if data is not None:
+            count_cache_access(self.cache_catalogue, 'hit')
+            return Response(data)
+        count_cache_access(self.cache_catalogue, 'miss')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.CATALOGUE_CACHE_TIMEOUT)
+        return response
+
+
+class CachedListMixin(CatalogueCacheMixin):
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CatalogueCacheMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -0,0 +1,88 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag, urlencode
+
+from .cache import get_catalogue_version
+
+NANOSECONDS = 10 ** 9
+
+
+class ConditionalGetMixin:
+    """Отвечает 304 на условные GET запросы, не сериализуя данные.
+
+    ETag и Last-Modified считаются по версиям каталогов, а для моделей
+    с датой публикации — ещё и по числу записей и последней дате. Версии
+    хранятся в общем кэше CATALOGUE_VERSION_CACHE, поэтому их меняют
+    записи из любого процесса.
+    """
+    etag_catalogues = ()
+    etag_per_user = False
+
+    def get_validators(self, request):
+        versions = [
+            get_catalogue_version(name) for name in self.etag_catalogues
+        ]
+        last_modified = max(versions, default=0) // NANOSECONDS
+        parts = [
+            request.path,
+            urlencode(sorted(request.query_params.lists()), doseq=True),
+            request.accepted_media_type,
+            *versions
+        ]
+        if self.etag_per_user:
+            parts.append(request.user.pk)
+        queryset = self.get_queryset()
+        if any(f.name == 'pub_date' for f in queryset.model._meta.fields):
+            stats = self.filter_queryset(queryset).aggregate(
+                count=Count('pk'), latest=Max('pub_date')
+            )
+            parts += [stats['count'], stats['latest']]
+            if stats['latest'] is not None:
+                last_modified = max(
+                    last_modified, int(stats['latest'].timestamp())
+                )
+        etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+        return etag, last_modified or None
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    """Условный GET объекта: 304 отдаётся только после проверки прав.
+
+    get_object загружает объект и вызывает check_object_permissions ещё
+    до сравнения валидаторов; загруженный объект переиспользует retrieve.
+    """
+    checked_object = None
+
+    def get_object(self):
+        if self.checked_object is None:
+            self.checked_object = super().get_object()
+        return self.checked_object
+
+    def retrieve(self, request, *args, **kwargs):
+        self.get_object()
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
@@ -9,11 +9,32 @@ class ToSerializerInSlugManyRelatedField(serializers.ManyRelatedField):
         super(ToSerializerInSlugManyRelatedField, self).__init__(**kwargs)
 
     def to_internal_value(self, data):
-        return [
-            serializers.SlugRelatedField(
-                slug_field=self.slug_field, queryset=self.queryset
-            ).to_internal_value(slug) for slug in data
-        ]
+        """Получает все объекты по списку slug одним запросом."""
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        slug_related = serializers.SlugRelatedField(
+            slug_field=self.slug_field, queryset=self.queryset
+        )
+        try:
+            slugs = list(dict.fromkeys(str(slug) for slug in data))
+            objects = {
+                str(getattr(obj, self.slug_field)): obj
+                for obj in self.queryset.filter(
+                    **{f'{self.slug_field}__in': slugs}
+                )
+            }
+        except (TypeError, ValueError):
+            slug_related.fail('invalid')
+        missing = [slug for slug in slugs if slug not in objects]
+        if missing:
+            raise serializers.ValidationError([
+                slug_related.error_messages['does_not_exist'].format(
+                    slug_name=self.slug_field, value=slug
+                ) for slug in missing
+            ])
+        return [objects[slug] for slug in slugs]
 
 
 class ToSerializerInSlugRelatedField(serializers.SlugRelatedField):
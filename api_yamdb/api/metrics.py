@@ -0,0 +1,222 @@
+"""Стоимость запросов к API по маршрутам.
+
+RequestMetricsMiddleware считает для каждого запроса число запросов к БД,
+время SQL, время вычисления данных сериализаторов, время рендеринга ответа
+и полное время, отдаёт их в заголовке Server-Timing и копит в памяти
+процесса по имени маршрута и методу. Превышение бюджета запросов к БД из
+QUERY_BUDGETS пишется в лог.
+"""
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после каждого измеренного запроса.
+request_measured = Signal(providing_args=['route', 'method', 'metrics'])
+
+UNRESOLVED = '<unresolved>'
+# Метрика Server-Timing, поле замера и описание (заголовок только latin-1).
+TIMINGS = (
+    ('db', 'sql_ms', 'SQL: {queries} queries'),
+    ('serialize', 'serialize_ms', 'Serializer data'),
+    ('render', 'render_ms', 'Response rendering'),
+    ('total', 'wall_ms', 'Total'),
+)
+
+_stats = {}
+_stats_lock = threading.Lock()
+_timed_serializers = {}
+
+
+class QueryMeter:
+    """Обёртка выполнения SQL: число запросов и их суммарное время."""
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.queries += 1
+
+
+def get_route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNRESOLVED
+
+
+def get_query_budget(route, method):
+    """Бюджет запросов к БД: сначала для метода, затем для маршрута."""
+    budgets = settings.QUERY_BUDGETS
+    return budgets.get(f'{method} {route}', budgets.get(route))
+
+
+def record(route, method, metrics):
+    key = f'{method} {route}'
+    with _stats_lock:
+        stats = _stats.setdefault(key, {
+            'route': route, 'method': method, 'requests': 0,
+            'queries': 0, 'max_queries': 0,
+            **{field: 0.0 for name, field, description in TIMINGS},
+            'max_wall_ms': 0.0,
+        })
+        stats['requests'] += 1
+        stats['queries'] += metrics['queries']
+        stats['max_queries'] = max(stats['max_queries'], metrics['queries'])
+        for name, field, description in TIMINGS:
+            stats[field] += metrics[field]
+        stats['max_wall_ms'] = max(stats['max_wall_ms'], metrics['wall_ms'])
+
+
+def get_stats():
+    """Средние и максимумы по маршрутам, самые долгие в сумме — первыми."""
+    with _stats_lock:
+        snapshot = [dict(stats) for stats in _stats.values()]
+    result = []
+    for stats in snapshot:
+        requests = stats['requests']
+        result.append({
+            'route': stats['route'],
+            'method': stats['method'],
+            'requests': requests,
+            'mean_queries': stats['queries'] / requests,
+            'max_queries': stats['max_queries'],
+            'query_budget': get_query_budget(stats['route'], stats['method']),
+            **{
+                f'mean_{field}': stats[field] / requests
+                for name, field, description in TIMINGS
+            },
+            'max_wall_ms': stats['max_wall_ms'],
+            'total_wall_ms': stats['wall_ms'],
+        })
+    result.sort(key=lambda stats: -stats['total_wall_ms'])
+    return result
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def server_timing(metrics):
+    return ', '.join(
+        f'{name};dur={metrics[field]:.1f};'
+        f'desc="{description.format(**metrics)}"'
+        for name, field, description in TIMINGS
+    )
+
+
+@contextmanager
+def measure_serializer(request):
+    """Добавляет время блока к времени сериализаторов запроса."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing = getattr(request, 'serializer_timing', None)
+        if timing is not None:
+            timing[0] += time.perf_counter() - started
+
+
+def serializer_data(request, serializer):
+    """Данные сериализатора; время их вычисления попадает в замер запроса."""
+    with measure_serializer(request):
+        return serializer.data
+
+
+class TimedDataMixin:
+    """Сериализатор, засекающий вычисление data для запроса из контекста."""
+
+    @property
+    def data(self):
+        with measure_serializer(self.context.get('request')):
+            return super().data
+
+
+def timed_serializer_class(serializer_class):
+    timed = _timed_serializers.get(serializer_class)
+    if timed is None:
+        timed = _timed_serializers[serializer_class] = type(
+            serializer_class.__name__, (TimedDataMixin, serializer_class), {}
+        )
+    return timed
+
+
+class SerializerTimingMixin:
+    """Вьюсет, сериализаторы которого засекают вычисление data.
+
+    Так время сериализации в list, retrieve, create и update замеряется
+    без переопределения самих действий DRF.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        serializer.__class__ = timed_serializer_class(type(serializer))
+        return serializer
+
+
+class RequestMetricsMiddleware:
+    """Измеряет стоимость каждого запроса к приложению.
+
+    Время сериализации складывается из вычислений serializer.data во
+    вьюсетах с SerializerTimingMixin и в serializer_data. Рендеринг ответа
+    DRF начинается после process_template_response и заканчивается
+    вызовом post-render.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        meter = QueryMeter()
+        request.serializer_timing = [0.0]
+        request.render_timing = [0.0, 0.0]
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(meter))
+            response = self.get_response(request)
+        finished = time.perf_counter()
+        render_started, render_finished = request.render_timing
+        metrics = {
+            'queries': meter.queries,
+            'sql_ms': meter.seconds * 1000,
+            'serialize_ms': request.serializer_timing[0] * 1000,
+            'render_ms': (render_finished - render_started) * 1000,
+            'wall_ms': (finished - started) * 1000,
+        }
+        route, method = get_route(request), request.method
+        record(route, method, metrics)
+        if settings.REQUEST_METRICS_SERVER_TIMING:
+            response['Server-Timing'] = server_timing(metrics)
+        budget = get_query_budget(route, method)
+        if budget is not None and metrics['queries'] > budget:
+            logger.warning(
+                'Запрос %s %s выполнил %d запросов к БД при бюджете %d',
+                method, route, metrics['queries'], budget
+            )
+        request_measured.send(
+            sender=self.__class__, route=route, method=method,
+            metrics=metrics
+        )
+        return response
+
+    def process_template_response(self, request, response):
+        timing = request.render_timing
+        timing[0] = time.perf_counter()
+
+        def rendered(response):
+            timing[1] = time.perf_counter()
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -0,0 +1,61 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Курсорная пагинация по сортировке вьюсета без подсчёта записей.
+
+    Курсор хранит только значение первого поля сортировки, поэтому порядок
+    записей с одинаковым значением задаёт первичный ключ в конце сортировки.
+    """
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(
+            getattr(view, 'ordering', None) or queryset.model._meta.ordering
+        )
+        if ordering[-1].lstrip('-') not in ('pk', 'id'):
+            ordering += ('-pk' if ordering[0].startswith('-') else 'pk',)
+        self.ordering = ordering
+        return super().get_ordering(request, queryset, view)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data['count'] = self.count
+        return response
+
+
+class PageOrCursorPagination(PageNumberPagination):
+    """Пагинация по номеру страницы или, по запросу, курсорная."""
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_class = KeysetPagination
+    cursor = None
+
+    def is_cursor_mode(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or self.cursor_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.is_cursor_mode(request):
+            self.cursor = self.cursor_class()
+            return self.cursor.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor is not None:
+            return self.cursor.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor is not None:
+            return self.cursor.to_html()
+        return super().to_html()
@@ -12,7 +12,7 @@ class IsAuthorAdminModerator(permissions.BasePermission):
         self.message = 'Доступно только автору'
         return (
             request.method in permissions.SAFE_METHODS
-            or obj.author == request.user
+            or obj.author_id == request.user.pk
             or request.user.is_admin
             or request.user.is_moderator
         )
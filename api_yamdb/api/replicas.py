@@ -0,0 +1,121 @@
+"""Чтение с реплик БД, запись и чтение после записи — с основной.
+
+ReplicaRouter отправляет чтения безопасных запросов к API на одну из
+DATABASE_REPLICAS, выбранную на весь запрос. В основную БД идут запросы
+с другими методами, чтения после записи в том же запросе и внутри
+транзакции, а также все чтения пользователя в течение
+REPLICA_STICKY_SECONDS после его записи: реплика может отставать.
+Пользователи всегда читаются из основной БД: аутентификация загружает
+пользователя раньше, чем становится известно, нужно ли ему читать
+после своей записи. Вне запросов к API (команды, миграции) всё идёт
+в основную БД.
+"""
+import random
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject
+
+STICKY_KEY = 'replicas:sticky:{}'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_local = threading.local()
+
+
+def get_request_user(request):
+    """Пользователь запроса, если его уже определила аутентификация DRF.
+
+    Ленивый пользователь сессии не вычисляется: это запрос к БД, который
+    снова пришёл бы в роутер.
+    """
+    user = request.__dict__.get('user')
+    if user is None or isinstance(user, SimpleLazyObject):
+        return None
+    return user if user.is_authenticated else None
+
+
+def stick_to_primary(user_id):
+    caches[settings.REPLICA_STICKY_CACHE].set(
+        STICKY_KEY.format(user_id), True, settings.REPLICA_STICKY_SECONDS
+    )
+
+
+def is_sticky(user_id):
+    return caches[settings.REPLICA_STICKY_CACHE].get(
+        STICKY_KEY.format(user_id), False
+    )
+
+
+class RequestRouting:
+    """Выбор БД для одного запроса к API."""
+
+    def __init__(self, request):
+        self.request = request
+        self.replica = (
+            random.choice(settings.DATABASE_REPLICAS)
+            if settings.DATABASE_REPLICAS and request.method in SAFE_METHODS
+            else None
+        )
+        self.wrote = False
+        self.user_id = None
+
+    def db_for_read(self):
+        if self.replica is None or self.wrote:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        user = get_request_user(self.request)
+        if user is not None and self.user_id != user.pk:
+            self.user_id = user.pk
+            if is_sticky(user.pk):
+                self.replica = None
+                return DEFAULT_DB_ALIAS
+        return self.replica
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        routing = getattr(_local, 'routing', None)
+        if routing is None or model._meta.label == settings.AUTH_USER_MODEL:
+            return DEFAULT_DB_ALIAS
+        return routing.db_for_read()
+
+    def db_for_write(self, model, **hints):
+        routing = getattr(_local, 'routing', None)
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Реплики получают схему от основной БД."""
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """Выбирает БД на время запроса и помечает пользователя после записи."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routing = _local.routing = RequestRouting(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            del _local.routing
+        if routing.wrote and settings.DATABASE_REPLICAS:
+            user = get_request_user(request)
+            if user is not None:
+                stick_to_primary(user.pk)
+        return response
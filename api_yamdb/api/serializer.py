@@ -1,7 +1,5 @@
 from django.conf import settings
-from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
@@ -109,6 +107,69 @@ class TitleSerializer(serializers.ModelSerializer):
         validators = (max_year,)
 
 
+class TopTitleSerializer(TitleSerializer):
+    weighted_rating = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializer.Meta):
+        fields = (*TitleSerializer.Meta.fields, 'weighted_rating')
+
+
+class SimilarTitleSerializer(TitleSerializer):
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializer.Meta):
+        fields = (*TitleSerializer.Meta.fields, 'similarity')
+
+
+class RecommendedTitleSerializer(TitleSerializer):
+    predicted_rating = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializer.Meta):
+        fields = (*TitleSerializer.Meta.fields, 'predicted_rating')
+
+
+class RecommendationsQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.RECOMMENDATIONS_MAX_LIMIT,
+        default=settings.RECOMMENDATIONS_LIMIT
+    )
+
+
+class TopTitlesQuerySerializer(serializers.Serializer):
+    category = serializers.SlugRelatedField(
+        slug_field='slug',
+        queryset=Category.objects.all(),
+        required=False
+    )
+    genre = serializers.SlugRelatedField(
+        slug_field='slug',
+        queryset=Genre.objects.all(),
+        required=False
+    )
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.TOP_TITLES_MAX_LIMIT,
+        default=settings.TOP_TITLES_LIMIT
+    )
+
+    def validate(self, data):
+        if 'category' in data and 'genre' in data:
+            raise serializers.ValidationError(
+                'Укажите либо категорию, либо жанр.'
+            )
+        return data
+
+
+class TitleStatsSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    count = serializers.IntegerField()
+    mean = serializers.FloatField()
+    median = serializers.FloatField()
+    stddev = serializers.FloatField()
+    histogram = serializers.DictField(child=serializers.IntegerField())
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         slug_field='username',
@@ -126,17 +187,6 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         model = Review
 
-    def validate(self, data):
-        request = self.context['request']
-        if request.method == 'POST':
-            author = request.user
-            title_id = self.context.get('view').kwargs.get('title_id')
-            title = get_object_or_404(Title, pk=title_id)
-            if Review.objects.filter(title=title, author=author).exists():
-                raise ValidationError(
-                    'Нельзя оставить отзыв на одно произведение дважды')
-        return data
-
 
 class CommentSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
@@ -147,3 +197,29 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('id', 'text', 'author', 'pub_date')
         model = Comment
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=settings.MAX_SEARCH_QUERY_LENGTH)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    type = serializers.CharField()
+    id = serializers.IntegerField()
+    title_id = serializers.IntegerField()
+    name = serializers.CharField()
+    text = serializers.CharField()
+    rank = serializers.FloatField()
+
+
+class AutocompleteQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=settings.MAX_SEARCH_QUERY_LENGTH)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.AUTOCOMPLETE_MAX_LIMIT,
+        default=settings.AUTOCOMPLETE_LIMIT
+    )
+    type = serializers.MultipleChoiceField(
+        choices=('titles', 'genres', 'categories'),
+        required=False
+    )
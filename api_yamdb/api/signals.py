@@ -0,0 +1,54 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.signals import bulk_changed
+
+from .cache import bump_catalogue_version
+
+# Произведения выводятся вместе с категорией, жанрами и рейтингом,
+# отзывы и комментарии — с username автора.
+CATALOGUE_DEPENDENCIES = {
+    Category: ('categories', 'titles'),
+    Genre: ('genres', 'titles'),
+    Title: ('titles',),
+    Review: ('titles', 'reviews'),
+    Comment: ('comments',),
+    User: ('users', 'reviews', 'comments'),
+}
+
+
+def bump_on_commit(catalogues, using=None):
+    """Меняет версии каталогов после фиксации транзакции записи.
+
+    Иначе параллельный запрос успел бы прочитать новую версию вместе со
+    старыми строками и закэшировать их под новым ключом.
+    """
+    transaction.on_commit(
+        lambda: bump_catalogue_version(*catalogues), using=using
+    )
+
+
+def invalidate_catalogue(sender, using, **kwargs):
+    bump_on_commit(CATALOGUE_DEPENDENCIES[sender], using)
+
+
+for model in CATALOGUE_DEPENDENCIES:
+    post_save.connect(invalidate_catalogue, sender=model)
+    post_delete.connect(invalidate_catalogue, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_title_genres(sender, action, using, **kwargs):
+    if action.startswith('post_'):
+        bump_on_commit(('titles',), using)
+
+
+@receiver(bulk_changed)
+def invalidate_bulk_changed(sender, models, **kwargs):
+    bump_on_commit({
+        catalogue
+        for model in models if model in CATALOGUE_DEPENDENCIES
+        for catalogue in CATALOGUE_DEPENDENCIES[model]
+    })
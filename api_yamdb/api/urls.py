@@ -2,8 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import SimpleRouter
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, TitleViewSet, UserViewSet, get_token,
-                    signup_user)
+                    ReviewViewSet, TitleViewSet, UserViewSet, autocomplete,
+                    get_token, request_metrics, search, signup_user)
 
 app_name = 'api'
 
@@ -29,6 +29,9 @@ auth = [
 ]
 
 urlpatterns = [
+    path('v1/search/', search, name='search'),
+    path('v1/autocomplete/', autocomplete, name='autocomplete'),
+    path('v1/metrics/', request_metrics, name='metrics'),
     path('v1/', include(router_v1.urls)),
     path('v1/auth/', include(auth))
 ]
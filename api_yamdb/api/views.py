@@ -1,80 +1,215 @@
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from rest_framework import permissions, status, viewsets
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.exceptions import ValidationError
 from rest_framework.filters import SearchFilter
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.settings import api_settings
 
 from api.permissions import (AdminGetOrEdit, IsAdminOrReadOnly,
                              IsAuthorAdminModerator)
-from reviews.models import Category, Genre, Review, Title, User
+from reviews import leaderboard, recommendations
+from reviews.autocomplete import CATALOGUES
+from reviews.models import (SCORES, Category, Comment, Genre, Review, Title,
+                            User, score_field)
+from reviews.search import SearchResults
+from users.authentication import get_access_token
+from users.cache import user_cache
+from users.mail import queue_mail
 from users.utils import generate_confirmation_code
 
+from . import metrics
+from .cache import (CachedListMixin, CachedRetrieveMixin,
+                    catalogue_cache_stats, reset_catalogue_cache_stats)
+from .conditional import ConditionalListMixin, ConditionalRetrieveMixin
 from .filters import TitleFilter
-from .serializer import (AdminSerializer, CategorySerializer,
-                         CommentSerializer, GenreSerializer, ReviewSerializer,
-                         SignUpSerializer, TitleSerializer, TokenSerializer,
-                         UserSerializer)
+from .metrics import SerializerTimingMixin, serializer_data
+from .serializer import (AdminSerializer, AutocompleteQuerySerializer,
+                         CategorySerializer, CommentSerializer,
+                         GenreSerializer, RecommendationsQuerySerializer,
+                         RecommendedTitleSerializer, ReviewSerializer,
+                         SearchQuerySerializer, SearchResultSerializer,
+                         SignUpSerializer, SimilarTitleSerializer,
+                         TitleSerializer, TitleStatsSerializer,
+                         TokenSerializer, TopTitleSerializer,
+                         TopTitlesQuerySerializer, UserSerializer)
 from .viewsets import ListCreateDeleteViewSet
 
 Users = get_user_model()
 
 
-class CategoryViewSet(ListCreateDeleteViewSet):
+class CategoryViewSet(
+    ConditionalListMixin, CachedListMixin, ListCreateDeleteViewSet
+):
     """Вьюсет для модели категории."""
+    cache_catalogue = 'categories'
+    etag_catalogues = ('categories',)
     serializer_class = CategorySerializer
     queryset = Category.objects.all()
 
 
-class GenreViewSet(ListCreateDeleteViewSet):
+class GenreViewSet(
+    ConditionalListMixin, CachedListMixin, ListCreateDeleteViewSet
+):
     """Вьюсет для модели жанров."""
+    cache_catalogue = 'genres'
+    etag_catalogues = ('genres',)
     serializer_class = GenreSerializer
     queryset = Genre.objects.all()
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(
+    ConditionalListMixin, ConditionalRetrieveMixin,
+    CachedListMixin, CachedRetrieveMixin, SerializerTimingMixin,
+    viewsets.ModelViewSet
+):
     """Вьюсет модели произведений."""
+    cache_catalogue = 'titles'
+    etag_catalogues = ('titles',)
     serializer_class = TitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     filterset_class = TitleFilter
-    ordering = ('name',)
+    ordering = ('name', 'pk')
 
+    @action(methods=['get'], detail=True)
+    def stats(self, request, pk=None):
+        return self.conditional_response(self.title_stats, request, pk=pk)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    @action(methods=['get'], detail=False)
+    def top(self, request):
+        return self.conditional_response(self.top_titles, request)
+
+    def top_titles(self, request):
+        """Лучшие произведения по взвешенному рейтингу из TitleRank."""
+        serializer = TopTitlesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        category = serializer.validated_data.get('category')
+        genre = serializer.validated_data.get('genre')
+        ranks = leaderboard.top(
+            category_id=category and category.pk,
+            genre_id=genre and genre.pk,
+            limit=serializer.validated_data['limit']
+        )
+        return Response(serializer_data(request, TopTitleSerializer(
+            load_ranked_titles(ranks, 'weighted_rating'), many=True
+        )))
+
+    @action(methods=['get'], detail=True)
+    def similar(self, request, pk=None):
+        """Похожие произведения из таблицы, заполненной buildsimilar."""
+        title = get_object_or_404(Title.objects.only('pk'), pk=pk)
+        serializer = RecommendationsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        neighbours = recommendations.similar(
+            title.pk, serializer.validated_data['limit']
+        )
+        return Response(serializer_data(request, SimilarTitleSerializer(
+            load_ranked_titles(neighbours, 'similarity'), many=True
+        )))
+
+    def title_stats(self, request, pk=None):
+        """Распределение и статистика оценок по гистограмме произведения."""
+        title = get_object_or_404(
+            Title.objects.only(*(score_field(score) for score in SCORES)),
+            pk=pk
+        )
+        return Response(serializer_data(request, TitleStatsSerializer(
+            dict(title.get_rating_stats(), id=title.pk)
+        )))
+
+
+def load_ranked_titles(ranks, attribute):
+    """Произведения в порядке пар (id, значение) со значением в attribute."""
+    titles = TitleViewSet.queryset.in_bulk([pk for pk, value in ranks])
+    result = []
+    for pk, value in ranks:
+        if pk in titles:
+            setattr(titles[pk], attribute, value)
+            result.append(titles[pk])
+    return result
+
+
+class ReviewViewSet(
+    ConditionalListMixin, ConditionalRetrieveMixin, SerializerTimingMixin,
+    viewsets.ModelViewSet
+):
     """Вьюсет для модели отзывов."""
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthorAdminModerator,)
+    ordering = ('-pub_date', '-pk')
+    etag_catalogues = ('reviews',)
 
-    def get_title(self):
+    @cached_property
+    def title(self):
         return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        if self.action == 'list':
+            # Пустой список не отличить от несуществующего произведения.
+            reviews = self.title.reviews.all()
+        else:
+            reviews = Review.objects.filter(
+                title_id=self.kwargs.get('title_id')
+            )
+        return reviews.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        try:
+            with transaction.atomic():
+                serializer.save(
+                    author_id=self.request.user.pk, title=self.title
+                )
+        except IntegrityError:
+            if not self.title.reviews.filter(
+                author_id=self.request.user.pk
+            ).exists():
+                raise
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Нельзя оставить отзыв на одно произведение дважды'
+                ]
+            })
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalListMixin, ConditionalRetrieveMixin, SerializerTimingMixin,
+    viewsets.ModelViewSet
+):
     """Вьюсет для модели комментариев."""
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorAdminModerator,)
+    ordering = ('-pub_date', '-pk')
+    etag_catalogues = ('comments',)
 
-    def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+    @cached_property
+    def review(self):
+        return get_object_or_404(
+            Review,
+            pk=self.kwargs.get('review_id'),
+            title_id=self.kwargs.get('title_id')
+        )
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        if self.action == 'list':
+            # Пустой список не отличить от несуществующего отзыва.
+            comments = self.review.comments.all()
+        else:
+            comments = Comment.objects.filter(
+                review_id=self.kwargs.get('review_id'),
+                review__title_id=self.kwargs.get('title_id')
+            )
+        return comments.select_related('author')
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(author_id=self.request.user.pk, review=self.review)
 
 
 @api_view(['POST'])
@@ -92,10 +227,12 @@ def signup_user(request):
         raise ValidationError(
             f'Ошибка! Это имя пользователя или email уже существуют: {error}')
     message = f'Ваш код авторизации {confirmation_code}. Наслаждайтесь!'
-    send_mail(
+    queue_mail(
         'Верификация YaMDB', message, settings.ADMIN_EMAIL, [user.email]
     )
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    return Response(
+        serializer_data(request, serializer), status=status.HTTP_200_OK
+    )
 
 
 @api_view(['POST'])
@@ -108,16 +245,70 @@ def get_token(request):
     user = get_object_or_404(User, username=username)
     if (user.confirmation_code != ' '
             and user.confirmation_code == confirmation_code):
-        refresh = RefreshToken.for_user(user)
+        token = get_access_token(user)
         user.confirmation_code = ' '
         user.save()
-        return Response(
-            str(refresh.access_token), status=status.HTTP_200_OK
-        )
+        return Response(str(token), status=status.HTTP_200_OK)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+@api_view(['GET'])
+def autocomplete(request):
+    """Подсказки по началу названия из индекса в памяти, без БД."""
+    serializer = AutocompleteQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    prefix = serializer.validated_data['q']
+    limit = serializer.validated_data['limit']
+    types = serializer.validated_data.get('type') or CATALOGUES.keys()
+    data = {}
+    for name in types:
+        found = CATALOGUES[name].search(prefix, limit)
+        if name == 'titles':
+            data[name] = [
+                {'id': int(value), 'name': title} for title, value in found
+            ]
+        else:
+            data[name] = [
+                {'name': title, 'slug': value} for title, value in found
+            ]
+    return Response(data)
+
+
+@api_view(['GET'])
+def search(request):
+    """Полнотекстовый поиск по произведениям и отзывам с ранжированием."""
+    serializer = SearchQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    paginator = PageNumberPagination()
+    page = paginator.paginate_queryset(
+        SearchResults(serializer.validated_data['q']), request
+    )
+    return paginator.get_paginated_response(
+        serializer_data(request, SearchResultSerializer(page, many=True))
+    )
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes((AdminGetOrEdit,))
+def request_metrics(request):
+    """Стоимость маршрутов API и попадания в кэш каталогов в этом процессе.
+
+    DELETE обнуляет замеры.
+    """
+    if request.method == 'DELETE':
+        metrics.reset_stats()
+        reset_catalogue_cache_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response({
+        'routes': metrics.get_stats(),
+        'catalogue_cache': catalogue_cache_stats(),
+    })
+
+
+class UserViewSet(
+    ConditionalListMixin, ConditionalRetrieveMixin, SerializerTimingMixin,
+    viewsets.ModelViewSet
+):
     """Юзеры для админа + детали и редактирование о себе."""
     queryset = User.objects.all()
     serializer_class = AdminSerializer
@@ -125,6 +316,8 @@ class UserViewSet(viewsets.ModelViewSet):
     lookup_field = 'username'
     filter_backends = (SearchFilter,)
     search_fields = ('username',)
+    etag_catalogues = ('users',)
+    etag_per_user = True
 
     @action(
         methods=['get', 'patch'],
@@ -132,10 +325,34 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(permissions.IsAuthenticated,)
     )
     def get_patch_users_me(self, request):
-        user = User.objects.get(username=self.request.user)
-        serializer = UserSerializer(user)
+        if request.method == 'GET':
+            return self.conditional_response(self.users_me, request)
+        return self.users_me(request)
+
+    @action(
+        methods=['get'],
+        detail=False, url_path='me/recommendations',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def recommendations(self, request):
+        """Произведения, которые стоит оценить, по похожим на оценённые."""
+        serializer = RecommendationsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        recommended = recommendations.recommend(
+            request.user.pk, serializer.validated_data['limit']
+        )
+        return Response(serializer_data(request, RecommendedTitleSerializer(
+            load_ranked_titles(recommended, 'predicted_rating'), many=True
+        )))
+
+    def users_me(self, request):
         if request.method == 'PATCH':
+            # Копия из кэша пользователей может отставать до
+            # USER_CACHE_TIMEOUT, а save() записывает все поля.
+            user = get_object_or_404(User, pk=request.user.pk)
             serializer = UserSerializer(user, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
-        return Response(serializer.data)
+        else:
+            serializer = UserSerializer(user_cache.get(request.user.pk))
+        return Response(serializer_data(request, serializer))
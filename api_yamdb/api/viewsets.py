@@ -2,10 +2,12 @@ from rest_framework import mixins
 from rest_framework.filters import SearchFilter
 from rest_framework.viewsets import GenericViewSet
 
+from api.metrics import SerializerTimingMixin
 from api.permissions import IsAdminOrReadOnly
 
 
 class ListCreateDeleteViewSet(
+    SerializerTimingMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class ProjectConfig(AppConfig):
+    name = 'api_yamdb'
+
+    def ready(self):
+        from .db import configure_sqlite
+        connection_created.connect(configure_sqlite)
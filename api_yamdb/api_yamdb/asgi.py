@@ -3,14 +3,150 @@ ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
-For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+Django 2.2 не умеет работать по ASGI, поэтому ASGIHandler принимает
+соединения и читает тело запроса в цикле событий, а сам Django вызывает
+через WSGI в пуле потоков: поток занят только на время работы
+представления и ORM, а не пока медленный клиент передаёт запрос или
+забирает ответ. Горячие чтения из ASGI_READ_ROUTES выполняются в своём
+пуле ASGI_READ_THREADS и не ждут, пока пул ASGI_THREADS занят записями.
+WSGI-приложение берётся из api_yamdb.wsgi вместе с прогревом индексов
+автодополнения по AUTOCOMPLETE_WARM_ON_START.
+
+    uvicorn api_yamdb.asgi:application
 """
 
+import asyncio
+import io
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.urls import Resolver404, resolve
 
-from django.core.asgi import get_asgi_application
+from api_yamdb import wsgi
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
-application = get_asgi_application()
+READ_METHODS = ('GET', 'HEAD')
+
+
+def get_environ(scope, body):
+    """WSGI-окружение запроса по ASGI-scope и прочитанному телу."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope["http_version"]}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    # Тело уже прочитано целиком, в том числе переданное по частям.
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+class ASGIHandler:
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+        self.read_routes = frozenset(settings.ASGI_READ_ROUTES)
+        self.read_executor = ThreadPoolExecutor(
+            settings.ASGI_READ_THREADS, thread_name_prefix='asgi-read'
+        )
+        self.executor = ThreadPoolExecutor(
+            settings.ASGI_THREADS, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.handle(scope, receive, send)
+        else:
+            raise ValueError(f'Неподдерживаемый тип ASGI: {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def get_executor(self, scope):
+        if scope['method'] not in READ_METHODS:
+            return self.executor
+        try:
+            route = resolve(scope['path']).view_name
+        except Resolver404:
+            return self.executor
+        if route in self.read_routes:
+            return self.read_executor
+        return self.executor
+
+    async def handle(self, scope, receive, send):
+        body = []
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        status, headers, content = await asyncio.get_running_loop(
+        ).run_in_executor(
+            self.get_executor(scope), self.run_wsgi,
+            get_environ(scope, b''.join(body))
+        )
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (name.lower().encode('latin-1'), value.encode('latin-1'))
+                for name, value in headers
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': content})
+
+    def run_wsgi(self, environ):
+        """Вызывает Django в потоке пула и читает ответ целиком.
+
+        close() ответа отправляет request_finished, который закрывает
+        соединения с БД этого потока, поэтому он вызывается здесь же.
+        """
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            started[:] = [int(status.split(' ', 1)[0]), headers]
+
+        response = self.wsgi_application(environ, start_response)
+        try:
+            content = b''.join(response)
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        return started[0], started[1], content
+
+
+application = ASGIHandler(wsgi.application)
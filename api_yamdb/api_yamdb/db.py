@@ -0,0 +1,13 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Выполняет SQLITE_PRAGMAS на новом соединении с SQLite.
+
+    PRAGMA выполняются на соединении sqlite3 напрямую, как Django включает
+    foreign_keys, и не попадают в счётчики запросов к БД.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -21,6 +22,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'django_filters',
+    'api_yamdb.apps.ProjectConfig',
     'users.apps.UsersConfig',
     'reviews.apps.ReviewsConfig',
     'api.apps.ApiConfig'
@@ -29,6 +31,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
+    'api.metrics.RequestMetricsMiddleware',
+    'api.replicas.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -59,13 +63,76 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# Пулы потоков ASGI-приложения (api_yamdb/asgi.py): GET и HEAD этих
+# маршрутов выполняются в своём пуле и не ждут записей.
+ASGI_READ_ROUTES = (
+    'api:titles-list', 'api:titles-detail', 'api:reviews-list',
+    'api:comments-list', 'api:categories-list', 'api:genres-list',
+)
+ASGI_READ_THREADS = 16
+ASGI_THREADS = 8
+
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        # Соединение живёт между запросами потока, а не открывается заново.
+        'CONN_MAX_AGE': 600,
     }
 }
+# Реплика для чтения — второе соединение с тем же файлом SQLite; в тестах
+# она зеркалит default. Настоящие реплики добавляются сюда же.
+DATABASES['replica'] = {
+    **DATABASES['default'], 'TEST': {'MIRROR': 'default'}
+}
+DATABASE_ROUTERS = ['api.replicas.ReplicaRouter']
+# Псевдонимы DATABASES, с которых читают безопасные запросы к API;
+# пустой список — всё идёт в default.
+DATABASE_REPLICAS = []
+# Сколько секунд после записи чтения пользователя идут в default, пока
+# реплики догоняют. Отметки хранятся в кэше REPLICA_STICKY_CACHE,
+# общем для процессов: следующий запрос может попасть в другой воркер.
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_CACHE = 'shared'
+# Выполняются для каждого нового соединения с SQLite. В режиме WAL чтение
+# не ждёт записи, а synchronous=NORMAL в WAL безопасен при сбое процесса.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    # Отрицательное значение — размер в КиБ: 64 МиБ на соединение.
+    'cache_size': -64000,
+    'mmap_size': 256 * 2 ** 20,
+    # Сколько миллисекунд ждать блокировки записи до ошибки.
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+}
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yamdb',
+    },
+    # Кэши auth и shared общие для воркеров и management-команд на одном
+    # сервере; при нескольких серверах их стоит заменить на Redis или
+    # Memcached.
+    'auth': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yamdb-auth'),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'yamdb-cache'),
+    },
+}
+
+# Ответы каталогов кэшируются в локальном кэше процесса, а версии
+# каталогов, которые входят в ключи кэша и ETag, — в общем кэше, чтобы
+# запись в любом процессе сбрасывала кэш во всех.
+CATALOGUE_CACHE_TIMEOUT = 60 * 5
+CATALOGUE_VERSION_CACHE = 'shared'
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -84,13 +151,13 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageOrCursorPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -118,11 +185,34 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Роль и права из клеймов токена принимаются без запроса к БД, пока
+# клеймы не отозваны и не старше TOKEN_CLAIMS_MAX_AGE секунд. Отметки
+# об отзыве хранятся в кэше TOKEN_CLAIMS_CACHE, общем для процессов
+# сервера (при нескольких серверах — Redis или Memcached); после его
+# очистки клеймы ранее выданных токенов не принимаются.
+TOKEN_CLAIMS_CACHE = 'auth'
+TOKEN_CLAIMS_MAX_AGE = 60 * 60
+
+# Кэш пользователей в памяти процесса: число записей и срок жизни в
+# секундах, за который видны изменения из других процессов.
+USER_CACHE_SIZE = 1024
+USER_CACHE_TIMEOUT = 60
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 ADMIN_EMAIL = 'admin@yamdb.ru'
 
+# Письма сначала сохраняются в outbox (users.OutgoingEmail), затем
+# отправляются фоновыми потоками пачками через одно соединение.
+EMAIL_OUTBOX_ASYNC = True
+EMAIL_OUTBOX_WORKERS = 2
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_POLL_INTERVAL = 10
+EMAIL_OUTBOX_LOCK_TIMEOUT = 300
+
 NO_REGISTER_USERNAME = 'me'
 
 MAX_CG_SLUG_LENGTH = 50
@@ -131,3 +221,48 @@ MAX_CC_NAME_LENGTH = 256
 MAX_EMAIL_NAME_LENGTH = 254
 MAX_TITLE_NAME_LENGTH = 250
 MAX_USERNAME_NAME_LENGTH = 150
+MAX_SEARCH_QUERY_LENGTH = 200
+
+# Индекс автодополнения строится в фоне при запуске сервера и
+# перестраивается не реже чем раз в AUTOCOMPLETE_REBUILD_INTERVAL секунд.
+AUTOCOMPLETE_WARM_ON_START = True
+AUTOCOMPLETE_REBUILD_INTERVAL = 60 * 10
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+
+# Взвешенный рейтинг для списков лучших: к оценкам произведения
+# добавляется TOP_TITLES_PRIOR_WEIGHT оценок TOP_TITLES_PRIOR_MEAN.
+# После изменения этих настроек списки пересчитывает recalcratings.
+TOP_TITLES_PRIOR_MEAN = 5.5
+TOP_TITLES_PRIOR_WEIGHT = 10
+TOP_TITLES_LIMIT = 10
+TOP_TITLES_MAX_LIMIT = 100
+
+# Похожие произведения и рекомендации читаются из таблицы, которую
+# заполняет команда buildsimilar.
+RECOMMENDATIONS_LIMIT = 10
+RECOMMENDATIONS_MAX_LIMIT = 50
+
+# Замеры запросов к API по маршрутам: заголовок Server-Timing и
+# статистика процесса для администраторов в /api/v1/metrics/.
+REQUEST_METRICS_SERVER_TIMING = True
+# Бюджеты запросов к БД: ключ — имя маршрута или «МЕТОД имя маршрута».
+# Превышение пишется в лог, а в тестах проваливает тест.
+QUERY_BUDGETS = {
+    'GET api:categories-list': 2,
+    'GET api:genres-list': 2,
+    'GET api:titles-list': 3,
+    'GET api:titles-detail': 2,
+    'GET api:titles-stats': 1,
+    'GET api:titles-top': 4,
+    'GET api:titles-similar': 4,
+    'GET api:reviews-list': 4,
+    'GET api:reviews-detail': 2,
+    'GET api:comments-list': 4,
+    'GET api:comments-detail': 2,
+    'GET api:users-list': 3,
+    'GET api:users-detail': 1,
+    'GET api:users-get-patch-users-me': 1,
+    'GET api:users-recommendations': 4,
+    'GET api:search': 5,
+}
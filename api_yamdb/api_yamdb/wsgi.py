@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
 application = get_wsgi_application()
+
+if settings.AUTOCOMPLETE_WARM_ON_START:
+    from reviews import autocomplete
+    autocomplete.warm()
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Category, Comment, Genre, Review, Title
+from .models import (SCORES, Category, Comment, Genre, Review, Title,
+                     score_field)
 
 
 @admin.register(Title)
@@ -9,6 +10,10 @@ class TitleAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     list_filter = ('name',)
     list_editable = ('name', 'year', 'description', 'category')
+    readonly_fields = (
+        'rating_sum', 'rating_count', 'rating',
+        *(score_field(score) for score in SCORES)
+    )
 
 
 @admin.register(Category, Genre)
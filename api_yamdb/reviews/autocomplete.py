@@ -0,0 +1,190 @@
+"""Автодополнение названий из индекса в памяти процесса.
+
+Названия произведений, жанров и категорий хранятся в отсортированных
+массивах строк, а поиск по префиксу — это bisect и срез, без запросов
+к БД. Индекс строится при запуске сервера или при первом обращении,
+обновляется сигналами сохранения и удаления и периодически
+перестраивается в фоне, чтобы подхватить изменения из других
+процессов и QuerySet.update().
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+
+from .models import Category, Genre, Title
+
+SEPARATOR = '\x00'
+
+
+def make_entry(name, value):
+    """Одна строка на запись: название и значение, по которому её найти."""
+    return f'{name}{SEPARATOR}{value}'
+
+
+class CaseFoldedView:
+    """Массив записей глазами bisect: без учёта регистра, без копий."""
+
+    def __init__(self, entries):
+        self.entries = entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index].casefold()
+
+
+class PrefixIndex:
+    """Отсортированный массив названий для поиска по началу строки.
+
+    Хранится одна строка на запись, а ключ без учёта регистра
+    вычисляется только для сравниваемых при поиске строк.
+    """
+
+    def __init__(self):
+        self.entries = []
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def build(self, rows):
+        """Заменяет содержимое парами (название, значение)."""
+        entries = [make_entry(name, value) for name, value in rows]
+        entries.sort(key=str.casefold)
+        with self.lock:
+            self.entries = entries
+
+    def add(self, name, value):
+        entry = make_entry(name, value)
+        with self.lock:
+            index = bisect_left(
+                CaseFoldedView(self.entries), entry.casefold()
+            )
+            self.entries.insert(index, entry)
+
+    def remove(self, name, value):
+        entry = make_entry(name, value)
+        key = entry.casefold()
+        with self.lock:
+            index = bisect_left(CaseFoldedView(self.entries), key)
+            while (index < len(self.entries)
+                    and self.entries[index].casefold() == key):
+                if self.entries[index] == entry:
+                    del self.entries[index]
+                    return
+                index += 1
+
+    def search(self, prefix, limit):
+        """Первые limit пар (название, значение) по алфавиту."""
+        key = prefix.casefold()
+        with self.lock:
+            start = bisect_left(CaseFoldedView(self.entries), key)
+            found = self.entries[start:start + limit]
+        result = []
+        for entry in found:
+            if not entry.casefold().startswith(key):
+                break
+            result.append(tuple(entry.rsplit(SEPARATOR, 1)))
+        return result
+
+
+class Catalogue:
+    """Индекс одного каталога с ленивой и фоновой перестройкой."""
+
+    def __init__(self, model, value_field):
+        self.model = model
+        self.value_field = value_field
+        self.index = PrefixIndex()
+        self.built_at = None
+        self.build_lock = threading.Lock()
+        self.rebuilding = False
+
+    def build(self):
+        rows = self.model.objects.values_list(
+            'name', self.value_field
+        ).order_by().iterator()
+        started = time.monotonic()
+        self.index.build((name, str(value)) for name, value in rows)
+        self.built_at = started
+
+    def rebuild_in_background(self):
+        with self.build_lock:
+            if self.rebuilding:
+                return
+            self.rebuilding = True
+
+        def run():
+            from django.db import connection
+            try:
+                self.build()
+            finally:
+                self.rebuilding = False
+                connection.close()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_index(self):
+        if self.built_at is None:
+            with self.build_lock:
+                if self.built_at is None:
+                    self.build()
+        elif (time.monotonic() - self.built_at
+                > settings.AUTOCOMPLETE_REBUILD_INTERVAL):
+            self.rebuild_in_background()
+        return self.index
+
+    def search(self, prefix, limit):
+        return self.get_index().search(prefix, limit)
+
+    def get_entry(self, instance):
+        return instance.name, str(getattr(instance, self.value_field))
+
+    def get_stored_entry(self, pk):
+        """Название и значение записи в том виде, в каком они в БД."""
+        row = self.model.objects.filter(pk=pk).values_list(
+            'name', self.value_field
+        ).first()
+        return row and (row[0], str(row[1]))
+
+    @property
+    def built(self):
+        return self.built_at is not None
+
+    def replace(self, old, new):
+        if not self.built:
+            return
+        if old is not None:
+            self.index.remove(*old)
+        if new is not None:
+            self.index.add(*new)
+
+    def refresh(self):
+        if self.built_at is not None:
+            self.rebuild_in_background()
+
+    def invalidate(self):
+        self.built_at = None
+
+
+CATALOGUES = {
+    'titles': Catalogue(Title, 'pk'),
+    'genres': Catalogue(Genre, 'slug'),
+    'categories': Catalogue(Category, 'slug'),
+}
+MODEL_CATALOGUES = {
+    catalogue.model: catalogue for catalogue in CATALOGUES.values()
+}
+
+
+def warm():
+    """Строит все индексы в фоне, не задерживая запуск сервера."""
+    for catalogue in CATALOGUES.values():
+        catalogue.rebuild_in_background()
+
+
+def invalidate():
+    for catalogue in CATALOGUES.values():
+        catalogue.invalidate()
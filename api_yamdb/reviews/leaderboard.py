@@ -0,0 +1,93 @@
+"""Списки лучших произведений по взвешенному (байесовскому) рейтингу.
+
+Средняя оценка произведения с парой отзывов ненадёжна, поэтому места
+распределяются по weighted_rating: чем меньше у произведения отзывов,
+тем ближе его рейтинг к TOP_TITLES_PRIOR_MEAN. Рейтинг хранится в
+TitleRank отдельной строкой для общего списка, списка категории и
+каждого жанра произведения. Отзывы сдвигают его сигналами через
+TitleRankQuerySet.change_rating, а здесь строки раскладываются по
+спискам заново при смене категории и жанров.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .models import Title, TitleRank, weighted_rating
+
+
+def make_ranks(title, genre_ids):
+    values = {
+        'title_id': title.pk,
+        'rating_sum': title.rating_sum,
+        'rating_count': title.rating_count,
+        'score': (
+            weighted_rating(title.rating_sum, title.rating_count)
+            if title.rating_count else None
+        ),
+    }
+    ranks = [TitleRank(**values)]
+    if title.category_id is not None:
+        ranks.append(TitleRank(category_id=title.category_id, **values))
+    ranks += [TitleRank(genre_id=genre_id, **values) for genre_id in genre_ids]
+    return ranks
+
+
+def get_genre_ids(title_ids, using=DEFAULT_DB_ALIAS):
+    genre_ids = {}
+    for title_id, genre_id in Title.genre.through.objects.using(using).filter(
+        title_id__in=title_ids
+    ).values_list('title_id', 'genre_id'):
+        genre_ids.setdefault(title_id, []).append(genre_id)
+    return genre_ids
+
+
+def place_titles(titles, using=DEFAULT_DB_ALIAS):
+    """Заново раскладывает произведения по спискам их категории и жанров."""
+    title_ids = [title.pk for title in titles]
+    genre_ids = get_genre_ids(title_ids, using)
+    with transaction.atomic(using=using):
+        TitleRank.objects.using(using).filter(title_id__in=title_ids).delete()
+        TitleRank.objects.using(using).bulk_create([
+            rank for title in titles
+            for rank in make_ranks(title, genre_ids.get(title.pk, ()))
+        ])
+
+
+def place_title_ids(title_ids, using=DEFAULT_DB_ALIAS):
+    place_titles(list(
+        Title.objects.using(using).filter(pk__in=title_ids).only(
+            'category_id', 'rating_sum', 'rating_count'
+        )
+    ), using)
+
+
+def rebuild(using=DEFAULT_DB_ALIAS, batch_size=1000):
+    """Пересчитывает все списки, например после смены настроек веса."""
+    titles = Title.objects.using(using).only(
+        'category_id', 'rating_sum', 'rating_count'
+    ).order_by('pk')
+    with transaction.atomic(using=using):
+        TitleRank.objects.using(using).all().delete()
+        last_pk = 0
+        while True:
+            batch = list(titles.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return
+            genre_ids = get_genre_ids([title.pk for title in batch], using)
+            # Размер пачки вставки выбирает бэкенд: у SQLite он ограничен
+            # числом частей составного SELECT.
+            TitleRank.objects.using(using).bulk_create([
+                rank for title in batch
+                for rank in make_ranks(title, genre_ids.get(title.pk, ()))
+            ])
+            last_pk = batch[-1].pk
+
+
+def top(category_id=None, genre_id=None, limit=None):
+    """Первые места списка: пары (id произведения, взвешенный рейтинг)."""
+    return list(
+        TitleRank.objects.filter(
+            category_id=category_id, genre_id=genre_id, score__isnull=False
+        ).order_by('-score', 'title_id').values_list(
+            'title_id', 'score'
+        )[:limit or settings.TOP_TITLES_LIMIT]
+    )
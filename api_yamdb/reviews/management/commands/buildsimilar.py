@@ -0,0 +1,69 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.models import SimilarTitle
+
+try:
+    import numpy as np
+except ImportError:  # Без NumPy команда сообщает, что его нужно установить.
+    np = None
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает похожие произведения по оценкам пользователей '
+            'для рекомендаций.')
+    BATCH_SIZE = 5000
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--neighbours',
+            type=int,
+            default=20,
+            help='Сколько похожих произведений хранить для каждого.'
+        )
+        parser.add_argument(
+            '--min_common',
+            type=int,
+            default=2,
+            help='Сколько пользователей должны оценить оба произведения.'
+        )
+        parser.add_argument(
+            '--max_pairs',
+            type=int,
+            default=5000000,
+            help='Сколько пар оценок держать в памяти одновременно.'
+        )
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError(
+                'Для buildsimilar нужен NumPy: pip install numpy')
+        from reviews.similarity import load_ratings, neighbours
+
+        verbosity = options['verbosity']
+        users, titles, scores = load_ratings()
+        if verbosity:
+            print(f'Оценок загружено: {len(scores)}.')
+        rows = (
+            SimilarTitle(title_id=title_id, similar_id=similar_id, score=score)
+            for title_id, similar_id, score in neighbours(
+                users, titles, scores,
+                limit=options['neighbours'],
+                min_common=options['min_common'],
+                max_pairs=options['max_pairs']
+            )
+        )
+        saved = 0
+        # Таблица заменяется целиком, запросы видят прежнюю до коммита.
+        with transaction.atomic():
+            SimilarTitle.objects.all().delete()
+            while True:
+                batch = list(islice(rows, self.BATCH_SIZE))
+                if not batch:
+                    break
+                SimilarTitle.objects.bulk_create(batch)
+                saved += len(batch)
+        if verbosity:
+            print(f'Похожих произведений сохранено: {saved}.')
@@ -0,0 +1,153 @@
+import random
+from itertools import count, islice
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from reviews import search
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import bulk_changed
+from users.models import User
+
+WORDS = (
+    'тёмный', 'берег', 'город', 'последний', 'ветер', 'дом', 'путь',
+    'остров', 'сад', 'мост', 'океан', 'замок', 'поезд', 'свет', 'край',
+    'тихий', 'северный', 'золотой', 'старый', 'шторм', 'сон', 'лес',
+)
+# Ограничение year_check в БД фиксирует год создания миграции.
+YEARS = (1950, 2020)
+
+
+class Command(BaseCommand):
+    help = ('Заполняет БД синтетическими пользователями, произведениями, '
+            'отзывами и комментариями для нагрузочных замеров.')
+    MODELS = [Comment, Review, Title, Genre, Category, User]
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=30)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument(
+            '--genres_per_title', type=int, default=2,
+            help='Сколько жанров у каждого произведения.'
+        )
+        parser.add_argument('--reviews_per_title', type=int, default=10)
+        parser.add_argument('--comments_per_review', type=int, default=2)
+        parser.add_argument(
+            '--seed', type=int, default=1,
+            help='Одинаковый seed даёт одинаковые данные.'
+        )
+        parser.add_argument(
+            '--batch_size', type=int, default=5000,
+            help='Размер пачки bulk_create.'
+        )
+        parser.add_argument(
+            '--clear_base',
+            action='store_true',
+            help='Очищает таблицы моделей перед заполнением.'
+        )
+
+    def text(self, rng, words):
+        return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+    def next_pk(self, model):
+        return (model.objects.aggregate(pk=Max('pk'))['pk'] or 0) + 1
+
+    def insert(self, model, objects, batch_size, verbosity):
+        """Вставляет объекты пачками, каждую в своей транзакции."""
+        total = 0
+        while True:
+            batch = list(islice(objects, batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+                search.index_objects(batch)
+            total += len(batch)
+        if verbosity:
+            print(f'{model._meta.verbose_name_plural}: {total}')
+        return total
+
+    def handle(self, *args, **options):
+        if options['reviews_per_title'] > options['users']:
+            raise CommandError(
+                'Отзывов на произведение не может быть больше, чем '
+                'пользователей: один пользователь — один отзыв.')
+        if options['genres_per_title'] > options['genres']:
+            raise CommandError(
+                'Жанров у произведения не может быть больше, чем жанров.')
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        verbosity = options['verbosity']
+        if options['clear_base']:
+            for model in self.MODELS:
+                model.objects.all().delete()
+
+        start = {
+            model: self.next_pk(model)
+            for model in (User, Category, Genre, Title, Review, Comment)
+        }
+        users = range(start[User], start[User] + options['users'])
+        categories = range(
+            start[Category], start[Category] + options['categories'])
+        genres = range(start[Genre], start[Genre] + options['genres'])
+        titles = range(start[Title], start[Title] + options['titles'])
+
+        self.insert(User, (
+            User(
+                pk=pk, username=f'gen_user{pk}',
+                email=f'gen_user{pk}@yamdb.fake', role=User.USER
+            ) for pk in users
+        ), batch_size, verbosity)
+        self.insert(Category, (
+            Category(pk=pk, name=f'Категория {pk}', slug=f'gen-category-{pk}')
+            for pk in categories
+        ), batch_size, verbosity)
+        self.insert(Genre, (
+            Genre(pk=pk, name=f'Жанр {pk}', slug=f'gen-genre-{pk}')
+            for pk in genres
+        ), batch_size, verbosity)
+        self.insert(Title, (
+            Title(
+                pk=pk, name=f'{self.text(rng, 3).capitalize()} {pk}',
+                year=rng.randint(*YEARS),
+                description=self.text(rng, 12),
+                category_id=(
+                    rng.choice(categories) if categories else None
+                )
+            ) for pk in titles
+        ), batch_size, verbosity)
+        self.insert(Title.genre.through, (
+            Title.genre.through(title_id=title_id, genre_id=genre_id)
+            for title_id in titles
+            for genre_id in rng.sample(genres, options['genres_per_title'])
+        ), batch_size, verbosity)
+
+        review_pks = count(start[Review])
+        reviews = (
+            Review(
+                pk=next(review_pks), title_id=title_id, author_id=author_id,
+                text=self.text(rng, 20), score=rng.randint(1, 10)
+            )
+            for title_id in titles
+            for author_id in rng.sample(users, options['reviews_per_title'])
+        )
+        reviews_count = self.insert(Review, reviews, batch_size, verbosity)
+        review_ids = range(start[Review], start[Review] + reviews_count)
+        comments = (
+            Comment(
+                review_id=review_id, author_id=rng.choice(users),
+                text=self.text(rng, 10)
+            )
+            for review_id in review_ids
+            for _ in range(options['comments_per_review'])
+        )
+        self.insert(Comment, comments, batch_size, verbosity)
+
+        call_command('recalcratings', verbosity=0)
+        bulk_changed.send(sender=self.__class__, models=self.MODELS)
+        if verbosity:
+            print('Генерация завершена.')
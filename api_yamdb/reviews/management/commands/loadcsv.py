@@ -1,10 +1,23 @@
 import csv
+import gzip
+import io
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from itertools import islice
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, connections, transaction
 from rest_framework.utils.model_meta import get_field_info
 
+from reviews import search
 from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.signals import bulk_changed
 from users.models import User
 
 
@@ -29,6 +42,9 @@ class Command(BaseCommand):
         COMMENT: Comment,
         GENRE_TITLE: Title
     }
+    # Связанные таблицы больше этого размера проверяются по id пачки.
+    KNOWN_IDS_LIMIT = 100000
+    IN_QUERY_SIZE = 900
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -41,6 +57,34 @@ class Command(BaseCommand):
             action='store_true',
             help='Выводит только основную информацию и сообщения об ошибках.'
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Загружает файлы пачками через bulk_create, '
+                 'каждый файл в своей транзакции.'
+        )
+        parser.add_argument(
+            '--batch_size',
+            type=int,
+            default=1000,
+            help='Размер пачки записей для --bulk.'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Путь к файлу контрольной точки: каждая пачка фиксируется '
+                 'отдельной транзакцией, а прогресс записывается в файл.'
+        )
+        parser.add_argument(
+            '--resume_from',
+            help='Продолжает загрузку с контрольной точки из указанного файла.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Число файлов, загружаемых одновременно. Файл начинает '
+                 'загружаться после файлов, на которые ссылаются его записи.'
+        )
 
     def clear_tables(self, models, err_msg=False):
         print('Начинается очистка таблиц.')
@@ -82,19 +126,277 @@ class Command(BaseCommand):
             except Exception as err:
                 print(f'Какая то ошибка...{err}')
 
-    def handle(self, *args, **options):
-        if options['clear_base']:
-            self.clear_tables(self.MODELS, options['only_err_msg'])
+    def get_relations(self, model, fieldnames):
+        """Сопоставляет столбцы csv с внешними ключами модели."""
+        relations = {}
+        for name, info in get_field_info(model).forward_relations.items():
+            if info.to_many:
+                continue
+            attname = model._meta.get_field(name).attname
+            for column in (name, attname):
+                if column in fieldnames:
+                    relations[column] = (attname, info.related_model)
+        return relations
 
-        for url, model in self.FILE_MODEL.items():
-            path = f'{settings.STATICFILES_DIRS[0]}{url}'
-            print(f'Начинается загрузка из {url}')
-            try:
-                with open(path, newline='', encoding='utf-8') as file:
+    def build_object(self, model, row, relations, known_ids):
+        for column, (attname, r_model) in relations.items():
+            value = row.pop(column)
+            if value not in known_ids[r_model]:
+                raise ValueError(
+                    f'нет записи {r_model.__name__} с id={value}'
+                )
+            row[attname] = value
+        return model(**row)
+
+    def get_known_ids(self, relations):
+        """Загружает id небольших связанных таблиц один раз на файл."""
+        known_ids = {}
+        for attname, r_model in relations.values():
+            if r_model.objects.count() <= self.KNOWN_IDS_LIMIT:
+                known_ids[r_model] = {
+                    str(pk)
+                    for pk in r_model.objects.values_list('pk', flat=True)
+                }
+        return known_ids
+
+    def get_chunk_ids(self, chunk, relations, known_ids):
+        """Дополняет известные id теми, что упомянуты в пачке строк."""
+        chunk_ids = dict(known_ids)
+        for column, (attname, r_model) in relations.items():
+            if r_model in known_ids:
+                continue
+            values = sorted({
+                row[column] for row in chunk if str(row[column]).isdigit()
+            })
+            found = chunk_ids.setdefault(r_model, set())
+            for start in range(0, len(values), self.IN_QUERY_SIZE):
+                found.update(
+                    str(pk) for pk in r_model.objects.filter(
+                        pk__in=values[start:start + self.IN_QUERY_SIZE]
+                    ).values_list('pk', flat=True)
+                )
+        return chunk_ids
+
+    def insert_batch(self, model, batch):
+        """Вставляет пачку, а при ошибке — поштучно, отбраковывая строки."""
+        try:
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+                search.index_objects(batch)
+            return len(batch)
+        except (DatabaseError, ValueError):
+            loaded = 0
+            for obj in batch:
+                try:
+                    with transaction.atomic():
+                        model.objects.bulk_create([obj])
+                        search.index_objects([obj])
+                    loaded += 1
+                except (DatabaseError, ValueError) as err:
+                    print(f'Запись {obj.pk} отклонена: {err}')
+            return loaded
+
+    def write_base_bulk(self, url, csv, batch_size, on_chunk=None):
+        """Загружает файл пачками, возвращает число принятых и отклонённых.
+
+        В памяти одновременно находится не больше одной пачки строк.
+        После фиксации каждой пачки вызывается on_chunk(прочитано строк).
+        """
+        model = self.get_file_model(url)
+        relations = self.get_relations(model, csv.fieldnames)
+        known_ids = self.get_known_ids(relations)
+        loaded = rejected = 0
+        for chunk in iter(lambda: list(islice(csv, batch_size)), []):
+            chunk_ids = self.get_chunk_ids(chunk, relations, known_ids)
+            batch = []
+            for row in chunk:
+                try:
+                    batch.append(
+                        self.build_object(model, row, relations, chunk_ids)
+                    )
+                except (TypeError, ValueError) as err:
+                    rejected += 1
+                    print(f'Запись {row.get("id")} отклонена: {err}')
+            with transaction.atomic():
+                accepted = self.insert_batch(model, batch)
+            loaded += accepted
+            rejected += len(batch) - accepted
+            if on_chunk:
+                on_chunk(len(chunk))
+        return loaded, rejected
+
+    @contextmanager
+    def open_csv(self, path):
+        """Открывает csv или сжатый gzip csv (путь с суффиксом .gz).
+
+        Возвращает текстовый поток, сырой файл для подсчёта прочитанных
+        байт и размер файла.
+        """
+        if not os.path.exists(path) and os.path.exists(f'{path}.gz'):
+            path = f'{path}.gz'
+        with open(path, 'rb') as raw:
+            stream = (
+                gzip.GzipFile(fileobj=raw) if path.endswith('.gz') else raw
+            )
+            with io.TextIOWrapper(
+                    stream, encoding='utf-8', newline='') as file:
+                yield file, raw, os.path.getsize(path)
+
+    def read_checkpoint(self, path):
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            raise CommandError(f'Нет файла контрольной точки {path}')
+
+    def save_checkpoint(self, path, checkpoint):
+        """Атомарно перезаписывает файл контрольной точки."""
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as file:
+            json.dump(checkpoint, file)
+        os.replace(f'{path}.tmp', path)
+
+    def load_file_bulk(self, url, path, options, checkpoint):
+        checkpoint_path = options['checkpoint']
+        skip = checkpoint['rows'].get(url, 0)
+        read = skip
+        started = time.perf_counter()
+
+        def on_chunk(rows):
+            nonlocal read
+            read += rows
+            if checkpoint_path:
+                with self.checkpoint_lock:
+                    checkpoint['rows'][url] = read
+                    self.save_checkpoint(checkpoint_path, checkpoint)
+            if not options['only_err_msg']:
+                print(f'{url}: прочитано строк {read} '
+                      f'({raw.tell() * 100 // max(size, 1)}% файла)')
+
+        with self.open_csv(path) as (file, raw, size):
+            rows = csv.DictReader(file, delimiter=',')
+            if skip:
+                print(f'Пропуск уже загруженных строк: {skip}')
+                next(islice(rows, skip, skip), None)
+            with nullcontext() if checkpoint_path else transaction.atomic():
+                loaded, rejected = self.write_base_bulk(
+                    url, rows, options['batch_size'], on_chunk
+                )
+        elapsed = time.perf_counter() - started
+        print(f'{url}: загружено {loaded}, отклонено {rejected}, '
+              f'{(loaded + rejected) / max(elapsed, 1e-6):.0f} строк/с.')
+        with self.checkpoint_lock:
+            checkpoint['done'].append(url)
+            checkpoint['rows'].pop(url, None)
+            if checkpoint_path:
+                self.save_checkpoint(checkpoint_path, checkpoint)
+
+    def get_file_model(self, url):
+        if url == self.GENRE_TITLE:
+            return Title.genre.through
+        return self.FILE_MODEL[url]
+
+    def get_dependencies(self):
+        """Строит граф зависимостей файлов по внешним ключам их моделей."""
+        model_files = {
+            self.get_file_model(url): url for url in self.FILE_MODEL
+        }
+        dependencies = {}
+        for url in self.FILE_MODEL:
+            relations = get_field_info(
+                self.get_file_model(url)).forward_relations
+            dependencies[url] = {
+                model_files[info.related_model]
+                for info in relations.values()
+                if not info.to_many and info.related_model in model_files
+            } - {url}
+        return dependencies
+
+    def load_file(self, url, options, checkpoint):
+        path = f'{settings.STATICFILES_DIRS[0]}{url}'
+        print(f'Начинается загрузка из {url}')
+        try:
+            if options['bulk']:
+                self.load_file_bulk(url, path, options, checkpoint)
+            else:
+                with self.open_csv(path) as (file, raw, size):
                     csvfile = csv.DictReader(file, delimiter=',')
                     self.write_base(
-                        url, model, csvfile, options['only_err_msg']
+                        url, self.FILE_MODEL[url], csvfile,
+                        options['only_err_msg']
                     )
-                print(f'Загрузка из {url} завершена.')
-            except FileNotFoundError as err:
-                print(f'Нет файла {url} в нужной дериктории: {err}')
+            print(f'Загрузка из {url} завершена.')
+        except FileNotFoundError as err:
+            print(f'Нет файла {url} в нужной дериктории: {err}')
+
+    def load_file_in_thread(self, url, options, checkpoint):
+        try:
+            self.load_file(url, options, checkpoint)
+        finally:
+            connections.close_all()
+
+    def supports_parallel_writes(self):
+        """Можно ли писать в БД из нескольких потоков одновременно."""
+        return connection.vendor != 'sqlite'
+
+    def load_files(self, options, checkpoint):
+        """Загружает каждый файл после файлов, от которых он зависит."""
+        dependencies = self.get_dependencies()
+        done = set(checkpoint['done'])
+        pending = [url for url in self.FILE_MODEL if url not in done]
+        for url in done:
+            print(f'Файл {url} уже загружен, пропуск.')
+        workers = options['workers']
+        if workers > 1 and not self.supports_parallel_writes():
+            print('SQLite не поддерживает параллельную запись, '
+                  'файлы загружаются по одному.')
+            workers = 1
+        if workers <= 1:
+            while pending:
+                url = next(
+                    (url for url in pending if dependencies[url] <= done),
+                    None
+                )
+                if url is None:
+                    raise CommandError(f'Циклические зависимости: {pending}')
+                pending.remove(url)
+                self.load_file(url, options, checkpoint)
+                done.add(url)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            running = {}
+            while pending or running:
+                for url in [u for u in pending if dependencies[u] <= done]:
+                    pending.remove(url)
+                    running[executor.submit(
+                        self.load_file_in_thread, url, options, checkpoint
+                    )] = url
+                if not running:
+                    raise CommandError(f'Циклические зависимости: {pending}')
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done.add(running.pop(future))
+                    future.result()
+
+    def handle(self, *args, **options):
+        checkpoint = {'done': [], 'rows': {}}
+        if options['resume_from']:
+            if options['clear_base']:
+                raise CommandError(
+                    '--clear_base нельзя совмещать с --resume_from')
+            checkpoint = self.read_checkpoint(options['resume_from'])
+            options['checkpoint'] = options['resume_from']
+        options['bulk'] = bool(options['bulk'] or options['checkpoint'])
+        self.checkpoint_lock = threading.Lock()
+
+        if options['clear_base']:
+            self.clear_tables(self.MODELS, options['only_err_msg'])
+
+        self.load_files(options, checkpoint)
+        if options['bulk']:
+            call_command('recalcratings', verbosity=0)
+            bulk_changed.send(
+                sender=self.__class__, models=list(self.FILE_MODEL.values())
+            )
+        if options['checkpoint'] and os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+            print('Загрузка завершена, контрольная точка удалена.')
@@ -0,0 +1,226 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Max
+
+from reviews import leaderboard
+from reviews.models import SCORES, Review, Title, score_field
+from reviews.signals import bulk_changed
+
+try:
+    import numpy as np
+except ImportError:  # NumPy нужен только для --vectorized.
+    np = None
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает сохранённые рейтинги и гистограммы оценок '
+            'произведений по отзывам, сообщает о расхождениях и '
+            'обновляет списки лучших.')
+    BATCH_SIZE = 500
+    STREAM_CHUNK = 500000
+    FIELDS = (
+        'rating_sum', 'rating_count', *(score_field(s) for s in SCORES)
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry_run',
+            action='store_true',
+            help='Только выводит расхождения, ничего не записывая.'
+        )
+        parser.add_argument(
+            '--vectorized',
+            action='store_true',
+            help='Считает гистограммы всех произведений в NumPy за один '
+                 'проход по оценкам вместо группировки в БД.'
+        )
+
+    def get_title_batches(self):
+        """Произведения пачками по возрастанию pk, без открытого курсора."""
+        titles = Title.objects.order_by('pk').only(
+            'name', 'rating', *self.FIELDS
+        )
+        last_pk = 0
+        while True:
+            batch = list(titles.filter(pk__gt=last_pk)[:self.BATCH_SIZE])
+            if not batch:
+                return
+            yield batch
+            last_pk = batch[-1].pk
+
+    def count_batch_scores(self, titles):
+        """Гистограммы пачки произведений группировкой в БД.
+
+        Отзывы выбираются по диапазону pk пачки, так что каждый запрос
+        читает по индексу только свои строки, а не всю таблицу.
+        """
+        histograms = defaultdict(lambda: [0] * len(SCORES))
+        counts = Review.objects.filter(
+            title_id__gte=titles[0].pk, title_id__lte=titles[-1].pk,
+            score__in=SCORES
+        ).order_by().values_list('title_id', 'score').annotate(
+            count=Count('pk')
+        )
+        for title_id, score, count in counts:
+            histograms[title_id][score - SCORES[0]] = count
+        return histograms
+
+    def count_scores(self):
+        """Гистограммы оценок всех произведений: массив [title_id, score].
+
+        Пары (произведение, оценка) читаются курсором БД пачками, минуя
+        создание объектов ORM, и складываются в массив через bincount.
+        """
+        max_pk = Title.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        width = SCORES[-1] + 1
+        histograms = np.zeros((max_pk + 1) * width, dtype=np.int64)
+        sql, params = Review.objects.filter(
+            title_id__lte=max_pk, score__in=SCORES
+        ).order_by().values_list('title_id', 'score').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(self.STREAM_CHUNK)
+                if not rows:
+                    break
+                chunk = np.array(rows, dtype=np.int64)
+                histograms += np.bincount(
+                    chunk[:, 0] * width + chunk[:, 1],
+                    minlength=histograms.size
+                )
+        return histograms.reshape(max_pk + 1, width)
+
+    def get_actual(self, title, histograms):
+        """Сумма, число оценок и гистограмма произведения по отзывам."""
+        counts = histograms[title.pk]
+        return (
+            sum(score * n for score, n in zip(SCORES, counts)),
+            sum(counts),
+            *counts
+        )
+
+    def set_actual(self, title, stored, actual, verbosity=1):
+        """Сообщает о расхождении и переносит значения по отзывам."""
+        if verbosity:
+            print(f'Расхождение у произведения {title.pk} "{title.name}": '
+                  f'сохранено {stored[0]}/{stored[1]} {stored[2:]}, '
+                  f'по отзывам {actual[0]}/{actual[1]} {actual[2:]}')
+        for field, value in zip(self.FIELDS, actual):
+            setattr(title, field, value)
+        title.rating = (
+            title.rating_sum / title.rating_count
+            if title.rating_count else None
+        )
+
+    def find_drift(self, titles, histograms, verbosity=1):
+        drifted = []
+        for title in titles:
+            actual = self.get_actual(title, histograms)
+            stored = tuple(getattr(title, field) for field in self.FIELDS)
+            if stored == actual:
+                continue
+            self.set_actual(title, stored, actual, verbosity)
+            drifted.append(title)
+        return drifted
+
+    def get_stored(self, max_pk):
+        """Сохранённые поля произведений массивом строк [pk, *FIELDS]."""
+        sql, params = Title.objects.filter(pk__lte=max_pk).order_by(
+            'pk'
+        ).values_list('pk', *self.FIELDS).query.sql_with_params()
+        chunks = [np.zeros((0, len(self.FIELDS) + 1), dtype=np.int64)]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(self.STREAM_CHUNK)
+                if not rows:
+                    break
+                chunks.append(np.array(rows, dtype=np.int64))
+        return np.concatenate(chunks)
+
+    def find_drift_vectorized(self, histograms, verbosity=1):
+        """Пачки произведений с расхождениями по массиву гистограмм.
+
+        Суммы и числа оценок считаются матричными операциями и сравниваются
+        с сохранёнными значениями целиком; объекты ORM загружаются только
+        для разошедшихся произведений.
+        """
+        scores = histograms[:, SCORES[0]:]
+        actual = np.column_stack(
+            (scores @ np.array(SCORES), scores.sum(axis=1), scores)
+        )
+        stored = self.get_stored(len(histograms) - 1)
+        pks = stored[:, 0]
+        drift = (stored[:, 1:] != actual[pks]).any(axis=1)
+        pks, stored, actual = pks[drift], stored[drift, 1:], actual[pks[drift]]
+        titles = Title.objects.only('name', 'rating', *self.FIELDS)
+        for start in range(0, len(pks), self.BATCH_SIZE):
+            batch = pks[start:start + self.BATCH_SIZE].tolist()
+            loaded = titles.in_bulk(batch)
+            drifted = []
+            for i, pk in enumerate(batch, start):
+                self.set_actual(
+                    loaded[pk], tuple(stored[i].tolist()),
+                    tuple(actual[i].tolist()), verbosity
+                )
+                drifted.append(loaded[pk])
+            yield drifted
+
+    def save_titles(self, titles):
+        """Записывает пересчитанные поля одним UPDATE на произведение.
+
+        bulk_update собирает CASE на каждое поле и строку, и на тысячах
+        произведений построение такого запроса дороже самого пересчёта.
+        """
+        fields = (*self.FIELDS, 'rating')
+        opts = Title._meta
+        quote = connection.ops.quote_name
+        assignments = ', '.join(
+            f'{quote(opts.get_field(field).column)} = %s' for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'UPDATE {quote(opts.db_table)} SET {assignments} '
+                f'WHERE {quote(opts.pk.column)} = %s',
+                [
+                    [getattr(title, field) for field in fields] + [title.pk]
+                    for title in titles
+                ]
+            )
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        vectorized = options['vectorized']
+        if vectorized and np is None:
+            raise CommandError(
+                'Для --vectorized нужен NumPy: pip install numpy')
+        if verbosity:
+            print('Начинается пересчёт рейтингов.')
+        drifted = 0
+        with transaction.atomic():
+            if vectorized:
+                batches = self.find_drift_vectorized(
+                    self.count_scores(), verbosity
+                )
+            else:
+                batches = (
+                    self.find_drift(
+                        titles, self.count_batch_scores(titles), verbosity
+                    )
+                    for titles in self.get_title_batches()
+                )
+            for batch in batches:
+                drifted += len(batch)
+                if batch and not options['dry_run']:
+                    self.save_titles(batch)
+        if not options['dry_run']:
+            # Списки лучших зависят и от настроек веса, поэтому
+            # пересчитываются даже без расхождений.
+            leaderboard.rebuild()
+        if drifted and not options['dry_run']:
+            bulk_changed.send(sender=self.__class__, models=[Title])
+        if verbosity:
+            print(f'Пересчёт завершён. Произведений с расхождениями: '
+                  f'{drifted}.')
@@ -0,0 +1,43 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:50
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    titles = Title.objects.annotate(
+        score_sum=Sum('reviews__score'), score_count=Count('reviews')
+    ).filter(score_count__gt=0)
+    for title in titles.iterator():
+        Title.objects.filter(pk=title.pk).update(
+            rating_sum=title.score_sum,
+            rating_count=title.score_count,
+            rating=title.score_sum / title.score_count
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_auto_20220819_2310'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating',
+            field=models.FloatField(blank=True, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_title_rating'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(db_index=True, max_length=256, verbose_name='Название'),
+        ),
+        migrations.AlterField(
+            model_name='genre',
+            name='name',
+            field=models.CharField(db_index=True, max_length=256, verbose_name='Название'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='name',
+            field=models.CharField(db_index=True, max_length=250, verbose_name='Название'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['review', '-pub_date'], name='comment_review_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['title', '-pub_date'], name='review_title_pub_date_idx'),
+        ),
+    ]
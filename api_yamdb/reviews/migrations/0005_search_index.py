@@ -0,0 +1,59 @@
+from django.db import migrations
+
+TITLE_VECTOR = (
+    "(setweight(to_tsvector('simple', name), 'A') || "
+    "setweight(to_tsvector('simple', description), 'B'))"
+)
+REVIEW_VECTOR = "(to_tsvector('simple', text))"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE reviews_search USING fts5(name, text)'
+        )
+        Title = apps.get_model('reviews', 'Title')
+        Review = apps.get_model('reviews', 'Review')
+        for index, queryset in enumerate((
+            Title.objects.values_list('pk', 'name', 'description'),
+            Review.objects.values_list('pk', 'text'),
+        )):
+            for row in queryset.iterator():
+                document = row[1:] if index == 0 else ('', row[1])
+                schema_editor.execute(
+                    'INSERT INTO reviews_search (rowid, name, text) '
+                    'VALUES (%s, %s, %s)',
+                    (row[0] * 2 + index, *document)
+                )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX reviews_title_search_idx ON reviews_title '
+            f'USING GIN ({TITLE_VECTOR})'
+        )
+        schema_editor.execute(
+            f'CREATE INDEX reviews_review_search_idx ON reviews_review '
+            f'USING GIN ({REVIEW_VECTOR})'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS reviews_search')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS reviews_title_search_idx')
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS reviews_review_search_idx'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_access_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
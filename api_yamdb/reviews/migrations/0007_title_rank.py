@@ -0,0 +1,76 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:51
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_ranks(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    TitleRank = apps.get_model('reviews', 'TitleRank')
+    weight = settings.TOP_TITLES_PRIOR_WEIGHT
+    prior = settings.TOP_TITLES_PRIOR_MEAN * weight
+    ranks = []
+    for title in Title.objects.order_by().prefetch_related('genre'):
+        values = {
+            'title_id': title.pk,
+            'rating_sum': title.rating_sum,
+            'rating_count': title.rating_count,
+            'score': (
+                (prior + title.rating_sum) / (weight + title.rating_count)
+                if title.rating_count else None
+            ),
+        }
+        ranks.append(TitleRank(**values))
+        if title.category_id is not None:
+            ranks.append(TitleRank(category_id=title.category_id, **values))
+        ranks += [
+            TitleRank(genre_id=genre.pk, **values)
+            for genre in title.genre.all()
+        ]
+    TitleRank.objects.bulk_create(ranks, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_score_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRank',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating_sum', models.PositiveIntegerField(default=0, verbose_name='Сумма оценок')),
+                ('rating_count', models.PositiveIntegerField(default=0, verbose_name='Количество оценок')),
+                ('score', models.FloatField(null=True, verbose_name='Взвешенный рейтинг')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтинге',
+                'ordering': ('-score', 'title'),
+                'default_related_name': 'ranks',
+            },
+        ),
+        migrations.AddField(
+            model_name='titlerank',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='reviews.Category', verbose_name='Категория'),
+        ),
+        migrations.AddField(
+            model_name='titlerank',
+            name='genre',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='reviews.Genre', verbose_name='Жанр'),
+        ),
+        migrations.AddField(
+            model_name='titlerank',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='reviews.Title', verbose_name='Произведение'),
+        ),
+        migrations.AddIndex(
+            model_name='titlerank',
+            index=models.Index(fields=['category', 'genre', '-score', 'title'], name='title_rank_scope_score_idx'),
+        ),
+        migrations.RunPython(fill_ranks, migrations.RunPython.noop),
+    ]
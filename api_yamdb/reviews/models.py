@@ -1,8 +1,12 @@
+import math
+from collections import Counter
 from datetime import date
 
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, router, transaction
+from django.db.models import (Case, ExpressionWrapper, F, FloatField, Value,
+                              When)
 
 from users.models import User
 
@@ -16,7 +20,8 @@ def year_max():
 class CGAbstract(models.Model):
     name = models.CharField(
         'Название',
-        max_length=settings.MAX_CG_NAME_LENGTH
+        max_length=settings.MAX_CG_NAME_LENGTH,
+        db_index=True
     )
     slug = models.SlugField(
         'Slug',
@@ -44,10 +49,54 @@ class Category(CGAbstract):
         verbose_name_plural = 'Категории'
 
 
+RATING_EXPRESSION = Case(
+    When(rating_count=0, then=Value(None)),
+    default=ExpressionWrapper(
+        F('rating_sum') * 1.0 / F('rating_count'),
+        output_field=FloatField()
+    ),
+    output_field=FloatField()
+)
+
+
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    """Поле произведения с числом оценок score."""
+    return f'score_{score}'
+
+
+class TitleQuerySet(models.QuerySet):
+
+    def change_rating(self, added=None, removed=None):
+        """Учитывает новую оценку и исключает прежнюю.
+
+        Сдвигает сумму и число оценок и столбцы гистограммы, затем
+        пересчитывает средний рейтинг.
+        """
+        histogram = Counter()
+        if added is not None:
+            histogram[added] += 1
+        if removed is not None:
+            histogram[removed] -= 1
+        with transaction.atomic(using=self.db):
+            self.update(
+                rating_sum=F('rating_sum') + (added or 0) - (removed or 0),
+                rating_count=F('rating_count') + sum(histogram.values()),
+                **{
+                    score_field(score): F(score_field(score)) + delta
+                    for score, delta in histogram.items() if delta
+                }
+            )
+            self.update(rating=RATING_EXPRESSION)
+
+
 class Title(models.Model):
     name = models.CharField(
         'Название',
         max_length=settings.MAX_TITLE_NAME_LENGTH,
+        db_index=True
     )
     year = models.PositiveSmallIntegerField(
         'Год создания',
@@ -70,6 +119,24 @@ class Title(models.Model):
         verbose_name='Жанр',
         related_name='titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0,
+        editable=False
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок',
+        default=0,
+        editable=False
+    )
+    rating = models.FloatField(
+        'Рейтинг',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('name',)
@@ -82,6 +149,63 @@ class Title(models.Model):
             ),
         )
 
+    def save(self, *args, **kwargs):
+        """Сохраняет произведение, не трогая счётчики оценок.
+
+        Счётчики сдвигают сигналы отзывов выражениями F(), и значения из
+        памяти затёрли бы изменения, сделанные после загрузки объекта.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if field.editable and not field.primary_key
+            ]
+        super().save(*args, **kwargs)
+
+    def get_histogram(self):
+        return {score: getattr(self, score_field(score)) for score in SCORES}
+
+    def get_rating_stats(self):
+        """Число оценок, среднее, медиана и стандартное отклонение.
+
+        Считаются по гистограмме за фиксированное число шагов, без
+        обращения к отзывам.
+        """
+        histogram = self.get_histogram()
+        count = sum(histogram.values())
+        stats = {
+            'count': count, 'mean': None, 'median': None, 'stddev': None,
+            'histogram': histogram,
+        }
+        if not count:
+            return stats
+        mean = sum(score * n for score, n in histogram.items()) / count
+        variance = sum(
+            n * (score - mean) ** 2 for score, n in histogram.items()
+        ) / count
+        # Медиана — среднее оценок с номерами (count - 1) // 2 и count // 2.
+        middle, seen = [], 0
+        for score, n in histogram.items():
+            seen += n
+            middle += [
+                score for position in {(count - 1) // 2, count // 2}
+                if seen - n <= position < seen
+            ]
+        stats.update(
+            mean=mean, median=sum(middle) / len(middle),
+            stddev=math.sqrt(variance)
+        )
+        return stats
+
+
+for score in SCORES:
+    Title.add_to_class(
+        score_field(score),
+        models.PositiveIntegerField(
+            f'Оценок {score}', default=0, editable=False
+        )
+    )
+
 
 class CRAbstract(models.Model):
     """Абстрактная модель для комменатриев и ревью."""
@@ -105,6 +229,8 @@ class CRAbstract(models.Model):
 
 
 class Review(CRAbstract):
+    """Отзыв с оценкой, учтённой в рейтинге произведения."""
+    rating_snapshot = None
 
     title = models.ForeignKey(
         'Title',
@@ -121,10 +247,28 @@ class Review(CRAbstract):
         error_messages={'validators': 'Оценка от 1 до 10!'}
     )
 
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и сдвигает рейтинг в одной транзакции.
+
+        Прежние произведение и оценку сигнал pre_save читает из
+        заблокированной строки внутри этой же транзакции.
+        """
+        using = kwargs.get('using') or router.db_for_write(
+            type(self), instance=self
+        )
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
     class Meta(CRAbstract.Meta):
         verbose_name = 'Оценка'
         verbose_name_plural = 'Оценки'
         default_related_name = 'reviews'
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['title', 'author'],
@@ -144,3 +288,127 @@ class Comment(CRAbstract):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
         default_related_name = 'comments'
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+def weighted_rating(rating_sum, rating_count):
+    """Байесовское среднее: к оценкам произведения добавляется
+    TOP_TITLES_PRIOR_WEIGHT оценок TOP_TITLES_PRIOR_MEAN.
+
+    Принимает как числа, так и выражения F().
+    """
+    weight = settings.TOP_TITLES_PRIOR_WEIGHT
+    return (
+        (settings.TOP_TITLES_PRIOR_MEAN * weight + rating_sum)
+        / (weight + rating_count)
+    )
+
+
+class TitleRankQuerySet(models.QuerySet):
+
+    def change_rating(self, added=None, removed=None):
+        """Сдвигает оценки и взвешенный рейтинг так же, как у Title."""
+        count = int(added is not None) - int(removed is not None)
+        with transaction.atomic(using=self.db):
+            self.update(
+                rating_sum=F('rating_sum') + (added or 0) - (removed or 0),
+                rating_count=F('rating_count') + count
+            )
+            self.update(score=Case(
+                When(rating_count=0, then=Value(None)),
+                default=ExpressionWrapper(
+                    weighted_rating(F('rating_sum'), F('rating_count')),
+                    output_field=FloatField()
+                ),
+                output_field=FloatField()
+            ))
+
+
+class TitleRank(models.Model):
+    """Место произведения в общем списке лучших, в списке категории
+    или в списке жанра.
+
+    Хранит копию суммы и числа оценок, чтобы отзывы сдвигали
+    взвешенный рейтинг без чтения произведения, а первые места списка
+    читались по индексу. У произведений без оценок рейтинга нет.
+    """
+    title = models.ForeignKey(
+        'Title',
+        verbose_name='Произведение',
+        on_delete=models.CASCADE
+    )
+    category = models.ForeignKey(
+        'Category',
+        verbose_name='Категория',
+        on_delete=models.CASCADE,
+        null=True
+    )
+    genre = models.ForeignKey(
+        'Genre',
+        verbose_name='Жанр',
+        on_delete=models.CASCADE,
+        null=True
+    )
+    rating_sum = models.PositiveIntegerField(
+        'Сумма оценок',
+        default=0
+    )
+    rating_count = models.PositiveIntegerField(
+        'Количество оценок',
+        default=0
+    )
+    score = models.FloatField(
+        'Взвешенный рейтинг',
+        null=True
+    )
+
+    objects = TitleRankQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('-score', 'title')
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтинге'
+        default_related_name = 'ranks'
+        indexes = [
+            models.Index(
+                fields=['category', 'genre', '-score', 'title'],
+                name='title_rank_scope_score_idx'
+            ),
+        ]
+
+
+class SimilarTitle(models.Model):
+    """Ближайший сосед произведения по оценкам пользователей.
+
+    Таблица заполняется командой buildsimilar и только читается
+    запросами похожих произведений и рекомендаций.
+    """
+    title = models.ForeignKey(
+        'Title',
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        related_name='similar_titles'
+    )
+    similar = models.ForeignKey(
+        'Title',
+        verbose_name='Похожее произведение',
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Похожее произведение'
+        verbose_name_plural = 'Похожие произведения'
+        indexes = [
+            models.Index(
+                fields=['title', '-score', 'similar'],
+                name='similar_title_score_idx'
+            ),
+        ]
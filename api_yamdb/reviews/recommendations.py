@@ -0,0 +1,49 @@
+"""Похожие произведения и рекомендации из таблицы SimilarTitle.
+
+Сходство считается заранее командой buildsimilar, а здесь только
+читаются соседи по индексу: на пути запроса ничего не вычисляется,
+кроме взвешенного среднего в одном запросе к БД.
+"""
+from django.conf import settings
+from django.db.models import ExpressionWrapper, F, FloatField, Sum
+
+from .models import SimilarTitle
+
+
+def similar(title_id, limit=None):
+    """Пары (id похожего произведения, сходство) по убыванию сходства."""
+    return list(
+        SimilarTitle.objects.filter(title_id=title_id).order_by(
+            '-score', 'similar_id'
+        ).values_list(
+            'similar_id', 'score'
+        )[:limit or settings.RECOMMENDATIONS_LIMIT]
+    )
+
+
+def recommend(user_id, limit=None):
+    """Пары (id произведения, ожидаемая оценка) для пользователя.
+
+    Кандидаты — соседи оценённых пользователем произведений, которые
+    он ещё не оценил. Ожидаемая оценка — среднее его оценок соседей,
+    взвешенное по сходству.
+    """
+    weighted_scores = Sum(ExpressionWrapper(
+        F('score') * F('title__reviews__score'), output_field=FloatField()
+    ))
+    return list(
+        SimilarTitle.objects.filter(
+            title__reviews__author_id=user_id
+        ).exclude(
+            similar__reviews__author_id=user_id
+        ).values('similar_id').annotate(
+            weight=Sum('score'),
+            predicted_rating=ExpressionWrapper(
+                weighted_scores / Sum('score'), output_field=FloatField()
+            )
+        ).order_by(
+            '-predicted_rating', '-weight', 'similar_id'
+        ).values_list(
+            'similar_id', 'predicted_rating'
+        )[:limit or settings.RECOMMENDATIONS_LIMIT]
+    )
@@ -0,0 +1,201 @@
+"""Полнотекстовый поиск по произведениям и отзывам.
+
+В SQLite документы хранятся в таблице FTS5 и обновляются сигналами
+моделей и командой loadcsv. В PostgreSQL поиск идёт по tsvector прямо
+из таблиц моделей, по GIN-индексам из миграции, и синхронизации не
+требует.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import Review, Title
+
+SEARCH_TABLE = 'reviews_search'
+TS_CONFIG = 'simple'
+TOKEN = re.compile(r'\w+')
+
+# rowid документа в FTS5: первичный ключ объекта и номер его модели.
+MODELS = (Title, Review)
+
+# Название произведения весит больше описания и текста отзыва.
+FTS_SEARCH = f'''
+    SELECT rowid, -bm25({SEARCH_TABLE}, 10.0, 1.0) AS rank
+    FROM {SEARCH_TABLE}
+    WHERE {SEARCH_TABLE} MATCH %s
+    ORDER BY rank DESC, rowid
+    LIMIT %s OFFSET %s
+'''
+FTS_COUNT = f'''
+    SELECT count(*) FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s
+'''
+
+TITLE_VECTOR = (
+    f"setweight(to_tsvector('{TS_CONFIG}', name), 'A') || "
+    f"setweight(to_tsvector('{TS_CONFIG}', description), 'B')"
+)
+REVIEW_VECTOR = f"to_tsvector('{TS_CONFIG}', text)"
+TS_MATCHES = f'''
+    SELECT 0 AS kind, id, ts_rank({TITLE_VECTOR}, query) AS rank
+    FROM reviews_title, to_tsquery('{TS_CONFIG}', %s) query
+    WHERE {TITLE_VECTOR} @@ query
+    UNION ALL
+    SELECT 1 AS kind, id, ts_rank({REVIEW_VECTOR}, query) AS rank
+    FROM reviews_review, to_tsquery('{TS_CONFIG}', %s) query
+    WHERE {REVIEW_VECTOR} @@ query
+'''
+TS_SEARCH = f'''
+    SELECT kind, id, rank FROM ({TS_MATCHES}) matches
+    ORDER BY rank DESC, kind, id
+    LIMIT %s OFFSET %s
+'''
+TS_COUNT = f'SELECT count(*) FROM ({TS_MATCHES}) matches'
+
+
+def uses_fts(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == 'sqlite'
+
+
+def get_rowid(instance):
+    return int(instance.pk) * len(MODELS) + MODELS.index(type(instance))
+
+
+def get_document(instance):
+    if isinstance(instance, Title):
+        return instance.name, instance.description
+    return '', instance.text
+
+
+def index_objects(objects, using=DEFAULT_DB_ALIAS):
+    """Добавляет или обновляет документы произведений и отзывов."""
+    documents = [
+        (get_rowid(obj), *get_document(obj))
+        for obj in objects if type(obj) in MODELS and obj.pk is not None
+    ]
+    if not documents or not uses_fts(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {SEARCH_TABLE} (rowid, name, text) '
+            f'VALUES (%s, %s, %s)',
+            documents
+        )
+
+
+def unindex_objects(objects, using=DEFAULT_DB_ALIAS):
+    rowids = [(get_rowid(obj),) for obj in objects if type(obj) in MODELS]
+    if not rowids or not uses_fts(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', rowids
+        )
+
+
+def rebuild_index(using=DEFAULT_DB_ALIAS, batch_size=1000):
+    """Заново заполняет таблицу FTS5 из произведений и отзывов."""
+    if not uses_fts(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    for model in MODELS:
+        queryset = model.objects.using(using).order_by('pk')
+        batch = []
+        for obj in queryset.iterator(chunk_size=batch_size):
+            batch.append(obj)
+            if len(batch) == batch_size:
+                index_objects(batch, using)
+                batch = []
+        index_objects(batch, using)
+
+
+def build_query(text, vendor):
+    """Превращает строку пользователя в запрос FTS5 или tsquery.
+
+    Берутся только слова, поэтому синтаксис движков в запрос не попадает;
+    каждое слово ищется по началу.
+    """
+    words = TOKEN.findall(text.lower())
+    if not words:
+        return None
+    if vendor == 'sqlite':
+        return ' '.join(f'"{word}"*' for word in words)
+    return ' & '.join(f'{word}:*' for word in words)
+
+
+class SearchResults:
+    """Ленивая выдача поиска с подсчётом и срезами для пагинатора."""
+
+    def __init__(self, text, using=DEFAULT_DB_ALIAS):
+        self.using = using
+        self.fts = uses_fts(using)
+        self.query = build_query(text, connections[using].vendor)
+        self._count = None
+
+    def execute(self, sql, params):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def count(self):
+        if self._count is None:
+            if self.query is None:
+                self._count = 0
+            elif self.fts:
+                self._count = self.execute(FTS_COUNT, [self.query])[0][0]
+            else:
+                self._count = self.execute(
+                    TS_COUNT, [self.query, self.query]
+                )[0][0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or index.step is not None:
+            raise TypeError('Выдача поиска поддерживает только срезы.')
+        start, stop = index.start or 0, index.stop
+        limit = -1 if stop is None else max(stop - start, 0)
+        if self.query is None or limit == 0:
+            return []
+        if self.fts:
+            rows = [
+                (rowid % len(MODELS), rowid // len(MODELS), rank)
+                for rowid, rank in self.execute(
+                    FTS_SEARCH, [self.query, limit, start]
+                )
+            ]
+        else:
+            rows = self.execute(
+                TS_SEARCH,
+                [self.query, self.query, None if limit < 0 else limit, start]
+            )
+        return self.load_hits(rows)
+
+    def load_hits(self, rows):
+        """Подгружает найденные объекты, сохраняя порядок выдачи."""
+        pks = {kind: [] for kind in range(len(MODELS))}
+        for kind, pk, rank in rows:
+            pks[kind].append(pk)
+        titles = Title.objects.using(self.using).in_bulk(pks[0])
+        reviews = Review.objects.using(self.using).select_related(
+            'title'
+        ).in_bulk(pks[1])
+        hits = []
+        for kind, pk, rank in rows:
+            if kind == 0 and pk in titles:
+                title = titles[pk]
+                hits.append({
+                    'type': 'title', 'id': pk, 'title_id': pk,
+                    'name': title.name, 'text': title.description,
+                    'rank': rank,
+                })
+            elif kind == 1 and pk in reviews:
+                review = reviews[pk]
+                hits.append({
+                    'type': 'review', 'id': pk, 'title_id': review.title_id,
+                    'name': review.title.name, 'text': review.text,
+                    'rank': rank,
+                })
+        return hits
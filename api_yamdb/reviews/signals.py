@@ -0,0 +1,171 @@
+from django.db import connections, transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import Signal, receiver
+
+from . import autocomplete, leaderboard, search
+from .models import Category, Genre, Review, Title, TitleRank
+
+# Отправляется после массовых изменений, минующих сигналы моделей.
+bulk_changed = Signal(providing_args=['models'])
+
+
+def stored_rating(review, using):
+    """Произведение и оценка отзыва, записанные в БД.
+
+    Строка блокируется до конца транзакции сохранения: параллельное
+    изменение того же отзыва дождётся её и сдвинет рейтинг от новой оценки.
+    """
+    return Review.objects.using(using).select_for_update().filter(
+        pk=review.pk
+    ).values_list('title_id', 'score').first()
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_score(sender, instance, using, **kwargs):
+    """Запоминает прежние произведение и оценку отзыва из БД."""
+    instance.rating_snapshot = (
+        None if instance._state.adding else stored_rating(instance, using)
+    )
+
+
+@receiver(pre_delete, sender=Review)
+def remember_deleted_score(sender, instance, using, **kwargs):
+    """Запоминает оценку удаляемого отзыва из БД, а не из выборки."""
+    instance.rating_snapshot = stored_rating(instance, using)
+
+
+def change_rating(title_id, added=None, removed=None):
+    """Сдвигает рейтинг произведения и его места в списках лучших."""
+    Title.objects.filter(pk=title_id).change_rating(
+        added=added, removed=removed
+    )
+    TitleRank.objects.filter(title_id=title_id).change_rating(
+        added=added, removed=removed
+    )
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, **kwargs):
+    """Переносит изменение оценки в накопленный рейтинг произведения."""
+    old_title_id, old_score = instance.rating_snapshot or (None, None)
+    if old_title_id == instance.title_id:
+        if old_score != instance.score:
+            change_rating(
+                instance.title_id, added=instance.score, removed=old_score
+            )
+    else:
+        if old_title_id is not None:
+            change_rating(old_title_id, removed=old_score)
+        change_rating(instance.title_id, added=instance.score)
+    instance.rating_snapshot = None
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    """Исключает оценку удалённого отзыва из рейтинга произведения."""
+    if instance.rating_snapshot is not None:
+        title_id, score = instance.rating_snapshot
+        change_rating(title_id, removed=score)
+    instance.rating_snapshot = None
+
+
+@receiver(post_save, sender=Title)
+def place_in_leaderboard(sender, instance, using, **kwargs):
+    """Переносит произведение между списками категорий.
+
+    Счётчики оценок читаются из БД: у экземпляра в памяти они могут
+    отставать от изменений, внесённых сигналами отзывов.
+    """
+    leaderboard.place_title_ids([instance.pk], using)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def place_in_genre_leaderboard(sender, instance, action, reverse, pk_set,
+                               using, **kwargs):
+    """Переносит произведения между списками жанров."""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        leaderboard.place_title_ids([instance.pk], using)
+    elif pk_set:
+        leaderboard.place_title_ids(pk_set, using)
+    else:
+        leaderboard.place_title_ids(
+            list(instance.ranks.values_list('title_id', flat=True)), using
+        )
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Review)
+def index_for_search(sender, instance, using, **kwargs):
+    search.index_objects([instance], using)
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Review)
+def unindex_for_search(sender, instance, using, **kwargs):
+    search.unindex_objects([instance], using)
+
+
+@receiver(pre_save, sender=Title)
+@receiver(pre_save, sender=Genre)
+@receiver(pre_save, sender=Category)
+def remember_autocomplete_entry(sender, instance, **kwargs):
+    """Запоминает прежнее название, чтобы найти его в индексе."""
+    catalogue = autocomplete.MODEL_CATALOGUES[sender]
+    instance._autocomplete_entry = (
+        catalogue.get_stored_entry(instance.pk)
+        if catalogue.built and not instance._state.adding else None
+    )
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def update_autocomplete(sender, instance, using, **kwargs):
+    catalogue = autocomplete.MODEL_CATALOGUES[sender]
+    old, new = instance._autocomplete_entry, catalogue.get_entry(instance)
+    if old != new:
+        transaction.on_commit(
+            lambda: catalogue.replace(old, new), using=using
+        )
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def remove_from_autocomplete(sender, instance, using, **kwargs):
+    catalogue = autocomplete.MODEL_CATALOGUES[sender]
+    old = catalogue.get_entry(instance)
+    transaction.on_commit(lambda: catalogue.replace(old, None), using=using)
+
+
+@receiver(bulk_changed)
+def refresh_autocomplete(sender, models, **kwargs):
+    """Перестраивает индексы после загрузки, минуя построчные сигналы."""
+    for model in models:
+        if model in autocomplete.MODEL_CATALOGUES:
+            autocomplete.MODEL_CATALOGUES[model].refresh()
+
+
+def create_nocase_indexes(sender, using, **kwargs):
+    """Создаёт в SQLite индексы названий для поиска по началу строки.
+
+    startswith в SQLite — это LIKE без учёта регистра, которому подходит
+    только индекс с COLLATE NOCASE. Django такие индексы не описывает и
+    теряет при пересоздании таблицы, поэтому они проверяются после
+    каждого migrate.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    tables = connection.introspection.table_names()
+    with connection.cursor() as cursor:
+        for model in (Title, Genre, Category):
+            table = model._meta.db_table
+            if table in tables:
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS "{table}_name_nocase" '
+                    f'ON "{table}" ("name" COLLATE NOCASE)'
+                )
@@ -0,0 +1,117 @@
+"""Сходство произведений по матрице оценок пользователей.
+
+Сходство — скорректированный косинус (adjusted cosine): из оценок
+вычитается средняя оценка их автора, и сравниваются столбцы
+произведений разреженной матрицы пользователь × произведение. Матрица
+хранится в NumPy тройками (пользователь, произведение, оценка), а её
+произведение на себя считается пачками произведений: каждая оценка
+пачки соединяется со всеми оценками того же пользователя, и
+произведения пар суммируются через bincount.
+"""
+import numpy as np
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from .models import Review
+
+
+def load_ratings(using=DEFAULT_DB_ALIAS, chunk_size=500000):
+    """Оценки в виде трёх массивов: автор, произведение, оценка."""
+    sql, params = Review.objects.using(using).order_by().values_list(
+        'author_id', 'title_id', 'score'
+    ).query.sql_with_params()
+    chunks = []
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunks.append(np.array(rows, dtype=np.int64))
+    ratings = (
+        np.concatenate(chunks) if chunks
+        else np.empty((0, 3), dtype=np.int64)
+    )
+    return ratings[:, 0], ratings[:, 1], ratings[:, 2]
+
+
+def group(keys, size):
+    """Порядок элементов по ключу и границы групп, как в CSR."""
+    order = np.argsort(keys, kind='stable')
+    bounds = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=bounds[1:])
+    return order, bounds
+
+
+def expand(starts, lengths):
+    """Позиции всех элементов диапазонов [start, start + length)."""
+    total = int(lengths.sum())
+    owners = np.repeat(np.arange(len(starts)), lengths)
+    offsets = np.arange(total) - np.repeat(
+        np.cumsum(lengths) - lengths, lengths
+    )
+    return owners, starts[owners] + offsets
+
+
+def neighbours(users, titles, scores, limit=20, min_common=2,
+               max_pairs=5000000):
+    """Для каждого произведения до limit самых похожих на него.
+
+    Пары с меньше чем min_common общими оценщиками и с неположительным
+    сходством отбрасываются. max_pairs ограничивает число пар оценок,
+    которые держатся в памяти одновременно. Отдаёт кортежи
+    (произведение, похожее произведение, сходство).
+    """
+    users = np.unique(users, return_inverse=True)[1]
+    title_ids, titles = np.unique(titles, return_inverse=True)
+    user_count, title_count = users.max(initial=-1) + 1, len(title_ids)
+    means = (
+        np.bincount(users, weights=scores, minlength=user_count)
+        / np.maximum(np.bincount(users, minlength=user_count), 1)
+    )
+    values = scores - means[users]
+    norms = np.sqrt(
+        np.bincount(titles, weights=values ** 2, minlength=title_count)
+    )
+    by_user, user_bounds = group(users, user_count)
+    by_title, title_bounds = group(titles, title_count)
+    user_sizes = np.diff(user_bounds)
+    # Сколько пар даст каждое произведение — по нему режутся пачки.
+    pairs = np.cumsum(np.bincount(
+        titles, weights=user_sizes[users], minlength=title_count
+    ))
+    start = 0
+    while start < title_count:
+        stop = max(
+            int(np.searchsorted(
+                pairs, (pairs[start - 1] if start else 0) + max_pairs,
+                side='right'
+            )),
+            start + 1
+        )
+        block = by_title[title_bounds[start]:title_bounds[stop]]
+        block_users = users[block]
+        owners, positions = expand(
+            user_bounds[block_users], user_sizes[block_users]
+        )
+        left, right = block[owners], by_user[positions]
+        keys = (titles[left] - start) * title_count + titles[right]
+        keys, inverse = np.unique(keys, return_inverse=True)
+        dots = np.bincount(inverse, weights=values[left] * values[right])
+        common = np.bincount(inverse)
+        first, second = keys // title_count + start, keys % title_count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            similarity = dots / (norms[first] * norms[second])
+        keep = (first != second) & (common >= min_common) & (similarity > 0)
+        first, second = first[keep], second[keep]
+        similarity = similarity[keep]
+        order = np.lexsort((second, -similarity, first))
+        first, second = first[order], second[order]
+        similarity = similarity[order]
+        group_starts = np.searchsorted(first, first)
+        keep = np.arange(len(first)) - group_starts < limit
+        yield from zip(
+            title_ids[first[keep]].tolist(),
+            title_ids[second[keep]].tolist(),
+            similarity[keep].tolist()
+        )
+        start = stop
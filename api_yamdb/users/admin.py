@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import User
+from .models import OutgoingEmail, User
 
 
 class UserAdmin(admin.ModelAdmin):
@@ -20,3 +20,13 @@ class UserAdmin(admin.ModelAdmin):
 
 
 admin.site.register(User, UserAdmin)
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'recipient', 'subject', 'status', 'attempts',
+        'next_attempt_at', 'sent_at'
+    )
+    search_fields = ('recipient',)
+    list_filter = ('status',)
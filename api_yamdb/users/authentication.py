@@ -0,0 +1,119 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import user_cache
+from .models import User
+
+REVOKED_KEY = 'token-claims-revoked:{}'
+TRACKED_SINCE_KEY = 'token-claims-revoked-since'
+
+
+def get_revocations_since():
+    """Секунда, с которой TOKEN_CLAIMS_CACHE помнит все отзывы клеймов.
+
+    Если кэш очистили или он потерял записи, отметки об отзыве пропали
+    вместе с ним: клеймам токенов, выданных раньше, доверять нельзя.
+    """
+    return caches[settings.TOKEN_CLAIMS_CACHE].get_or_set(
+        TRACKED_SINCE_KEY, int(time.time()), None
+    )
+
+
+def get_access_token(user):
+    """Выдаёт access-токен с ролью и правами пользователя в клеймах."""
+    get_revocations_since()
+    token = AccessToken.for_user(user)
+    token['username'] = user.username
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['iat'] = int(time.time())
+    return token
+
+
+def revoke_token_claims(user_id):
+    """Отзывает клеймы всех выданных пользователю токенов.
+
+    Такие токены продолжают действовать, но пользователь для них снова
+    загружается из БД, то есть с актуальными ролью и правами. Отметка
+    нужна, пока клеймы не устареют сами, — TOKEN_CLAIMS_MAX_AGE секунд.
+    """
+    caches[settings.TOKEN_CLAIMS_CACHE].set(
+        REVOKED_KEY.format(user_id), time.time(),
+        settings.TOKEN_CLAIMS_MAX_AGE
+    )
+
+
+def claims_are_valid(token):
+    if 'role' not in token or 'iat' not in token:
+        return False
+    if time.time() - token['iat'] > settings.TOKEN_CLAIMS_MAX_AGE:
+        return False
+    if token['iat'] < get_revocations_since():
+        return False
+    revoked = caches[settings.TOKEN_CLAIMS_CACHE].get(
+        REVOKED_KEY.format(token[api_settings.USER_ID_CLAIM])
+    )
+    return revoked is None or token['iat'] > revoked
+
+
+class ClaimsUser(TokenUser):
+    """Пользователь, построенный по клеймам токена.
+
+    Роль и права берутся из токена, а строка User загружается из БД
+    только при обращении к остальным её полям.
+    """
+    ADMIN = User.ADMIN
+    MODERATOR = User.MODERATOR
+    is_admin = User.is_admin
+    is_moderator = User.is_moderator
+
+    def __str__(self):
+        return self.username
+
+    @cached_property
+    def role(self):
+        return self.token['role']
+
+    @cached_property
+    def user(self):
+        user = user_cache.get(self.id)
+        if user is None:
+            raise AuthenticationFailed('Пользователь не найден')
+        return user
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без запроса к таблице пользователей.
+
+    Для токенов без клеймов, с отозванными или устаревшими клеймами
+    пользователь берётся из кэша пользователей процесса.
+    """
+
+    def get_user(self, validated_token):
+        if claims_are_valid(validated_token):
+            return ClaimsUser(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит идентификатор пользователя')
+        user = user_cache.get(user_id)
+        if user is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден', code='user_not_found'
+            )
+        return user
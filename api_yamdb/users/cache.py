@@ -0,0 +1,76 @@
+import copy
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+
+class UserCache:
+    """LRU-кэш пользователей процесса с ограниченным временем жизни.
+
+    Записи удаляются сигналами при сохранении и удалении пользователя;
+    изменения из других процессов и через QuerySet.update() становятся
+    видны не позже чем через timeout секунд.
+    """
+
+    def __init__(self, maxsize, timeout):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.users = OrderedDict()
+        self.stats = Counter()
+        self.generation = 0
+        self.lock = threading.Lock()
+
+    def get(self, pk):
+        """Возвращает копию активного пользователя или None."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.users.get(pk)
+            if entry is not None and entry[0] > now:
+                self.users.move_to_end(pk)
+                self.stats['hit'] += 1
+                return copy.copy(entry[1])
+            self.stats['miss'] += 1
+            generation = self.generation
+        user = User.objects.filter(pk=pk, is_active=True).first()
+        logger.debug('Кэш пользователей: промах для %s', pk)
+        if user is None:
+            return None
+        with self.lock:
+            if generation != self.generation:
+                # Пока пользователь читался из БД, кэш сбрасывали:
+                # прочитанная запись могла устареть.
+                return copy.copy(user)
+            self.users[pk] = (now + self.timeout, user)
+            self.users.move_to_end(pk)
+            while len(self.users) > self.maxsize:
+                self.users.popitem(last=False)
+                self.stats['eviction'] += 1
+        return copy.copy(user)
+
+    def evict(self, pk):
+        with self.lock:
+            self.generation += 1
+            self.users.pop(pk, None)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.users.clear()
+            self.stats.clear()
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats, size=len(self.users))
+        requests = stats.get('hit', 0) + stats.get('miss', 0)
+        stats['hit_rate'] = stats.get('hit', 0) / requests if requests else 0
+        return stats
+
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TIMEOUT)
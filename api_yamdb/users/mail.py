@@ -0,0 +1,166 @@
+import logging
+import queue
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def claim_emails(ids=None, limit=None):
+    """Захватывает готовые к отправке письма, чтобы их не взял другой поток.
+
+    Захват продлевает next_attempt_at на EMAIL_OUTBOX_LOCK_TIMEOUT: письма
+    упавшего на отправке процесса снова станут доступны после этого срока.
+    """
+    now = timezone.now()
+    due = OutgoingEmail.objects.filter(
+        status__in=(OutgoingEmail.PENDING, OutgoingEmail.SENDING),
+        next_attempt_at__lte=now
+    )
+    if ids is not None:
+        due = due.filter(pk__in=ids)
+    pks = list(due.order_by('next_attempt_at').values_list(
+        'pk', flat=True
+    )[:limit or settings.EMAIL_OUTBOX_BATCH_SIZE])
+    token = uuid.uuid4().hex
+    due.filter(pk__in=pks).update(
+        status=OutgoingEmail.SENDING,
+        claim=token,
+        next_attempt_at=now + timedelta(
+            seconds=settings.EMAIL_OUTBOX_LOCK_TIMEOUT)
+    )
+    return list(OutgoingEmail.objects.filter(claim=token))
+
+
+def schedule_retry(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.FAILED
+        logger.error('Письмо %s не отправлено: %s', email.pk, error)
+    else:
+        email.status = OutgoingEmail.PENDING
+        email.next_attempt_at = timezone.now() + timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_DELAY
+            * 2 ** (email.attempts - 1)
+        )
+    email.save(update_fields=(
+        'attempts', 'last_error', 'status', 'next_attempt_at'
+    ))
+
+
+def send_outbox(ids=None, limit=None):
+    """Отправляет пачку писем через одно соединение.
+
+    Без ids берёт любые письма, чей срок отправки наступил.
+    Возвращает число захваченных писем.
+    """
+    emails = claim_emails(ids, limit)
+    if not emails:
+        return 0
+    pending = list(emails)
+    try:
+        with get_connection() as connection:
+            while pending:
+                email = pending[0]
+                try:
+                    connection.send_messages([EmailMessage(
+                        email.subject, email.body, email.from_email,
+                        [email.recipient]
+                    )])
+                except Exception as error:
+                    schedule_retry(email, error)
+                else:
+                    email.status = OutgoingEmail.SENT
+                    email.sent_at = timezone.now()
+                    email.save(update_fields=('status', 'sent_at'))
+                pending.pop(0)
+    except Exception as error:
+        for email in pending:
+            schedule_retry(email, error)
+    return len(emails)
+
+
+class OutboxSender:
+    """Пул фоновых потоков, отправляющих письма из outbox.
+
+    Потоки получают id новых писем из очереди, собирают их в пачки,
+    а в паузах между письмами забирают из БД письма на повторную отправку.
+    """
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def put(self, ids):
+        self.start()
+        self.queue.put(list(ids))
+
+    def start(self):
+        with self.lock:
+            self.threads = [
+                thread for thread in self.threads if thread.is_alive()
+            ]
+            for _ in range(
+                    settings.EMAIL_OUTBOX_WORKERS - len(self.threads)):
+                thread = threading.Thread(
+                    target=self.run, name='outbox-sender', daemon=True
+                )
+                thread.start()
+                self.threads.append(thread)
+
+    def next_batch(self, timeout):
+        """Ждёт id писем и добирает их из очереди до размера пачки."""
+        try:
+            ids = self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        while len(ids) < settings.EMAIL_OUTBOX_BATCH_SIZE:
+            try:
+                ids += self.queue.get_nowait()
+            except queue.Empty:
+                break
+        return ids
+
+    def process_once(self, timeout=0):
+        try:
+            send_outbox(self.next_batch(timeout))
+        except Exception:
+            logger.exception('Ошибка отправки писем из outbox')
+        finally:
+            close_old_connections()
+
+    def run(self):
+        while True:
+            self.process_once(settings.EMAIL_OUTBOX_POLL_INTERVAL)
+
+
+sender = OutboxSender()
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """Сохраняет письма в outbox и отправляет их после коммита транзакции.
+
+    При EMAIL_OUTBOX_ASYNC письма отправляют фоновые потоки, иначе они
+    отправляются сразу после коммита в текущем потоке.
+    """
+    ids = [
+        OutgoingEmail.objects.create(
+            subject=subject, body=message, from_email=from_email,
+            recipient=recipient
+        ).pk for recipient in recipient_list
+    ]
+    if settings.EMAIL_OUTBOX_ASYNC:
+        transaction.on_commit(lambda: sender.put(ids))
+    else:
+        transaction.on_commit(lambda: send_outbox(ids))
+    return ids
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from users.mail import send_outbox
+
+
+class Command(BaseCommand):
+    help = ('Отправляет письма из outbox, срок отправки которых наступил: '
+            'оставшиеся после перезапуска и ожидающие повторной попытки.')
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            claimed = send_outbox()
+            if not claimed:
+                break
+            total += claimed
+        print(f'Обработано писем: {total}.')
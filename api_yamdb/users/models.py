@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 from users.validators import CorrectUsernameAndNotMe
 
@@ -21,6 +22,10 @@ class User(AbstractUser, CorrectUsernameAndNotMe):
 
     DEFAULT_USER_ROLE = USER
 
+    TOKEN_CLAIMS = (
+        'username', 'role', 'is_staff', 'is_superuser', 'is_active'
+    )
+
     bio = models.TextField(
         BIO,
         blank=True,
@@ -39,9 +44,22 @@ class User(AbstractUser, CorrectUsernameAndNotMe):
         unique=True
     )
 
+    claims_snapshot = None
+
     class Meta:
         ordering = ('date_joined',)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if set(cls.TOKEN_CLAIMS) <= instance.__dict__.keys():
+            instance.claims_snapshot = instance.get_token_claims()
+        return instance
+
+    def get_token_claims(self):
+        """Поля, которые попадают в клеймы access-токена."""
+        return tuple(getattr(self, field) for field in self.TOKEN_CLAIMS)
+
     @property
     def is_admin(self):
         return self.role == self.ADMIN or self.is_staff or self.is_superuser
@@ -52,3 +70,52 @@ class User(AbstractUser, CorrectUsernameAndNotMe):
 
     def __str__(self):
         return self.username
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (outbox)."""
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+
+    subject = models.CharField('Тема', max_length=255)
+    body = models.TextField('Текст')
+    from_email = models.EmailField('Отправитель')
+    recipient = models.EmailField('Получатель')
+    status = models.CharField(
+        'Статус',
+        max_length=max(len(status) for status, show in STATUS_CHOICES),
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt_at = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now
+    )
+    claim = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+    sent_at = models.DateTimeField('Отправлено', null=True, blank=True)
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = (
+            models.Index(
+                fields=('status', 'next_attempt_at'),
+                name='outbox_due_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
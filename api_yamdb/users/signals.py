@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import revoke_token_claims
+from .cache import user_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.evict(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def revoke_changed_claims(sender, instance, created, **kwargs):
+    """Отзывает клеймы токенов, если изменились роль или права."""
+    claims = instance.get_token_claims()
+    if not created and instance.claims_snapshot not in (None, claims):
+        revoke_token_claims(instance.pk)
+    instance.claims_snapshot = claims
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_claims(sender, instance, **kwargs):
+    revoke_token_claims(instance.pk)
@@ -0,0 +1,247 @@
+"""Воспроизводимый замер задержек и пропускной способности API.
+
+Заполняет временную базу SQLite командой gendata, строит таблицу похожих
+произведений (если установлен numpy) и прогоняет через тестовый клиент
+Django GET-запросы ко всем вьюсетам и функциям API со случайными, но
+одинаковыми при том же --seed объектами. Для каждого маршрута выводит в
+JSON p50/p95/p99 задержки, запросы в секунду и запросы к БД на запрос.
+Результаты разных коммитов сравниваются через --compare:
+
+    python benchmarks/api_throughput.py --output before.json
+    git checkout feature
+    python benchmarks/api_throughput.py --compare before.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+# Имя маршрута и шаблон адреса: подставляются случайные объекты.
+ROUTES = (
+    ('categories-list', '/api/v1/categories/'),
+    ('genres-list', '/api/v1/genres/'),
+    ('titles-list', '/api/v1/titles/'),
+    ('titles-list-filtered', '/api/v1/titles/?genre={genre}&year={year}'),
+    ('titles-detail', '/api/v1/titles/{title}/'),
+    ('titles-stats', '/api/v1/titles/{title}/stats/'),
+    ('titles-top', '/api/v1/titles/top/?genre={genre}'),
+    ('titles-similar', '/api/v1/titles/{title}/similar/'),
+    ('reviews-list', '/api/v1/titles/{title}/reviews/'),
+    ('reviews-detail', '/api/v1/titles/{title}/reviews/{review}/'),
+    ('comments-list',
+     '/api/v1/titles/{title}/reviews/{review}/comments/'),
+    ('users-list', '/api/v1/users/'),
+    ('users-me', '/api/v1/users/me/'),
+    ('users-recommendations', '/api/v1/users/me/recommendations/'),
+    ('search', '/api/v1/search/?q={word}'),
+    ('autocomplete', '/api/v1/autocomplete/?q={prefix}'),
+)
+# Отличия от прошлого замера: относительные для времени, разность для БД.
+COMPARED = ('p50_ms', 'p95_ms', 'p99_ms', 'rps')
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу; values отсортированы."""
+    return values[max(math.ceil(len(values) * percent / 100) - 1, 0)]
+
+
+def git_revision():
+    def git(*args):
+        return subprocess.run(
+            ('git', *args), cwd=BASE_DIR, capture_output=True, text=True
+        ).stdout.strip()
+    return {
+        'commit': git('rev-parse', 'HEAD') or None,
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+    }
+
+
+def make_samples(rng, requests):
+    """Объекты для подстановки в адреса: отзыв вместе с его произведением."""
+    from reviews.management.commands.gendata import WORDS
+    from reviews.models import Genre, Review, Title
+
+    review_ids = list(
+        Review.objects.order_by('pk').values_list('pk', 'title_id')
+    )
+    genres = list(Genre.objects.order_by('pk').values_list('slug', flat=True))
+    years = list(
+        Title.objects.order_by('year').values_list('year', flat=True)
+        .distinct()
+    )
+    for _ in range(requests):
+        review, title = rng.choice(review_ids)
+        word = rng.choice(WORDS)
+        yield {
+            'title': title,
+            'review': review,
+            'genre': rng.choice(genres),
+            'year': rng.choice(years),
+            'word': word,
+            'prefix': word[:rng.randint(1, 4)],
+        }
+
+
+def measure(client, template, samples, warmup):
+    from api.metrics import request_measured
+
+    queries = []
+
+    def collect(sender, metrics, **kwargs):
+        queries.append(metrics['queries'])
+
+    for sample in samples[:warmup]:
+        client.get(template.format(**sample))
+    latencies = []
+    request_measured.connect(collect)
+    try:
+        for sample in samples[warmup:]:
+            url = template.format(**sample)
+            started = time.perf_counter()
+            response = client.get(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, (
+                f'{url}: {response.status_code}'
+            )
+    finally:
+        request_measured.disconnect(collect)
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_ms': round(statistics.mean(latencies), 2),
+        'rps': round(len(latencies) / sum(latencies) * 1000, 1),
+        'queries_per_request': round(statistics.mean(queries), 2),
+    }
+
+
+def compare(routes, previous):
+    diff = {}
+    for name, stats in routes.items():
+        before = previous['routes'].get(name)
+        if not before:
+            continue
+        diff[name] = {
+            f'{field}_change': (
+                round(stats[field] / before[field] - 1, 3)
+                if before[field] else None
+            )
+            for field in COMPARED
+        }
+        diff[name]['queries_per_request_change'] = round(
+            stats['queries_per_request'] - before['queries_per_request'], 2
+        )
+    return {'commit': previous['meta']['commit'], 'routes': diff}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--reviews_per_title', type=int, default=10)
+    parser.add_argument('--comments_per_review', type=int, default=2)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument(
+        '--requests', type=int, default=200,
+        help='Сколько запросов замерить на каждом маршруте.'
+    )
+    parser.add_argument(
+        '--warmup', type=int, default=10,
+        help='Сколько первых запросов маршрута не учитывать.'
+    )
+    parser.add_argument(
+        '--routes', nargs='*',
+        help='Замерить только эти маршруты.'
+    )
+    parser.add_argument('--output', help='Файл для результата в JSON.')
+    parser.add_argument(
+        '--compare', help='JSON прошлого замера для сравнения.'
+    )
+    args = parser.parse_args()
+    previous = None
+    if args.compare:
+        with open(args.compare) as previous_file:
+            previous = json.load(previous_file)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        from django.conf import settings
+        settings.DATABASES['default']['NAME'] = os.path.join(
+            workdir, 'db.sqlite3')
+        settings.REQUEST_METRICS_SERVER_TIMING = False
+        import django
+        django.setup()
+        from django.core.management import CommandError, call_command
+        from django.test import Client
+        from users.authentication import get_access_token
+        from users.models import User
+        call_command('migrate', verbosity=0)
+
+        started = time.perf_counter()
+        call_command(
+            'gendata', users=args.users, titles=args.titles,
+            reviews_per_title=args.reviews_per_title,
+            comments_per_review=args.comments_per_review,
+            seed=args.seed, verbosity=0
+        )
+        generate_seconds = time.perf_counter() - started
+        routes = [
+            (name, template) for name, template in ROUTES
+            if not args.routes or name in args.routes
+        ]
+        try:
+            call_command('buildsimilar', verbosity=0)
+        except CommandError as error:
+            print(f'Похожие произведения не замеряются: {error}',
+                  file=sys.stderr)
+            routes = [route for route in routes if route[0] not in (
+                'titles-similar', 'users-recommendations')]
+
+        # Администратор с отзывами: рекомендации строятся по ним.
+        admin = User.objects.filter(role=User.USER).order_by('pk').first()
+        admin.role = User.ADMIN
+        admin.save()
+        client = Client(HTTP_AUTHORIZATION=(
+            f'Bearer {get_access_token(admin)}'
+        ))
+        samples = list(make_samples(
+            random.Random(args.seed), args.requests + args.warmup
+        ))
+        result = {
+            'meta': {
+                **git_revision(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'args': vars(args),
+                'generate_seconds': round(generate_seconds, 1),
+            },
+            'routes': {
+                name: measure(client, template, samples, args.warmup)
+                for name, template in routes
+            },
+        }
+        if previous:
+            result['compare'] = compare(result['routes'], previous)
+        output = json.dumps(result, ensure_ascii=False, indent=2)
+        print(output)
+        if args.output:
+            with open(args.output, 'w') as output_file:
+                output_file.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
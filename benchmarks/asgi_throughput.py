@@ -0,0 +1,198 @@
+"""Пропускная способность горячих чтений: uvicorn с ASGI против WSGI.
+
+Заполняет временную базу SQLite командой gendata и по очереди запускает
+на ней runserver (WSGI, поток на соединение) и uvicorn с
+api_yamdb.asgi:application (нужен `pip install uvicorn`). Для каждого
+числа одновременных соединений клиент на asyncio в течение --seconds
+запрашивает списки и карточки произведений, отзывы, комментарии,
+категории и жанры; каждый запрос — новое соединение. Результат в JSON:
+
+    python benchmarks/asgi_throughput.py --connections 1 16 64
+"""
+import argparse
+import asyncio
+import importlib.util
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from api_throughput import percentile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.join(BASE_DIR, 'api_yamdb')
+sys.path.append(PROJECT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+READ_URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/{title}/',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/reviews/{review}/comments/',
+    '/api/v1/categories/',
+    '/api/v1/genres/',
+)
+SETTINGS = '''from api_yamdb.settings import *  # noqa
+
+DEBUG = False
+DATABASES['default']['NAME'] = {name!r}
+'''
+
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(
+                f'Сервер завершился с кодом {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Сервер не открыл порт {port}')
+
+
+async def fetch(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n'
+            'Connection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    return response.startswith((b'HTTP/1.1 200', b'HTTP/1.0 200'))
+
+
+async def load(port, urls, connections, seconds):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+
+    async def connection(rng):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = await fetch(port, rng.choice(urls))
+            except OSError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+
+    await asyncio.gather(*(
+        connection(random.Random(i)) for i in range(connections)
+    ))
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': round(len(latencies) / seconds, 1),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'errors': errors,
+    }
+
+
+def make_urls(rng, count):
+    from reviews.models import Review
+
+    reviews = list(Review.objects.values_list('pk', 'title_id'))
+    urls = []
+    for _ in range(count):
+        review, title = rng.choice(reviews)
+        urls.append(rng.choice(READ_URLS).format(title=title, review=review))
+    return urls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--titles', type=int, default=5000)
+    parser.add_argument('--reviews_per_title', type=int, default=5)
+    parser.add_argument(
+        '--connections', type=int, nargs='+', default=[1, 16, 64],
+        help='Числа одновременных соединений для замеров.'
+    )
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    servers = {
+        'wsgi': [
+            sys.executable, 'manage.py', 'runserver', '--noreload',
+            '127.0.0.1:{port}',
+        ],
+    }
+    if importlib.util.find_spec('uvicorn'):
+        servers['asgi'] = [
+            sys.executable, '-m', 'uvicorn', 'api_yamdb.asgi:application',
+            '--log-level', 'warning', '--no-access-log', '--port', '{port}',
+        ]
+    else:
+        print('uvicorn не установлен: замеряется только WSGI',
+              file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        name = os.path.join(workdir, 'db.sqlite3')
+        from django.conf import settings
+        settings.DATABASES['default']['NAME'] = name
+        import django
+        django.setup()
+        from django.core.management import call_command
+        from django.db import connections
+        call_command('migrate', verbosity=0)
+        call_command(
+            'gendata', users=args.users, titles=args.titles,
+            reviews_per_title=args.reviews_per_title, seed=args.seed,
+            verbosity=0
+        )
+        urls = make_urls(random.Random(args.seed), 10000)
+        connections.close_all()
+        with open(os.path.join(workdir, 'bench_settings.py'), 'w') as file:
+            file.write(SETTINGS.format(name=name))
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'bench_settings',
+            'PYTHONPATH': os.pathsep.join((workdir, PROJECT_DIR)),
+        }
+
+        result = {'args': vars(args)}
+        for server, command in servers.items():
+            port = get_free_port()
+            process = subprocess.Popen(
+                [part.format(port=port) for part in command],
+                cwd=PROJECT_DIR, env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            try:
+                wait_for_port(port, process)
+                asyncio.run(load(port, urls, 1, 1))
+                result[server] = {
+                    str(count): asyncio.run(
+                        load(port, urls, count, args.seconds))
+                    for count in args.connections
+                }
+            finally:
+                process.terminate()
+                process.wait()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Сравнение автодополнения из индекса в памяти с запросом через ORM.
+
+Создаёт временную базу SQLite с синтетическими произведениями, строит
+индекс автодополнения и замеряет время ответа на случайные префиксы
+обоими способами. Результат выводится в JSON:
+
+    python benchmarks/autocomplete.py --titles 1000000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+ADJECTIVES = (
+    'Тёмный', 'Белый', 'Последний', 'Далёкий', 'Тихий', 'Красный',
+    'Забытый', 'Северный', 'Золотой', 'Старый', 'Новый', 'Дикий',
+)
+NOUNS = (
+    'берег', 'город', 'лес', 'ветер', 'дом', 'путь', 'остров', 'сад',
+    'мост', 'океан', 'замок', 'поезд', 'свет', 'край', 'сон', 'шторм',
+)
+
+
+def make_names(count, seed):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield (
+            f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} '
+            f'{rng.randrange(10 ** 6)}'
+        )
+
+
+def rss_mb():
+    with open('/proc/self/statm') as statm:
+        pages = int(statm.read().split()[1])
+    return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def timings(search, prefixes):
+    result = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        search(prefix)
+        result.append((time.perf_counter() - started) * 10 ** 6)
+    result.sort()
+    return {
+        'queries': len(result),
+        'mean_us': round(statistics.mean(result), 1),
+        'p99_us': round(result[int(len(result) * 0.99) - 1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--titles', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=10000)
+    parser.add_argument('--orm_queries', type=int, default=300)
+    parser.add_argument('--limit', type=int, default=10)
+    parser.add_argument('--batch_size', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        from django.conf import settings
+        settings.DATABASES['default']['NAME'] = os.path.join(
+            workdir, 'db.sqlite3')
+        import django
+        django.setup()
+        from django.core.management import call_command
+        from reviews.autocomplete import CATALOGUES
+        from reviews.models import Title
+        call_command('migrate', verbosity=0)
+
+        batch = []
+        for name in make_names(args.titles, args.seed):
+            batch.append(Title(name=name, year=2000))
+            if len(batch) == args.batch_size:
+                Title.objects.bulk_create(batch)
+                batch = []
+        Title.objects.bulk_create(batch)
+
+        titles = CATALOGUES['titles']
+        rss_before = rss_mb()
+        started = time.perf_counter()
+        titles.build()
+        build_seconds = time.perf_counter() - started
+        index_mb = rss_mb() - rss_before
+
+        rng = random.Random(args.seed)
+        names = list(make_names(1000, args.seed + 1))
+        prefixes = [
+            rng.choice(names)[:rng.randint(1, 8)]
+            for _ in range(args.queries)
+        ]
+
+        def orm_search(prefix):
+            return list(
+                Title.objects.filter(name__startswith=prefix)
+                .order_by('name')
+                .values_list('pk', 'name')[:args.limit]
+            )
+
+        print(json.dumps({
+            'titles': args.titles,
+            'index_build_seconds': round(build_seconds, 2),
+            'index_rss_mb': round(index_mb, 1),
+            'index': timings(
+                lambda prefix: titles.search(prefix, args.limit), prefixes
+            ),
+            'orm': timings(orm_search, prefixes[:args.orm_queries]),
+        }, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
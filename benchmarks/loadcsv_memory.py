@@ -0,0 +1,100 @@
+"""Замер скорости и пикового потребления памяти loadcsv на синтетике.
+
+Генерирует сжатые gzip csv в временный каталог, загружает их во временную
+базу SQLite командой loadcsv --bulk и выводит результат в JSON:
+
+    python benchmarks/loadcsv_memory.py --reviews 1000000 --titles 1000
+"""
+import argparse
+import csv
+import gzip
+import json
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+
+def write_csv(path, header, rows):
+    with gzip.open(f'{path}.gz', 'wt', encoding='utf-8', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def generate(data_dir, titles, reviews):
+    users = math.ceil(reviews / titles)
+    write_csv(
+        os.path.join(data_dir, 'category.csv'),
+        ('id', 'name', 'slug'), [(1, 'Фильм', 'movie')]
+    )
+    write_csv(
+        os.path.join(data_dir, 'users.csv'),
+        ('id', 'username', 'email', 'role'),
+        ((i, f'user{i}', f'user{i}@yamdb.fake', 'user')
+         for i in range(1, users + 1))
+    )
+    write_csv(
+        os.path.join(data_dir, 'titles.csv'),
+        ('id', 'name', 'year', 'category'),
+        ((i, f'Произведение {i}', 2000, 1) for i in range(1, titles + 1))
+    )
+    write_csv(
+        os.path.join(data_dir, 'review.csv'),
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        ((i, i % titles + 1, f'Отзыв {i}', i // titles + 1, i % 10 + 1,
+          '2020-01-01T00:00:00Z') for i in range(reviews))
+    )
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reviews', type=int, default=1000000)
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--batch_size', type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        data_dir = os.path.join(workdir, 'data')
+        os.mkdir(data_dir)
+        generate(data_dir, args.titles, args.reviews)
+
+        from django.conf import settings
+        settings.DATABASES['default']['NAME'] = os.path.join(
+            workdir, 'db.sqlite3')
+        settings.STATICFILES_DIRS = (f'{workdir}/',)
+        import django
+        django.setup()
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+        baseline = peak_rss_mb()
+        started = time.perf_counter()
+        call_command(
+            'loadcsv', bulk=True, only_err_msg=True,
+            batch_size=args.batch_size
+        )
+        elapsed = time.perf_counter() - started
+        print(json.dumps({
+            'reviews': args.reviews,
+            'titles': args.titles,
+            'batch_size': args.batch_size,
+            'seconds': round(elapsed, 2),
+            'reviews_per_second': round(args.reviews / elapsed),
+            'baseline_rss_mb': round(baseline, 1),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+"""Сравнение способов пересчёта рейтингов и гистограмм оценок.
+
+Заполняет временную базу SQLite синтетическими отзывами, обнуляет
+сохранённые рейтинги и пересчитывает их тремя способами: циклом
+агрегатов ORM по каждому произведению, командой recalcratings с
+группировкой в БД и recalcratings --vectorized. Результат в JSON:
+
+    python benchmarks/recalcratings.py --reviews 10000000 --titles 10000
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+
+def generate(connection, titles, reviews, seed):
+    """Вставляет данные напрямую, минуя сигналы и поисковый индекс."""
+    from django.db import transaction
+    authors = math.ceil(reviews / titles)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO users_user (id, password, is_superuser, username, '
+            'first_name, last_name, email, is_staff, is_active, date_joined, '
+            "bio, role, confirmation_code) VALUES (%s, '', 0, %s, '', '', "
+            "%s, 0, 1, '2020-01-01', '', 'user', '')",
+            ((i, f'user{i}', f'user{i}@yamdb.fake')
+             for i in range(1, authors + 1))
+        )
+        cursor.executemany(
+            "INSERT INTO reviews_title (id, name, year, description, "
+            "rating_sum, rating_count"
+            + ''.join(f', score_{s}' for s in range(1, 11))
+            + ') VALUES (%s, %s, 2000, \'\', 0, 0' + ', 0' * 10 + ')',
+            ((i, f'Произведение {i}') for i in range(1, titles + 1))
+        )
+        cursor.executemany(
+            'INSERT INTO reviews_review (text, pub_date, author_id, '
+            "title_id, score) VALUES ('', '2020-01-01', %s, %s, %s)",
+            ((i // titles + 1, i % titles + 1, (i * seed) % 10 + 1)
+             for i in range(reviews))
+        )
+
+
+def reset(Title):
+    from reviews.models import SCORES, score_field
+    Title.objects.update(
+        rating_sum=0, rating_count=0, rating=None,
+        **{score_field(score): 0 for score in SCORES}
+    )
+
+
+def orm_loop(Title, Review):
+    """Агрегат по отзывам и запись отдельно для каждого произведения."""
+    from django.db import transaction
+    from django.db.models import Count, Q, Sum
+    from reviews.models import SCORES, score_field
+    aggregates = {
+        score_field(score): Count('pk', filter=Q(score=score))
+        for score in SCORES
+    }
+    with transaction.atomic():
+        for pk in Title.objects.values_list('pk', flat=True).iterator():
+            stats = Review.objects.filter(title_id=pk).aggregate(
+                rating_sum=Sum('score'), rating_count=Count('pk'),
+                **aggregates
+            )
+            stats['rating_sum'] = stats['rating_sum'] or 0
+            stats['rating'] = (
+                stats['rating_sum'] / stats['rating_count']
+                if stats['rating_count'] else None
+            )
+            Title.objects.filter(pk=pk).update(**stats)
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reviews', type=int, default=10000000)
+    parser.add_argument('--titles', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument(
+        '--skip_orm_loop', action='store_true',
+        help='Не замерять цикл агрегатов ORM.'
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        from django.conf import settings
+        settings.DATABASES['default']['NAME'] = os.path.join(
+            workdir, 'db.sqlite3')
+        import django
+        django.setup()
+        from django.core.management import call_command
+        from django.db import connection
+        from reviews.models import Review, Title
+        call_command('migrate', verbosity=0)
+
+        started = time.perf_counter()
+        generate(connection, args.titles, args.reviews, args.seed)
+        result = {
+            'reviews': args.reviews,
+            'titles': args.titles,
+            'generate_seconds': round(time.perf_counter() - started, 1),
+        }
+        methods = {
+            'recalcratings': lambda: call_command(
+                'recalcratings', verbosity=0),
+            'recalcratings_vectorized': lambda: call_command(
+                'recalcratings', vectorized=True, verbosity=0),
+        }
+        if not args.skip_orm_loop:
+            methods['orm_loop'] = lambda: orm_loop(Title, Review)
+        expected = None
+        for name, method in methods.items():
+            reset(Title)
+            started = time.perf_counter()
+            method()
+            result[f'{name}_seconds'] = round(
+                time.perf_counter() - started, 2)
+            # Пик памяти процесса с начала работы, а не отдельного способа.
+            result[f'{name}_peak_rss_mb'] = round(peak_rss_mb(), 1)
+            ratings = list(
+                Title.objects.order_by('pk').values_list('rating', flat=True)
+            )
+            assert expected in (None, ratings), f'{name}: рейтинги расходятся'
+            expected = ratings
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""Чтение API во время записи: SQLite по умолчанию и с SQLITE_PRAGMAS.
+
+Для каждого профиля заполняет временную базу командой gendata и в
+течение --seconds гоняет потоки-читатели с GET-запросами к произведениям
+и отзывам через тестовый клиент Django, пока потоки-писатели добавляют
+комментарии и меняют оценки отзывов. Профиль default — журнал DELETE и
+новое соединение на каждый запрос, tuned — SQLITE_PRAGMAS и
+CONN_MAX_AGE из настроек. Результат в JSON:
+
+    python benchmarks/sqlite_concurrency.py --readers 4 --writers 2
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from api_throughput import percentile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BASE_DIR, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+READ_URLS = (
+    '/api/v1/titles/{title}/',
+    '/api/v1/titles/{title}/reviews/',
+    '/api/v1/titles/{title}/stats/',
+)
+
+
+def read(stop, title_ids, seed, result):
+    from django.db import connections
+    from django.test import Client
+
+    rng = random.Random(seed)
+    client = Client()
+    try:
+        while not stop.is_set():
+            url = rng.choice(READ_URLS).format(title=rng.choice(title_ids))
+            started = time.perf_counter()
+            try:
+                ok = client.get(url).status_code == 200
+            except Exception:
+                ok = False
+            if ok:
+                result['latencies'].append(
+                    (time.perf_counter() - started) * 1000)
+            else:
+                result['errors'] += 1
+    finally:
+        connections.close_all()
+
+
+def write(stop, reviews, user_ids, seed, result):
+    """Комментарий и новая оценка отзыва — каждые в своей транзакции."""
+    from django.db import connections
+    from reviews.models import Comment, Review
+
+    rng = random.Random(seed)
+    try:
+        while not stop.is_set():
+            review_id = rng.choice(reviews)
+            try:
+                Comment.objects.create(
+                    review_id=review_id, author_id=rng.choice(user_ids),
+                    text='Комментарий во время замера'
+                )
+                review = Review.objects.get(pk=review_id)
+                review.score = rng.randint(1, 10)
+                review.save()
+                result['writes'] += 1
+            except Exception:
+                result['errors'] += 1
+    finally:
+        connections.close_all()
+
+
+def run(args):
+    from reviews.models import Review, Title
+    from users.models import User
+
+    title_ids = list(Title.objects.values_list('pk', flat=True))
+    review_ids = list(Review.objects.values_list('pk', flat=True))
+    user_ids = list(User.objects.values_list('pk', flat=True))
+    stop = threading.Event()
+    readers = [{'latencies': [], 'errors': 0} for _ in range(args.readers)]
+    writers = [{'writes': 0, 'errors': 0} for _ in range(args.writers)]
+    threads = [
+        threading.Thread(
+            target=read, args=(stop, title_ids, args.seed + i, result))
+        for i, result in enumerate(readers)
+    ] + [
+        threading.Thread(
+            target=write,
+            args=(stop, review_ids, user_ids, args.seed - i - 1, result))
+        for i, result in enumerate(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(
+        latency for result in readers for latency in result['latencies'])
+    writes = sum(result['writes'] for result in writers)
+    return {
+        'reads': len(latencies),
+        'reads_per_second': round(len(latencies) / args.seconds, 1),
+        'read_p50_ms': round(percentile(latencies, 50), 2),
+        'read_p95_ms': round(percentile(latencies, 95), 2),
+        'read_p99_ms': round(percentile(latencies, 99), 2),
+        'read_mean_ms': round(statistics.mean(latencies), 2),
+        'read_errors': sum(result['errors'] for result in readers),
+        'writes': writes,
+        'writes_per_second': round(writes / args.seconds, 1),
+        'write_errors': sum(result['errors'] for result in writers),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--titles', type=int, default=5000)
+    parser.add_argument('--reviews_per_title', type=int, default=5)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    from django.conf import settings
+    database = settings.DATABASES['default']
+    profiles = {
+        'default': (0, {}),
+        'tuned': (database['CONN_MAX_AGE'], settings.SQLITE_PRAGMAS),
+    }
+    import django
+    django.setup()
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.db import connections
+
+    result = {'args': vars(args)}
+    for name, (conn_max_age, pragmas) in profiles.items():
+        with tempfile.TemporaryDirectory() as workdir:
+            connections.close_all()
+            cache.clear()
+            database['NAME'] = os.path.join(workdir, 'db.sqlite3')
+            database['CONN_MAX_AGE'] = conn_max_age
+            settings.SQLITE_PRAGMAS = pragmas
+            call_command('migrate', verbosity=0)
+            call_command(
+                'gendata', users=args.users, titles=args.titles,
+                reviews_per_title=args.reviews_per_title,
+                comments_per_review=0, seed=args.seed, verbosity=0
+            )
+            connections.close_all()
+            result[name] = run(args)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,9 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -113,3 +119,20 @@ def create_comments(admin_client, admin):
     result.append({'id': create_comment(client_moderator, titles[0]["id"], reviews[0]["id"], 'qwerty321'),
                    'author': moderator.username, 'text': 'qwerty321'})
     return result, reviews, titles, user, moderator
+
+
+def run_django(code):
+    """Выполняет код в отдельном процессе Django с кэшами тестов."""
+    subprocess.run(
+        [
+            sys.executable, '-c',
+            'import json, os, django; from django.conf import settings; '
+            'settings.CACHES = json.loads(os.environ["YAMDB_TEST_CACHES"]); '
+            f'django.setup(); {code}'
+        ],
+        cwd=settings.BASE_DIR, check=True,
+        env=dict(
+            os.environ, DJANGO_SETTINGS_MODULE='api_yamdb.settings',
+            YAMDB_TEST_CACHES=json.dumps(settings.CACHES)
+        )
+    )
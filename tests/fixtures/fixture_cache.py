@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.fixture(scope='session', autouse=True)
+def test_caches(tmp_path_factory):
+    """Файловые кэши тестов лежат во временной папке сессии.
+
+    Иначе тесты очищали бы общие кэши запущенного на этой машине сервера.
+    """
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    location = tmp_path_factory.mktemp('caches')
+    caches = {
+        alias: (
+            {**config, 'LOCATION': str(location / alias)}
+            if config['BACKEND'].endswith('FileBasedCache') else config
+        )
+        for alias, config in settings.CACHES.items()
+    }
+    with override_settings(CACHES=caches):
+        yield caches
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(test_caches):
+    from django.conf import settings
+    from django.core.cache import caches
+    from reviews import autocomplete
+    from users.cache import user_cache
+
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    user_cache.clear()
+    autocomplete.invalidate()
+    yield
+    for alias in settings.CACHES:
+        caches[alias].clear()
+    user_cache.clear()
+    autocomplete.invalidate()
@@ -0,0 +1,6 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def sync_outbox(settings):
+    settings.EMAIL_OUTBOX_ASYNC = False
@@ -0,0 +1,57 @@
+"""Проваливает тест, если запрос к API превысил бюджет запросов к БД.
+
+Бюджеты маршрутов объявлены в settings.QUERY_BUDGETS, а маркер
+``@pytest.mark.query_budget(n)`` задаёт один бюджет для всех
+запросов теста.
+"""
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(n): не больше n запросов к БД на каждый запрос к API'
+    )
+
+
+def over_budget(route, method, queries, marker_budget=None):
+    """Сообщение о превышении бюджета или None."""
+    from api.metrics import get_query_budget
+
+    budget = (
+        marker_budget if marker_budget is not None
+        else get_query_budget(route, method)
+    )
+    if budget is None or queries <= budget:
+        return None
+    return f'{method} {route}: {queries} запросов к БД при бюджете {budget}'
+
+
+@pytest.fixture(autouse=True)
+def query_budget_exceeded(request):
+    """Собирает превышения бюджета за время теста."""
+    from api.metrics import request_measured
+
+    marker = request.node.get_closest_marker('query_budget')
+    marker_budget = marker.args[0] if marker else None
+    exceeded = request.node.query_budget_exceeded = []
+
+    def check(sender, route, method, metrics, **kwargs):
+        message = over_budget(route, method, metrics['queries'], marker_budget)
+        if message:
+            exceeded.append(message)
+
+    request_measured.connect(check)
+    yield exceeded
+    request_measured.disconnect(check)
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_runtest_call(item):
+    """Проваливает прошедший тест, если бюджет был превышен."""
+    exceeded = getattr(item, 'query_budget_exceeded', None)
+    if exceeded:
+        pytest.fail(
+            'Проверьте число запросов к БД:\n' + '\n'.join(exceeded),
+            pytrace=False
+        )
@@ -0,0 +1,123 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_reviews
+
+
+class Test08TitleRating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_is_stored(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (12, 3, 4.0), (
+            'Проверьте, что сумма, число оценок и рейтинг хранятся в модели `Title`'
+        )
+        review = Review.objects.get(pk=reviews[1]['id'])
+        review.score = 9
+        review.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (18, 3), (
+            'Проверьте, что изменение оценки обновляет рейтинг произведения'
+        )
+        Review.objects.filter(pk=reviews[0]['id']).delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count, title.rating) == (13, 2, 6.5), (
+            'Проверьте, что удаление отзыва обновляет рейтинг произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles_list_does_not_aggregate(self, client, admin_client, admin):
+        create_reviews(admin_client, admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert not any('reviews_review' in query['sql'] for query in queries), (
+            'Проверьте, что список произведений не агрегирует таблицу отзывов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_recalcratings_fixes_drift(self, admin_client, admin):
+        from reviews.models import Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        Title.objects.filter(pk=titles[0]['id']).update(
+            rating_sum=1, rating_count=1, rating=1
+        )
+        call_command('recalcratings', dry_run=True)
+        assert Title.objects.get(pk=titles[0]['id']).rating == 1, (
+            'Проверьте, что `--dry_run` ничего не записывает'
+        )
+        call_command('recalcratings')
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (12, 3, 4.0), (
+            'Проверьте, что `recalcratings` восстанавливает рейтинг по отзывам'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_title_save_keeps_counters(self, admin_client, admin):
+        from django.db.models import Count, Sum
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        stale = Title.objects.get(pk=title_id)
+        Review.objects.get(pk=reviews[0]['id']).delete()
+        stale.description = 'Новое описание'
+        stale.save()
+        response = admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'name': 'Новое', 'rating': 10}
+        )
+        assert response.status_code == 200
+        title = Title.objects.get(pk=title_id)
+        actual = Review.objects.filter(title_id=title_id).aggregate(
+            rating_sum=Sum('score'), rating_count=Count('pk')
+        )
+        assert (title.rating_sum, title.rating_count) == (
+            actual['rating_sum'], actual['rating_count']
+        ), 'Проверьте, что сохранение произведения не затирает счётчики оценок'
+        assert (title.name, title.description) == ('Новое', 'Новое описание'), (
+            'Проверьте, что остальные поля произведения сохраняются'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_stale_reviews_keep_rating(self, admin_client, admin,
+                                          monkeypatch):
+        from reviews import signals
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        title_id = titles[0]['id']
+        first = Review.objects.get(pk=reviews[1]['id'])
+        second = Review.objects.get(pk=reviews[1]['id'])
+        first.score = 9
+        first.save()
+        second.score = 7
+        second.save()
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (16, 3), (
+            'Проверьте, что прежняя оценка отзыва читается из БД при '
+            'сохранении, а не из загруженного ранее экземпляра'
+        )
+        first.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (9, 2), (
+            'Проверьте, что при удалении из рейтинга исключается оценка '
+            'из БД'
+        )
+
+        def fail(*args, **kwargs):
+            raise RuntimeError
+
+        monkeypatch.setattr(signals, 'change_rating', fail)
+        review = Review.objects.get(pk=reviews[2]['id'])
+        review.score = 10
+        with pytest.raises(RuntimeError):
+            review.save()
+        assert Review.objects.get(pk=review.pk).score != 10, (
+            'Проверьте, что отзыв и рейтинг сохраняются в одной транзакции'
+        )
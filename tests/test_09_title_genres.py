@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories
+
+
+class Test09TitleGenres:
+
+    def post_title(self, admin_client, category, genres):
+        data = {'name': 'Произведение', 'year': 2000, 'category': category,
+                'genre': genres, 'description': 'Описание'}
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        return response, len(queries)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genre_slugs_resolved_in_one_query(self, admin_client):
+        from reviews.models import Genre
+
+        categories = create_categories(admin_client)
+        Genre.objects.bulk_create(
+            Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(20)
+        )
+        response, few = self.post_title(
+            admin_client, categories[0]['slug'], ['genre-0']
+        )
+        assert response.status_code == 201
+        response, many = self.post_title(
+            admin_client, categories[0]['slug'],
+            [f'genre-{i}' for i in range(20)] + ['genre-0']
+        )
+        assert response.status_code == 201
+        assert len(response.json()['genre']) == 20, (
+            'Проверьте, что повторяющиеся slug жанров сохраняются один раз'
+        )
+        assert few == many, (
+            'Проверьте, что число запросов при создании произведения '
+            'не зависит от количества жанров'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_unknown_genre_slugs_reported(self, admin_client):
+        from reviews.models import Genre
+
+        categories = create_categories(admin_client)
+        Genre.objects.create(name='Жанр', slug='known')
+        response, _ = self.post_title(
+            admin_client, categories[0]['slug'], ['known', 'first', 'second']
+        )
+        assert response.status_code == 400
+        errors = response.json()['genre']
+        assert len(errors) == 2 and 'first' in errors[0] and 'second' in errors[1], (
+            'Проверьте, что о каждом несуществующем slug жанра сообщается отдельно'
+        )
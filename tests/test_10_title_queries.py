@@ -0,0 +1,45 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class Test10TitleQueries:
+    # COUNT для пагинации, страница произведений с категориями, жанры.
+    LIST_QUERIES = 3
+
+    def create_titles(self, count):
+        from reviews.models import Category, Genre, Title
+
+        genres = [
+            Genre.objects.create(name=f'Жанр {i}', slug=f'genre-{i}')
+            for i in range(3)
+        ]
+        for i in range(count):
+            category = Category.objects.create(
+                name=f'Категория {i}', slug=f'category-{i}'
+            )
+            title = Title.objects.create(
+                name=f'Произведение {i}', year=2000, category=category
+            )
+            title.genre.set(genres)
+        return Title.objects.first()
+
+    def count_queries(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == 200
+        return len(queries)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_list_constant_queries(self, client):
+        title = self.create_titles(10)
+        for url in ('/api/v1/titles/', '/api/v1/titles/?genre=genre-1',
+                    '/api/v1/titles/?category=category-2'):
+            assert self.count_queries(client, url) == self.LIST_QUERIES, (
+                f'Проверьте, что при GET запросе `{url}` категории и жанры '
+                'загружаются постоянным числом запросов'
+            )
+        assert self.count_queries(client, f'/api/v1/titles/{title.id}/') == 2, (
+            'Проверьте, что при GET запросе `/api/v1/titles/{title_id}/` '
+            'категория и жанры не запрашиваются отдельно'
+        )
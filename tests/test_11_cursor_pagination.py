@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class Test11CursorPagination:
+
+    def walk(self, client, url):
+        pages = []
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            pages.append((data, [query['sql'] for query in queries]))
+            url = data['next']
+        return pages
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cursor(self, client):
+        from reviews.models import Title
+
+        for i in range(25):
+            Title.objects.create(name=f'Произведение {i:02}', year=2000)
+        pages = self.walk(client, '/api/v1/titles/?pagination=cursor')
+        names = [title['name'] for data, _ in pages for title in data['results']]
+        assert names == sorted(names) and len(names) == 25, (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'возвращает все произведения по порядку `name`'
+        )
+        assert len({len(sql) for _, sql in pages}) == 1, (
+            'Проверьте, что число запросов не зависит от глубины страницы'
+        )
+        assert not any('COUNT' in query for _, sql in pages for query in sql), (
+            'Проверьте, что курсорная пагинация не выполняет `COUNT(*)`'
+        )
+        assert all('count' not in data for data, _ in pages)
+        response = client.get('/api/v1/titles/?pagination=cursor&count=true')
+        assert response.json()['count'] == 25, (
+            'Проверьте, что параметр `count` добавляет общее число записей'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_cursor(self, client, django_user_model):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        for i in range(15):
+            author = django_user_model.objects.create_user(
+                username=f'user{i}', email=f'user{i}@yamdb.fake'
+            )
+            Review.objects.create(title=title, author=author, text=f'{i}', score=5)
+        pages = self.walk(
+            client, f'/api/v1/titles/{title.id}/reviews/?pagination=cursor'
+        )
+        texts = [review['text'] for data, _ in pages for review in data['results']]
+        assert texts == [str(i) for i in reversed(range(15))], (
+            'Проверьте, что курсорная пагинация отзывов идёт по `-pub_date`'
+        )
+        data, _ = pages[-1]
+        response = client.get(data['previous'])
+        assert response.json()['results'][0]['text'] == '14'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_equal_names_cursor(self, client):
+        from reviews.models import Genre, Title
+
+        titles = [
+            Title.objects.create(name='Произведение', year=2000).id
+            for _ in range(25)
+        ]
+        for i in range(15):
+            Genre.objects.create(name='Жанр', slug=f'genre-{i}')
+        pages = self.walk(client, '/api/v1/titles/?pagination=cursor')
+        ids = [title['id'] for data, _ in pages for title in data['results']]
+        assert ids == titles, (
+            'Проверьте, что курсорная пагинация упорядочивает произведения '
+            'с одинаковым `name` по первичному ключу'
+        )
+        pages = self.walk(client, '/api/v1/genres/?pagination=cursor')
+        slugs = [genre['slug'] for data, _ in pages for genre in data['results']]
+        assert slugs == [f'genre-{i}' for i in range(15)], (
+            'Проверьте, что курсорная пагинация без сортировки вьюсета '
+            'добавляет первичный ключ к сортировке модели'
+        )
@@ -0,0 +1,104 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories, run_django
+
+
+class Test12CatalogueCache:
+
+    def get(self, client, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.status_code == 200
+        return response.json(), len(queries)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_cached_until_write(self, client, admin_client):
+        from api.cache import catalogue_cache_stats
+
+        create_categories(admin_client)
+        data, _ = self.get(client, '/api/v1/categories/')
+        cached, queries = self.get(client, '/api/v1/categories/')
+        assert cached == data and queries == 0, (
+            'Проверьте, что повторный GET запрос `/api/v1/categories/` '
+            'отдаётся из кэша без обращения к БД'
+        )
+        admin_client.post('/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'})
+        data, queries = self.get(client, '/api/v1/categories/')
+        assert data['count'] == 3 and queries > 0, (
+            'Проверьте, что создание категории сбрасывает кэш `/api/v1/categories/`'
+        )
+        _, queries = self.get(client, '/api/v1/categories/?page=1')
+        assert queries > 0, (
+            'Проверьте, что параметры запроса входят в ключ кэша'
+        )
+        stats = catalogue_cache_stats()
+        assert stats['categories.hit'] >= 1 and stats['categories.miss'] >= 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_titles_follow_reviews_and_genres(self, client, user):
+        from reviews.models import Genre, Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        data, _ = self.get(client, f'/api/v1/titles/{title.id}/')
+        assert data['rating'] is None
+        Review.objects.create(title=title, author=user, text='Текст', score=8)
+        data, _ = self.get(client, f'/api/v1/titles/{title.id}/')
+        assert data['rating'] == 8, (
+            'Проверьте, что новый отзыв сбрасывает кэш произведений'
+        )
+        title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+        data, _ = self.get(client, f'/api/v1/titles/{title.id}/')
+        assert data['genre'] == [{'name': 'Драма', 'slug': 'drama'}], (
+            'Проверьте, что изменение жанров сбрасывает кэш произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_version_shared_between_processes(self, client, admin_client):
+        from api.cache import get_catalogue_version
+
+        create_categories(admin_client)
+        self.get(client, '/api/v1/categories/')
+        version = get_catalogue_version('categories')
+        run_django(
+            'from api.cache import bump_catalogue_version; '
+            'bump_catalogue_version("categories")'
+        )
+        assert get_catalogue_version('categories') > version, (
+            'Проверьте, что версии каталогов хранятся в общем кэше '
+            '`CATALOGUE_VERSION_CACHE`'
+        )
+        _, queries = self.get(client, '/api/v1/categories/')
+        assert queries > 0, (
+            'Проверьте, что изменение каталога в другом процессе '
+            'сбрасывает кэш ответов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_version_bumped_after_commit(self):
+        from django.db import transaction
+
+        from api.cache import get_catalogue_version
+        from reviews.models import Category, Genre, Title
+
+        version = get_catalogue_version('categories')
+        with transaction.atomic():
+            Category.objects.create(name='Фильм', slug='film')
+            assert get_catalogue_version('categories') == version, (
+                'Проверьте, что версия каталога меняется только после '
+                'фиксации транзакции записи'
+            )
+        assert get_catalogue_version('categories') > version, (
+            'Проверьте, что после фиксации транзакции версия каталога растёт'
+        )
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        version = get_catalogue_version('titles')
+        with transaction.atomic():
+            title.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+            assert get_catalogue_version('titles') == version, (
+                'Проверьте, что смена жанров произведения меняет версию '
+                'каталога только после фиксации транзакции'
+            )
+        assert get_catalogue_version('titles') > version
@@ -0,0 +1,91 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test13ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_all_routes_conditional(self):
+        from api.conditional import ConditionalGetMixin
+        from api.urls import router_v1
+
+        for prefix, viewset, basename in router_v1.registry:
+            assert issubclass(viewset, ConditionalGetMixin), (
+                f'Проверьте, что `{prefix}` поддерживает условные GET запросы'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_not_modified_skips_serializer(self, admin_client, admin, monkeypatch):
+        from rest_framework.serializers import ListSerializer, Serializer
+
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        urls = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/users/',
+            '/api/v1/users/me/',
+        )
+        responses = {url: admin_client.get(url) for url in urls}
+
+        def fail(*args, **kwargs):
+            raise AssertionError('Сериализатор не должен вызываться при ответе 304')
+
+        with monkeypatch.context() as patch:
+            patch.setattr(Serializer, 'to_representation', fail)
+            patch.setattr(ListSerializer, 'to_representation', fail)
+            for url, response in responses.items():
+                assert response.status_code == 200 and response.has_header('ETag')
+                not_modified = admin_client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                assert not_modified.status_code == 304, (
+                    f'Проверьте, что GET запрос `{url}` с совпадающим '
+                    '`If-None-Match` возвращает статус 304'
+                )
+            url = urls[0]
+            response = admin_client.get(
+                url, HTTP_IF_MODIFIED_SINCE=responses[url]['Last-Modified']
+            )
+            assert response.status_code == 304, (
+                'Проверьте, что `If-Modified-Since` учитывается'
+            )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/comments/{comments[0]["id"]}/',
+            data={'text': 'Новый текст'}
+        )
+        response = admin_client.get(urls[1], HTTP_IF_NONE_MATCH=responses[urls[1]]['ETag'])
+        assert response.status_code == 200, (
+            'Проверьте, что изменение комментария меняет ETag списка комментариев'
+        )
+        response = admin_client.get(urls[0], HTTP_IF_NONE_MATCH=responses[urls[0]]['ETag'])
+        assert response.status_code == 304
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_not_modified_checks_object_permissions(
+        self, admin_client, admin, monkeypatch
+    ):
+        from api.permissions import IsAuthorAdminModerator
+
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/'
+        etag = admin_client.get(url)['ETag']
+        monkeypatch.setattr(
+            IsAuthorAdminModerator, 'has_object_permission',
+            lambda self, request, view, obj: False
+        )
+        response = admin_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 403, (
+            'Проверьте, что перед ответом 304 проверяются права на объект'
+        )
+        response = admin_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/0/',
+            HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что на условный GET несуществующего объекта '
+            'возвращается 404'
+        )
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Avg
+
+
+class Test14LoadCSV:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_load(self, capsys):
+        from reviews.models import Comment, Genre, Review, Title
+        from users.models import User
+
+        call_command('loadcsv', bulk=True, only_err_msg=True, batch_size=7)
+        output = capsys.readouterr().out
+        assert 'data/genre_title.csv: загружено 42, отклонено 0' in output, (
+            'Проверьте, что `loadcsv --bulk` выводит итог по каждому файлу'
+        )
+        assert (User.objects.count(), Genre.objects.count(), Title.objects.count(),
+                Review.objects.count(), Comment.objects.count()) == (5, 15, 32, 72, 3)
+        assert Title.genre.through.objects.count() == 42
+        title = Title.objects.annotate(actual=Avg('reviews__score')).filter(
+            reviews__isnull=False).first()
+        assert title.rating == title.actual, (
+            'Проверьте, что после `loadcsv --bulk` рейтинги пересчитаны'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_rejects_rows(self, capsys):
+        from reviews.models import Review
+
+        call_command('loadcsv', bulk=True, only_err_msg=True)
+        call_command('loadcsv', bulk=True, only_err_msg=True)
+        output = capsys.readouterr().out
+        assert 'data/review.csv: загружено 0, отклонено 72' in output, (
+            'Проверьте, что повторная загрузка отклоняет дубли, не прерывая файл'
+        )
+        assert Review.objects.count() == 72
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_resume_gzip_from_checkpoint(self, tmp_path, settings, monkeypatch):
+        import gzip
+        import json
+        import shutil
+
+        from reviews.management.commands.loadcsv import Command
+        from reviews.models import Review
+
+        data_dir = tmp_path / 'data'
+        shutil.copytree(f'{settings.STATICFILES_DIRS[0]}data', data_dir)
+        with open(data_dir / 'review.csv', 'rb') as src, gzip.open(data_dir / 'review.csv.gz', 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        (data_dir / 'review.csv').unlink()
+        settings.STATICFILES_DIRS = (f'{tmp_path}/',)
+        checkpoint = tmp_path / 'checkpoint.json'
+
+        insert_batch = Command.insert_batch
+        calls = []
+
+        def failing_insert_batch(self, model, batch):
+            if model is Review:
+                if len(calls) == 1:
+                    raise RuntimeError('Сбой загрузки')
+                calls.append(model)
+            return insert_batch(self, model, batch)
+
+        with monkeypatch.context() as patch:
+            patch.setattr(Command, 'insert_batch', failing_insert_batch)
+            with pytest.raises(RuntimeError):
+                call_command('loadcsv', only_err_msg=True, batch_size=20, checkpoint=str(checkpoint))
+        state = json.loads(checkpoint.read_text())
+        assert state['rows'] == {'data/review.csv': 20}, (
+            'Проверьте, что контрольная точка хранит число загруженных строк файла'
+        )
+        assert Review.objects.count() == 20
+        call_command('loadcsv', only_err_msg=True, batch_size=20, resume_from=str(checkpoint))
+        assert Review.objects.count() == 72, (
+            'Проверьте, что `--resume_from` продолжает загрузку с контрольной точки'
+        )
+        assert not checkpoint.exists()
+
+    def test_04_file_dependencies(self):
+        from reviews.management.commands.loadcsv import Command
+
+        command = Command()
+        assert command.get_dependencies() == {
+            Command.CATEGORY: set(),
+            Command.GENRE: set(),
+            Command.USER: set(),
+            Command.TITLE: {Command.CATEGORY},
+            Command.REVIEW: {Command.TITLE, Command.USER},
+            Command.COMMENT: {Command.REVIEW, Command.USER},
+            Command.GENRE_TITLE: {Command.TITLE, Command.GENRE},
+        }, 'Проверьте, что граф зависимостей строится по внешним ключам моделей'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_workers_on_sqlite(self, capsys):
+        from reviews.models import Comment
+
+        call_command('loadcsv', bulk=True, only_err_msg=True, workers=4)
+        assert 'загружаются по одному' in capsys.readouterr().out, (
+            'Проверьте, что на SQLite файлы загружаются последовательно'
+        )
+        assert Comment.objects.count() == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_workers_respect_dependencies(self, capsys):
+        from reviews.management.commands.loadcsv import Command
+
+        events = []
+        lock = threading.Lock()
+
+        class ParallelCommand(Command):
+
+            def supports_parallel_writes(self):
+                return True
+
+            def load_file(self, url, options, checkpoint):
+                with lock:
+                    events.append(('start', url))
+                time.sleep(0.05)
+                with lock:
+                    events.append(('end', url))
+
+        command = ParallelCommand()
+        call_command(command, bulk=True, only_err_msg=True, workers=4)
+        assert 'загружаются по одному' not in capsys.readouterr().out
+        dependencies = command.get_dependencies()
+        assert sorted(url for event, url in events if event == 'start') == (
+            sorted(dependencies)
+        ), 'Проверьте, что в пуле потоков загружается каждый файл'
+        for url, parents in dependencies.items():
+            started = events.index(('start', url))
+            assert all(
+                events.index(('end', parent)) < started for parent in parents
+            ), (
+                f'Проверьте, что загрузка {url} начинается только после '
+                f'загрузки файлов {sorted(parents)}'
+            )
+        assert events[:3] == [
+            ('start', url) for _, url in events[:3]
+        ], 'Проверьте, что независимые файлы загружаются параллельно'
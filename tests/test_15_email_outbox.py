@@ -0,0 +1,59 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class Test15EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    def signup(self, client, username):
+        return client.post(self.url_signup, data={
+            'username': username, 'email': f'{username}@yamdb.fake'
+        })
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_signup_queues_email(self, client, settings, monkeypatch):
+        from users.mail import sender
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_OUTBOX_ASYNC = True
+        monkeypatch.setattr(sender, 'start', lambda: None)
+        response = self.signup(client, 'first')
+        assert response.status_code == 200
+        email = OutgoingEmail.objects.get(recipient='first@yamdb.fake')
+        assert email.status == OutgoingEmail.PENDING and not mail.outbox, (
+            'Проверьте, что при регистрации письмо только сохраняется в outbox'
+        )
+        self.signup(client, 'second')
+        sender.process_once()
+        assert OutgoingEmail.objects.filter(status=OutgoingEmail.SENT).count() == 2
+        assert {message.to[0] for message in mail.outbox} == {
+            'first@yamdb.fake', 'second@yamdb.fake'
+        }, 'Проверьте, что фоновый отправитель отправляет письма пачкой'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_failed_email_retried(self, client, monkeypatch):
+        from users.models import OutgoingEmail
+
+        def fail(self, messages):
+            raise ConnectionError('SMTP недоступен')
+
+        with monkeypatch.context() as patch:
+            patch.setattr(EmailBackend, 'send_messages', fail)
+            response = self.signup(client, 'retry')
+        assert response.status_code == 200, (
+            'Проверьте, что ошибка почтового сервера не мешает регистрации'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.status == OutgoingEmail.PENDING and email.attempts == 1
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что повторная отправка откладывается'
+        )
+        call_command('sendoutbox')
+        assert not mail.outbox
+        OutgoingEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('sendoutbox')
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.SENT and len(mail.outbox) == 1
@@ -0,0 +1,161 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .common import create_reviews, run_django
+
+
+def claims_client(user):
+    from users.authentication import get_access_token
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {get_access_token(user)}')
+    return client
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'users_user' in query['sql']
+    ]
+
+
+class Test16TokenClaims:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_token_has_claims(self, client, django_user_model):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        user = django_user_model.objects.create_user(
+            username='TestClaims', email='claims@yamdb.fake',
+            role='moderator', confirmation_code='code'
+        )
+        response = client.post(
+            '/api/v1/auth/token/',
+            data={'username': user.username, 'confirmation_code': 'code'}
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/auth/token/` выдаёт токен'
+        )
+        token = AccessToken(response.json())
+        assert token['role'] == 'moderator' and token['username'] == user.username, (
+            'Проверьте, что токен содержит роль и имя пользователя'
+        )
+        assert 'iat' in token, 'Проверьте, что токен содержит время выдачи `iat`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_no_user_queries(self, admin):
+        client = claims_client(admin)
+        with CaptureQueriesContext(connection) as context:
+            response = client.delete('/api/v1/categories/unknown/')
+        assert response.status_code == 404, (
+            'Проверьте, что админ с токеном с клеймами проходит проверку прав'
+        )
+        assert not user_queries(context), (
+            'Проверьте, что при токене с клеймами пользователь не загружается из БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_plain_token_fallback(self, admin_client, user_client):
+        response = admin_client.delete('/api/v1/categories/unknown/')
+        assert response.status_code == 404, (
+            'Проверьте, что токены без клеймов по-прежнему принимаются'
+        )
+        response = user_client.delete('/api/v1/categories/unknown/')
+        assert response.status_code == 403, (
+            'Проверьте, что для токенов без клеймов права берутся из БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_role_change_revokes_claims(self, admin, django_user_model):
+        client = claims_client(admin)
+        user = django_user_model.objects.get(pk=admin.pk)
+        user.role = 'user'
+        user.save()
+        response = client.delete('/api/v1/categories/unknown/')
+        assert response.status_code == 403, (
+            'Проверьте, что после смены роли клеймы старых токенов не принимаются'
+        )
+        client = claims_client(user)
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200 and response.json()['role'] == 'user', (
+            'Проверьте, что новый токен выдаётся с актуальной ролью'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_deleted_user_rejected(self, user):
+        client = claims_client(user)
+        user.delete()
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == 401, (
+            'Проверьте, что токен удалённого пользователя не принимается'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_author_actions(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        response = claims_client(user).post(url, data={'text': 'Текст', 'score': 5})
+        assert response.status_code == 201, (
+            'Проверьте, что пользователь с токеном с клеймами может оставить отзыв'
+        )
+        assert response.json()['author'] == user.username, (
+            'Проверьте, что автором отзыва указывается пользователь из токена'
+        )
+        review_url = f'{url}{response.json()["id"]}/'
+        response = claims_client(user).patch(review_url, data={'text': 'Новый'})
+        assert response.status_code == 200, (
+            'Проверьте, что автор с токеном с клеймами может изменить свой отзыв'
+        )
+        response = claims_client(moderator).delete(review_url)
+        assert response.status_code == 204, (
+            'Проверьте, что модератор с токеном с клеймами может удалить отзыв'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_revocations_shared(self, admin):
+        from django.conf import settings
+        from django.core.cache import caches
+
+        from users.authentication import claims_are_valid, get_access_token
+
+        caches[settings.TOKEN_CLAIMS_CACHE].clear()
+        token = get_access_token(admin)
+        assert claims_are_valid(token)
+        token['iat'] -= 1
+        assert not claims_are_valid(token), (
+            'Проверьте, что после очистки `TOKEN_CLAIMS_CACHE` клеймы ранее '
+            'выданных токенов не принимаются'
+        )
+        token = get_access_token(admin)
+        run_django(
+            'from users.authentication import revoke_token_claims; '
+            f'revoke_token_claims({admin.pk})'
+        )
+        assert not claims_are_valid(token), (
+            'Проверьте, что отзыв клеймов в другом процессе виден всем '
+            'процессам'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_08_revocation_kept_for_claims_age(self, admin, settings,
+                                               monkeypatch):
+        from django.core.cache import caches
+
+        from users.authentication import revoke_token_claims
+
+        cache = caches[settings.TOKEN_CLAIMS_CACHE]
+        timeouts = []
+        set_value = cache.set
+
+        def remember(key, value, timeout, *args, **kwargs):
+            timeouts.append(timeout)
+            return set_value(key, value, timeout, *args, **kwargs)
+
+        monkeypatch.setattr(cache, 'set', remember)
+        revoke_token_claims(admin.pk)
+        assert timeouts == [settings.TOKEN_CLAIMS_MAX_AGE], (
+            'Проверьте, что отметка об отзыве клеймов хранится '
+            '`TOKEN_CLAIMS_MAX_AGE` секунд, пока клеймы не устареют сами'
+        )
@@ -0,0 +1,90 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'users_user' in query['sql']
+    ]
+
+
+class Test17UserCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_steady_state_no_queries(self, user_client):
+        from users.cache import user_cache
+
+        user_client.get('/api/v1/users/me/')
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/users/me/')
+            user_client.delete('/api/v1/categories/unknown/')
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/users/me/` доступен пользователю'
+        )
+        assert not user_queries(context), (
+            'Проверьте, что повторные запросы не загружают пользователя из БД'
+        )
+        stats = user_cache.get_stats()
+        assert stats['hit'] >= 3 and stats['miss'] == 1, (
+            'Проверьте, что кэш пользователей считает попадания и промахи'
+        )
+        assert 0 < stats['hit_rate'] < 1, (
+            'Проверьте, что кэш пользователей отдаёт долю попаданий'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_save_evicts(self, admin_client, user_client, user):
+        response = user_client.delete('/api/v1/categories/unknown/')
+        assert response.status_code == 403, (
+            'Проверьте, что пользователь не может удалять категории'
+        )
+        admin_client.patch(f'/api/v1/users/{user.username}/', data={'role': 'admin'})
+        response = user_client.delete('/api/v1/categories/unknown/')
+        assert response.status_code == 404, (
+            'Проверьте, что после изменения пользователь удаляется из кэша'
+        )
+        user.delete()
+        response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == 401, (
+            'Проверьте, что удалённый пользователь удаляется из кэша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bounded_and_expiring(self, admin, moderator, user):
+        from users.cache import UserCache
+
+        users = UserCache(maxsize=2, timeout=60)
+        for pk in (admin.pk, moderator.pk, user.pk):
+            users.get(pk)
+        stats = users.get_stats()
+        assert stats['size'] == 2 and stats['eviction'] == 1, (
+            'Проверьте, что кэш пользователей ограничен по размеру'
+        )
+        assert users.get(user.pk) == user and users.get_stats()['hit'] == 1, (
+            'Проверьте, что недавно использованные пользователи остаются в кэше'
+        )
+        users = UserCache(maxsize=2, timeout=0)
+        users.get(user.pk)
+        users.get(user.pk)
+        assert users.get_stats()['miss'] == 2, (
+            'Проверьте, что записи кэша пользователей устаревают'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_me_patch_uses_fresh_row(self, admin_client, admin):
+        from users.models import User
+
+        admin_client.get('/api/v1/users/me/')
+        User.objects.filter(pk=admin.pk).update(role='user', first_name='Old')
+        response = admin_client.patch(
+            '/api/v1/users/me/', data={'first_name': 'New'}
+        )
+        assert response.status_code == 200
+        assert User.objects.values_list('role', 'first_name').get(
+            pk=admin.pk
+        ) == ('user', 'New'), (
+            'Проверьте, что PATCH `/api/v1/users/me/` не затирает '
+            'изменения, сделанные после загрузки пользователя в кэш'
+        )
@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_comments
+
+
+def queries_from(context, table):
+    return [
+        query['sql'] for query in context.captured_queries
+        if f'FROM "{table}"' in query['sql']
+    ]
+
+
+class Test18NestedResources:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_mismatched_title(self, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        wrong = f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[0]["id"]}'
+        urls = (
+            f'{wrong}/',
+            f'{wrong}/comments/',
+            f'{wrong}/comments/{comments[0]["id"]}/',
+        )
+        for url in urls:
+            response = admin_client.get(url)
+            assert response.status_code == 404, (
+                f'Проверьте, что `{url}` с отзывом другого произведения возвращает 404'
+            )
+        response = admin_client.post(f'{wrong}/comments/', data={'text': 'текст'})
+        assert response.status_code == 404, (
+            'Проверьте, что нельзя прокомментировать отзыв через чужое произведение'
+        )
+        response = admin_client.patch(
+            f'{wrong}/comments/{comments[0]["id"]}/', data={'text': 'текст'}
+        )
+        assert response.status_code == 404, (
+            'Проверьте, что нельзя изменить комментарий через чужое произведение'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_comment_single_query(self, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}'
+            f'/comments/{comments[0]["id"]}/'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что комментарий доступен по своему адресу'
+        )
+        assert not queries_from(context, 'reviews_review'), (
+            'Проверьте, что комментарий ищется одним запросом с JOIN на отзыв'
+        )
+        assert not queries_from(context, 'users_user'), (
+            'Проверьте, что автор комментария загружается вместе с ним'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_create_resolves_title_once(self, admin_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(admin_client, admin)
+        url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        data = {'text': 'текст', 'score': 7}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(url, data=data)
+        assert response.status_code == 201, (
+            'Проверьте, что отзыв создаётся'
+        )
+        assert len(queries_from(context, 'reviews_title')) == 1, (
+            'Проверьте, что произведение загружается один раз за запрос'
+        )
+        assert not queries_from(context, 'reviews_review'), (
+            'Проверьте, что повторный отзыв отсекается ограничением уникальности, '
+            'а не предварительным запросом'
+        )
+        response = admin_client.post(url, data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что второй отзыв на то же произведение возвращает 400'
+        )
+        assert 'non_field_errors' in response.json(), (
+            'Проверьте, что ошибка повторного отзыва возвращается в `non_field_errors`'
+        )
@@ -0,0 +1,63 @@
+import re
+
+import pytest
+from django.db import connection
+from django.db.models import Max
+
+FULL_SCAN = re.compile(r'\bSCAN (TABLE )?"?(\w+)"?\s*$')
+
+
+def plan(queryset):
+    return [line.split(' ', 3)[-1] for line in queryset.explain().splitlines()]
+
+
+def full_scans(lines):
+    return [line for line in lines if FULL_SCAN.search(line)]
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Планы запросов разбираются для SQLite'
+)
+class Test19QueryPlans:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_hot_queries_use_indexes(self):
+        from api.filters import TitleFilter
+        from reviews.models import Category, Comment, Genre, Review, Title
+
+        queries = {
+            'отзывы произведения': Review.objects.filter(title_id=1).select_related('author'),
+            'комментарии отзыва': Comment.objects.filter(review_id=1).select_related('author'),
+            'комментарий по адресу': Comment.objects.filter(
+                pk=1, review_id=1, review__title_id=1
+            ),
+            'статистика отзывов': Review.objects.filter(title_id=1).order_by().values('title').annotate(
+                latest=Max('pub_date')
+            ),
+            'произведения': Title.objects.select_related('category'),
+            'поиск произведения по началу названия': TitleFilter(
+                {'name': 'Пов'}, queryset=Title.objects.all()
+            ).qs,
+            'жанры': Genre.objects.all(),
+            'категории': Category.objects.all(),
+            'категории по началу названия': Category.objects.filter(name__startswith='Фи'),
+        }
+        for name, queryset in queries.items():
+            lines = plan(queryset)
+            assert not full_scans(lines), (
+                f'Проверьте, что запрос «{name}» использует индекс: {lines}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_children_sorted_by_index(self):
+        from reviews.models import Comment, Review
+
+        for queryset in (
+            Review.objects.filter(title_id=1),
+            Comment.objects.filter(review_id=1),
+        ):
+            lines = plan(queryset)
+            assert not [line for line in lines if 'TEMP B-TREE' in line], (
+                'Проверьте, что отзывы и комментарии сортируются по '
+                f'составному индексу с pub_date: {lines}'
+            )
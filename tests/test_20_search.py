@@ -0,0 +1,110 @@
+import pytest
+
+from .common import create_reviews
+
+
+@pytest.fixture
+def search_index(db):
+    from reviews.search import rebuild_index
+
+    rebuild_index()
+    yield
+    rebuild_index()
+
+
+@pytest.mark.usefixtures('search_index')
+class Test20Search:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search_titles_and_reviews(self, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        response = admin_client.get('/api/v1/search/', {'q': 'Поворот'})
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/search/` доступен'
+        )
+        data = response.json()
+        assert {'count', 'next', 'previous', 'results'} <= data.keys(), (
+            'Проверьте, что выдача поиска пагинирована'
+        )
+        assert data['count'] == 1 and data['results'][0]['type'] == 'title', (
+            'Проверьте, что поиск находит произведение по названию'
+        )
+        assert data['results'][0]['id'] == titles[0]['id'], (
+            'Проверьте, что поиск возвращает id найденного произведения'
+        )
+        response = admin_client.get('/api/v1/search/', {'q': 'qwerty123'})
+        results = response.json()['results']
+        assert [(hit['type'], hit['id']) for hit in results] == [
+            ('review', reviews[1]['id'])
+        ], 'Проверьте, что поиск находит отзыв по тексту'
+        assert results[0]['title_id'] == titles[0]['id'], (
+            'Проверьте, что для отзыва возвращается id произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_ranking_and_pagination(self, admin_client):
+        from reviews.models import Title
+
+        Title.objects.create(name='Дюна', year=1965, description='Песок')
+        Title.objects.create(name='Пустыня', year=1990, description='Дюна')
+        for i in range(12):
+            Title.objects.create(name=f'Роман {i}', year=2000, description='Дюна и песок')
+        response = admin_client.get('/api/v1/search/', {'q': 'дюна'})
+        data = response.json()
+        assert data['count'] == 14, (
+            'Проверьте, что поиск не зависит от регистра и ищет по описанию'
+        )
+        assert data['results'][0]['name'] == 'Дюна', (
+            'Проверьте, что совпадение в названии ранжируется выше описания'
+        )
+        ranks = [hit['rank'] for hit in data['results']]
+        assert ranks == sorted(ranks, reverse=True), (
+            'Проверьте, что выдача отсортирована по релевантности'
+        )
+        response = admin_client.get(data['next'])
+        assert len(response.json()['results']) == 4, (
+            'Проверьте, что вторая страница выдачи содержит остаток'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_index_follows_changes(self, admin_client):
+        from reviews.models import Title
+
+        title = Title.objects.create(name='Старое', year=2000)
+        title.name = 'Новое'
+        title.save()
+        response = admin_client.get('/api/v1/search/', {'q': 'старое'})
+        assert response.json()['count'] == 0, (
+            'Проверьте, что индекс обновляется при изменении произведения'
+        )
+        response = admin_client.get('/api/v1/search/', {'q': 'новое'})
+        assert response.json()['count'] == 1, (
+            'Проверьте, что индекс обновляется при изменении произведения'
+        )
+        title.delete()
+        response = admin_client.get('/api/v1/search/', {'q': 'новое'})
+        assert response.json()['count'] == 0, (
+            'Проверьте, что удалённые произведения пропадают из поиска'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_query_syntax_is_escaped(self, admin_client):
+        for query in ('"', 'NEAR(', 'a OR', '*', '-'):
+            response = admin_client.get('/api/v1/search/', {'q': query})
+            assert response.status_code == 200, (
+                f'Проверьте, что запрос `{query}` не ломает поиск'
+            )
+        response = admin_client.get('/api/v1/search/')
+        assert response.status_code == 400, (
+            'Проверьте, что без параметра `q` возвращается 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_loadcsv_bulk_indexes(self, admin_client):
+        from django.core.management import call_command
+
+        call_command('loadcsv', bulk=True)
+        response = admin_client.get('/api/v1/search/', {'q': 'побег'})
+        assert response.json()['count'] >= 1, (
+            'Проверьте, что loadcsv --bulk добавляет записи в поисковый индекс'
+        )
@@ -0,0 +1,85 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles
+
+
+class Test21Autocomplete:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_prefix_suggestions(self, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.get('/api/v1/autocomplete/', {'q': 'пов'})
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/autocomplete/` доступен'
+        )
+        data = response.json()
+        assert data['titles'] == [{'id': titles[0]['id'], 'name': titles[0]['name']}], (
+            'Проверьте, что подсказки находят произведения по началу названия без учёта регистра'
+        )
+        assert {'genres', 'categories'} <= data.keys(), (
+            'Проверьте, что подсказки возвращаются и для жанров и категорий'
+        )
+        response = admin_client.get(
+            '/api/v1/autocomplete/', {'q': genres[0]['name'][:3], 'type': 'genres'}
+        )
+        data = response.json()
+        assert list(data) == ['genres'] and genres[0] in data['genres'], (
+            'Проверьте, что параметр `type` ограничивает каталоги подсказок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_no_queries_after_build(self, admin_client):
+        create_titles(admin_client)
+        admin_client.get('/api/v1/autocomplete/', {'q': 'а'})
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get('/api/v1/autocomplete/', {'q': 'бой'})
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/autocomplete/` доступен'
+        )
+        assert not [
+            query for query in context.captured_queries
+            if 'reviews_' in query['sql']
+        ], 'Проверьте, что подсказки отдаются из памяти без запросов к БД'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_follows_changes(self, admin_client):
+        from reviews.models import Title
+
+        admin_client.get('/api/v1/autocomplete/', {'q': 'а'})
+        title = Title.objects.create(name='Солярис', year=1972)
+        response = admin_client.get('/api/v1/autocomplete/', {'q': 'сол'})
+        assert response.json()['titles'] == [{'id': title.pk, 'name': 'Солярис'}], (
+            'Проверьте, что новые произведения попадают в подсказки'
+        )
+        title.name = 'Сталкер'
+        title.save()
+        response = admin_client.get('/api/v1/autocomplete/', {'q': 'с'})
+        assert [hit['name'] for hit in response.json()['titles']] == ['Сталкер'], (
+            'Проверьте, что переименование обновляет подсказки'
+        )
+        title.delete()
+        response = admin_client.get('/api/v1/autocomplete/', {'q': 'с'})
+        assert response.json()['titles'] == [], (
+            'Проверьте, что удалённые произведения пропадают из подсказок'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_limit(self, admin_client):
+        from reviews.models import Title
+
+        for i in range(15):
+            Title.objects.create(name=f'Роман {i:02}', year=2000)
+        response = admin_client.get('/api/v1/autocomplete/', {'q': 'ром', 'limit': 3})
+        assert [hit['name'] for hit in response.json()['titles']] == [
+            'Роман 00', 'Роман 01', 'Роман 02'
+        ], 'Проверьте, что возвращаются первые `limit` подсказок по алфавиту'
+        response = admin_client.get('/api/v1/autocomplete/', {'q': 'ром', 'limit': 1000})
+        assert response.status_code == 400, (
+            'Проверьте, что слишком большой `limit` отклоняется'
+        )
+        response = admin_client.get('/api/v1/autocomplete/')
+        assert response.status_code == 400, (
+            'Проверьте, что без параметра `q` возвращается 400'
+        )
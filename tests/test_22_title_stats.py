@@ -0,0 +1,85 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_reviews
+
+
+class Test22TitleStats:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_stats_from_histogram(self, client, admin_client, admin):
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/stats/'
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/titles/{title_id}/stats/` доступен без токена'
+        )
+        data = response.json()
+        assert data['histogram'] == {
+            str(score): int(score in (3, 4, 5)) for score in range(1, 11)
+        }, 'Проверьте, что возвращается гистограмма оценок от 1 до 10'
+        assert (data['count'], data['mean'], data['median']) == (3, 4.0, 4.0), (
+            'Проверьте число оценок, среднее и медиану'
+        )
+        assert round(data['stddev'], 4) == 0.8165, (
+            'Проверьте стандартное отклонение оценок'
+        )
+        assert not [
+            query for query in context.captured_queries
+            if 'reviews_review' in query['sql']
+        ], 'Проверьте, что статистика не обращается к таблице отзывов'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_histogram_follows_reviews(self, admin_client, admin):
+        from reviews.models import Review, Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        review = Review.objects.get(pk=reviews[0]['id'])
+        review.score = 10
+        review.save()
+        Review.objects.filter(pk=reviews[1]['id']).delete()
+        title = Title.objects.get(pk=titles[0]['id'])
+        stats = title.get_rating_stats()
+        assert stats['histogram'][10] == 1 and stats['histogram'][5] == 0, (
+            'Проверьте, что изменение оценки переносит её в другой столбец гистограммы'
+        )
+        assert (stats['count'], stats['median']) == (2, 7.0), (
+            'Проверьте, что удаление отзыва исключает его оценку из гистограммы'
+        )
+        other = Title.objects.get(pk=titles[1]['id'])
+        review.title = other
+        review.save()
+        other.refresh_from_db()
+        assert other.get_histogram()[10] == 1, (
+            'Проверьте, что перенос отзыва переносит оценку в гистограмму другого произведения'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_empty_and_missing(self, client, admin_client):
+        from .common import create_titles
+
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/stats/')
+        data = response.json()
+        assert data['count'] == 0 and data['mean'] is None and data['median'] is None, (
+            'Проверьте, что для произведения без отзывов статистика пустая'
+        )
+        response = client.get('/api/v1/titles/999/stats/')
+        assert response.status_code == 404, (
+            'Проверьте, что для несуществующего произведения возвращается 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_recalcratings_fixes_histogram(self, admin_client, admin):
+        from reviews.models import Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        Title.objects.filter(pk=titles[0]['id']).update(score_3=0, score_7=2)
+        call_command('recalcratings', verbosity=0)
+        histogram = Title.objects.get(pk=titles[0]['id']).get_histogram()
+        assert (histogram[3], histogram[7]) == (1, 0), (
+            'Проверьте, что `recalcratings` восстанавливает гистограмму по отзывам'
+        )
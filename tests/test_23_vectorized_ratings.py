@@ -0,0 +1,86 @@
+import pytest
+from django.core.management import call_command
+
+from .common import create_reviews
+
+
+class Test23VectorizedRatings:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_vectorized_matches_database(self, admin_client, admin):
+        pytest.importorskip('numpy')
+        from reviews.models import SCORES, Title, score_field
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        expected = {
+            title.pk: title.get_rating_stats() for title in Title.objects.all()
+        }
+        Title.objects.update(
+            rating_sum=0, rating_count=0, rating=None,
+            **{score_field(score): 1 for score in SCORES}
+        )
+        call_command('recalcratings', vectorized=True, dry_run=True, verbosity=0)
+        assert Title.objects.filter(rating_count=0).count() == len(expected), (
+            'Проверьте, что `--dry_run` с `--vectorized` ничего не записывает'
+        )
+        call_command('recalcratings', vectorized=True, verbosity=0)
+        for title in Title.objects.all():
+            assert title.get_rating_stats() == expected[title.pk], (
+                'Проверьте, что `recalcratings --vectorized` восстанавливает '
+                'гистограммы и рейтинги по отзывам'
+            )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count, title.rating) == (12, 3, 4.0), (
+            'Проверьте, что `recalcratings --vectorized` восстанавливает рейтинг'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_batches(self, admin_client, admin, monkeypatch):
+        pytest.importorskip('numpy')
+        from reviews.management.commands.recalcratings import Command
+        from reviews.models import Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        monkeypatch.setattr(Command, 'BATCH_SIZE', 1)
+        monkeypatch.setattr(Command, 'STREAM_CHUNK', 1)
+        Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+        for vectorized in (False, True):
+            call_command('recalcratings', vectorized=vectorized, verbosity=0)
+            title = Title.objects.get(pk=titles[0]['id'])
+            assert (title.rating_sum, title.rating_count) == (12, 3), (
+                'Проверьте, что пересчёт пачками обходит все произведения'
+            )
+            Title.objects.update(rating_sum=0, rating_count=0, rating=None)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_only_drifted_loaded(self, admin_client, admin, capsys):
+        pytest.importorskip('numpy')
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        from reviews.models import Title
+
+        reviews, titles, user, moderator = create_reviews(admin_client, admin)
+        Title.objects.filter(pk=titles[0]['id']).update(rating_sum=0)
+        capsys.readouterr()
+        with CaptureQueriesContext(connection) as queries:
+            call_command(
+                'recalcratings', vectorized=True, dry_run=True, verbosity=1
+            )
+        output = capsys.readouterr().out
+        assert output.count('Расхождение') == 1, (
+            'Проверьте, что `--vectorized` находит только разошедшиеся '
+            'произведения'
+        )
+        assert not any(
+            '"name"' in query['sql'] and 'IN (' not in query['sql']
+            for query in queries
+        ), (
+            'Проверьте, что с `--vectorized` объекты создаются только '
+            'для произведений с расхождениями'
+        )
+        call_command('recalcratings', vectorized=True, verbosity=0)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что `--vectorized` исправляет расхождения'
+        )
@@ -0,0 +1,173 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from .common import auth_client, create_titles, create_users_api
+
+
+def create_top(admin_client):
+    """Одна оценка 10 у первого произведения и 9, 9, 8 у второго."""
+    titles, categories, genres = create_titles(admin_client)
+    user, moderator = create_users_api(admin_client)
+    reviews = (
+        (admin_client, titles[0], 10),
+        (admin_client, titles[1], 9),
+        (auth_client(user), titles[1], 9),
+        (auth_client(moderator), titles[1], 8),
+    )
+    for client, title, score in reviews:
+        client.post(
+            f'/api/v1/titles/{title["id"]}/reviews/',
+            data={'text': 'Отзыв', 'score': score}
+        )
+    return titles, categories, genres
+
+
+def top_ids(client, query=''):
+    response = client.get(f'/api/v1/titles/top/{query}')
+    assert response.status_code == 200, (
+        f'Проверьте, что `/api/v1/titles/top/{query}` возвращает статус 200'
+    )
+    return [title['id'] for title in response.json()]
+
+
+class Test24TopTitles:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_weighted_ranking(self, client, admin_client):
+        titles, categories, genres = create_top(admin_client)
+        response = client.get('/api/v1/titles/top/')
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/titles/top/` доступен без токена'
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == [
+            titles[1]['id'], titles[0]['id']
+        ], (
+            'Проверьте, что произведение с одной оценкой 10 стоит ниже '
+            'произведения с тремя высокими оценками'
+        )
+        assert round(data[0]['weighted_rating'], 4) == round(81 / 13, 4), (
+            'Проверьте, что взвешенный рейтинг добавляет к оценкам '
+            '`TOP_TITLES_PRIOR_WEIGHT` оценок `TOP_TITLES_PRIOR_MEAN`'
+        )
+        assert data[1]['rating'] == 10 and data[0]['genre'], (
+            'Проверьте, что в списке лучших произведения выводятся целиком'
+        )
+        assert top_ids(client, '?limit=1') == [titles[1]['id']], (
+            'Проверьте, что параметр `limit` ограничивает список'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_category_and_genre(self, client, admin_client):
+        titles, categories, genres = create_top(admin_client)
+        assert top_ids(client, f'?category={categories[0]["slug"]}') == [
+            titles[0]['id']
+        ], 'Проверьте, что `?category=` оставляет произведения категории'
+        assert top_ids(client, f'?genre={genres[2]["slug"]}') == [
+            titles[1]['id']
+        ], 'Проверьте, что `?genre=` оставляет произведения жанра'
+        for query in (
+            '?genre=unknown',
+            f'?category={categories[0]["slug"]}&genre={genres[0]["slug"]}',
+            '?limit=0',
+        ):
+            response = client.get(f'/api/v1/titles/top/{query}')
+            assert response.status_code == 400, (
+                f'Проверьте, что запрос `/api/v1/titles/top/{query}` '
+                f'возвращает статус 400'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_ranks_follow_changes(self, client, admin_client, settings):
+        from reviews.models import Review, Title, TitleRank
+
+        titles, categories, genres = create_top(admin_client)
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/',
+            data={'genre': [genres[0]['slug']], 'category': categories[0]['slug']}
+        )
+        assert top_ids(client, f'?genre={genres[0]["slug"]}') == [
+            titles[1]['id'], titles[0]['id']
+        ] and not top_ids(client, f'?genre={genres[2]["slug"]}'), (
+            'Проверьте, что смена жанров переносит произведение между списками'
+        )
+        assert top_ids(client, f'?category={categories[0]["slug"]}') == [
+            titles[1]['id'], titles[0]['id']
+        ], 'Проверьте, что смена категории переносит произведение между списками'
+
+        Review.objects.filter(title_id=titles[1]['id']).delete()
+        assert top_ids(client) == [titles[0]['id']], (
+            'Проверьте, что произведение без оценок уходит из списков лучших'
+        )
+
+        settings.TOP_TITLES_PRIOR_WEIGHT = 0
+        call_command('recalcratings', verbosity=0)
+        rank = TitleRank.objects.get(
+            title_id=titles[0]['id'], category=None, genre=None
+        )
+        assert rank.score == 10, (
+            'Проверьте, что `recalcratings` пересчитывает списки лучших '
+            'по текущим настройкам'
+        )
+        Title.objects.get(pk=titles[0]['id']).delete()
+        assert not TitleRank.objects.filter(title_id=titles[0]['id']).exists(), (
+            'Проверьте, что удаление произведения удаляет его из списков лучших'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite', reason='Планы запросов разбираются для SQLite'
+    )
+    @pytest.mark.django_db(transaction=True)
+    def test_04_top_is_index_range_read(self):
+        from reviews.models import TitleRank
+
+        for scope in ({}, {'category_id': 1}, {'genre_id': 1}):
+            plan = TitleRank.objects.filter(
+                category_id=scope.get('category_id'),
+                genre_id=scope.get('genre_id')
+            ).order_by('-score', 'title_id').values_list('title_id', 'score')[:10].explain()
+            assert 'title_rank_scope_score_idx' in plan and 'TEMP B-TREE' not in plan, (
+                f'Проверьте, что список лучших читается по индексу без сортировки: {plan}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_rebuild_many_ranks(self):
+        from reviews import leaderboard
+        from reviews.models import Category, Genre, Title, TitleRank
+
+        category = Category.objects.create(name='Фильм', slug='film')
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        Title.objects.bulk_create([
+            Title(name=f'Произведение {i}', year=2000, category=category)
+            for i in range(300)
+        ])
+        Title.genre.through.objects.bulk_create([
+            Title.genre.through(title_id=pk, genre_id=genre.pk)
+            for pk in Title.objects.values_list('pk', flat=True)
+        ])
+        leaderboard.rebuild()
+        assert TitleRank.objects.count() == 900, (
+            'Проверьте, что списки лучших перестраиваются и для пачки '
+            'из сотен произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_stale_title_save_keeps_rank(self, client, user):
+        from reviews.models import Genre, Review, Title, TitleRank
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        stale = Title.objects.get(pk=title.pk)
+        Review.objects.create(title=title, author=user, text='Отзыв', score=9)
+        rank = TitleRank.objects.get(title=title, category=None, genre=None)
+        stale.save()
+        stale.genre.add(Genre.objects.create(name='Драма', slug='drama'))
+        assert TitleRank.objects.get(
+            title=title, category=None, genre=None
+        ).rating_count == rank.rating_count == 1, (
+            'Проверьте, что сохранение устаревшего экземпляра произведения '
+            'не сбрасывает его места в списках лучших'
+        )
+        assert top_ids(client) == [title.pk] and top_ids(
+            client, '?genre=drama'
+        ) == [title.pk]
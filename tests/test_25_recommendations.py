@@ -0,0 +1,111 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_titles
+
+
+def create_ratings(admin_client):
+    """Первые два произведения нравятся одним и тем же, третье — другим."""
+    from reviews.models import Review, Title, User
+
+    titles, categories, genres = create_titles(admin_client)
+    third = Title.objects.create(name='Третье', year=2001)
+    ids = [titles[0]['id'], titles[1]['id'], third.pk]
+    ratings = {
+        'first': (10, 9, 2),
+        'second': (9, 10, 3),
+        'third': (2, 3, 9),
+    }
+    for username, scores in ratings.items():
+        user = User.objects.create(
+            username=username, email=f'{username}@yamdb.fake'
+        )
+        for title_id, score in zip(ids, scores):
+            Review.objects.create(
+                author=user, title_id=title_id, text='Отзыв', score=score
+            )
+    return ids
+
+
+class Test25Recommendations:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_similar_titles(self, client, admin_client):
+        pytest.importorskip('numpy')
+        ids = create_ratings(admin_client)
+        call_command('buildsimilar', min_common=2, verbosity=0)
+        response = client.get(f'/api/v1/titles/{ids[0]}/similar/')
+        assert response.status_code == 200, (
+            'Проверьте, что `/api/v1/titles/{title_id}/similar/` доступен без токена'
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == [ids[1]], (
+            'Проверьте, что похожими считаются произведения с похожими '
+            'оценками одних и тех же пользователей'
+        )
+        assert 0 < data[0]['similarity'] <= 1 and data[0]['genre'], (
+            'Проверьте, что похожие произведения выводятся целиком, со сходством'
+        )
+        response = client.get('/api/v1/titles/0/similar/')
+        assert response.status_code == 404, (
+            'Проверьте, что для несуществующего произведения возвращается 404'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recommendations(self, client, admin_client):
+        pytest.importorskip('numpy')
+        from reviews.models import Review, User
+
+        ids = create_ratings(admin_client)
+        call_command('buildsimilar', verbosity=0)
+        user = User.objects.create(username='newbie', email='newbie@yamdb.fake')
+        Review.objects.create(author=user, title_id=ids[0], text='Отзыв', score=8)
+        url = '/api/v1/users/me/recommendations/'
+        assert client.get(url).status_code == 401, (
+            f'Проверьте, что `{url}` недоступен без токена'
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = auth_client(user).get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что `{url}` доступен пользователю'
+        )
+        data = response.json()
+        assert [title['id'] for title in data] == [ids[1]], (
+            'Проверьте, что рекомендуются соседи оценённых произведений, '
+            'кроме уже оценённых'
+        )
+        assert data[0]['predicted_rating'] == 8, (
+            'Проверьте, что ожидаемая оценка — взвешенное по сходству '
+            'среднее оценок пользователя'
+        )
+        assert len([
+            query for query in context.captured_queries
+            if 'reviews_similartitle' in query['sql']
+        ]) == 1, 'Проверьте, что рекомендации читаются одним запросом к таблице соседей'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rebuild_replaces_table(self, admin_client):
+        pytest.importorskip('numpy')
+        from reviews.models import Review, SimilarTitle, Title
+
+        ids = create_ratings(admin_client)
+        call_command('buildsimilar', verbosity=0)
+        assert SimilarTitle.objects.count() == 2, (
+            'Проверьте, что `buildsimilar` сохраняет пары в обе стороны'
+        )
+        call_command('buildsimilar', min_common=4, verbosity=0)
+        assert not SimilarTitle.objects.exists(), (
+            'Проверьте, что `buildsimilar` заменяет таблицу и учитывает `--min_common`'
+        )
+        call_command('buildsimilar', verbosity=0)
+        Title.objects.filter(pk=ids[1]).delete()
+        assert not SimilarTitle.objects.exists(), (
+            'Проверьте, что удаление произведения удаляет его из похожих'
+        )
+        Review.objects.all().delete()
+        call_command('buildsimilar', verbosity=0)
+        assert not SimilarTitle.objects.exists(), (
+            'Проверьте, что `buildsimilar` работает без оценок'
+        )
@@ -0,0 +1,142 @@
+import re
+import time
+
+import pytest
+
+from .common import (auth_client, create_categories, create_titles,
+                     create_users_api)
+from .fixtures.fixture_query_budget import over_budget
+
+SERVER_TIMING = re.compile(
+    r'db;dur=[\d.]+;desc="SQL: (\d+) queries", '
+    r'serialize;dur=[\d.]+;desc="[^"]+", render;dur=[\d.]+;desc="[^"]+", '
+    r'total;dur=[\d.]+;desc="[^"]+"'
+)
+
+
+class Test26RequestMetrics:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/')
+        match = SERVER_TIMING.fullmatch(response.get('Server-Timing', ''))
+        assert match, (
+            'Проверьте, что ответ содержит заголовок `Server-Timing` '
+            'с временем SQL, сериализаторов, рендеринга и всего запроса'
+        )
+        assert int(match.group(1)) == 3, (
+            'Проверьте, что в `Server-Timing` указано число запросов к БД'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_stats_endpoint(self, client, admin_client):
+        url = '/api/v1/metrics/'
+        assert admin_client.delete(url).status_code == 204, (
+            f'Проверьте, что DELETE `{url}` обнуляет замеры'
+        )
+        titles, categories, genres = create_titles(admin_client)
+        user, moderator = create_users_api(admin_client)
+        for _ in range(3):
+            client.get(f'/api/v1/titles/{titles[0]["id"]}/stats/')
+        for user_client in (client, auth_client(moderator)):
+            assert user_client.get(url).status_code in (401, 403), (
+                f'Проверьте, что `{url}` доступен только администратору'
+            )
+        response = admin_client.get(url)
+        assert response.status_code == 200, (
+            f'Проверьте, что `{url}` доступен администратору'
+        )
+        routes = {
+            (stats['method'], stats['route']): stats
+            for stats in response.json()['routes']
+        }
+        stats = routes.get(('GET', 'api:titles-stats'))
+        assert stats and stats['requests'] == 3, (
+            'Проверьте, что замеры копятся по имени маршрута и методу'
+        )
+        assert stats['mean_queries'] == stats['max_queries'] == 1, (
+            'Проверьте, что считается среднее и наибольшее число запросов к БД'
+        )
+        assert stats['query_budget'] == 1 and {
+            'mean_sql_ms', 'mean_serialize_ms', 'mean_render_ms',
+            'mean_wall_ms', 'max_wall_ms'
+        } <= stats.keys(), (
+            'Проверьте, что в замерах есть бюджет и время SQL, '
+            'сериализаторов, рендеринга и всего запроса'
+        )
+        assert ('GET', 'api:metrics') not in routes or routes[
+            ('GET', 'api:metrics')]['requests'] == 2, (
+            'Проверьте, что замеры учитывают и отказы в доступе'
+        )
+
+    @pytest.mark.query_budget(1)
+    @pytest.mark.django_db(transaction=True)
+    def test_03_query_budgets(self, client, settings, query_budget_exceeded):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        assert not query_budget_exceeded, (
+            'Проверьте, что маркер `query_budget` задаёт бюджет запросов теста'
+        )
+        settings.QUERY_BUDGETS = {
+            'api:titles-list': 5, 'GET api:titles-list': 2
+        }
+        assert over_budget('api:titles-list', 'GET', 3) == (
+            'GET api:titles-list: 3 запросов к БД при бюджете 2'
+        ), 'Проверьте, что бюджет для метода важнее бюджета маршрута'
+        assert over_budget('api:titles-list', 'POST', 5) is None, (
+            'Проверьте, что бюджет маршрута действует для всех методов'
+        )
+        assert over_budget('api:titles-list', 'GET', 3, 3) is None, (
+            'Проверьте, что маркер `query_budget` заменяет бюджеты из настроек'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_serializer_time(self, client, admin_client, monkeypatch):
+        from api.metrics import request_measured
+        from api.serializer import TitleSerializer
+
+        create_titles(admin_client)
+        to_representation = TitleSerializer.to_representation
+
+        def slow(self, instance):
+            time.sleep(0.02)
+            return to_representation(self, instance)
+
+        monkeypatch.setattr(TitleSerializer, 'to_representation', slow)
+        measured = []
+
+        def remember(sender, route, method, metrics, **kwargs):
+            measured.append(metrics)
+
+        request_measured.connect(remember)
+        try:
+            count = client.get('/api/v1/titles/').json()['count']
+        finally:
+            request_measured.disconnect(remember)
+        metrics, = measured
+        assert metrics['serialize_ms'] >= 20 * count, (
+            'Проверьте, что `serialize_ms` измеряет вычисление данных '
+            'сериализатора'
+        )
+        assert metrics['render_ms'] < 20, (
+            'Проверьте, что рендеринг ответа измеряется отдельно '
+            'от сериализатора'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_catalogue_cache_stats(self, client, admin_client):
+        url = '/api/v1/metrics/'
+        create_categories(admin_client)
+        admin_client.delete(url)
+        for _ in range(3):
+            client.get('/api/v1/categories/')
+        stats = admin_client.get(url).json()['catalogue_cache']
+        assert stats == {'categories.miss': 1, 'categories.hit': 2}, (
+            f'Проверьте, что `{url}` показывает попадания и промахи '
+            f'кэша каталогов'
+        )
+        admin_client.delete(url)
+        assert admin_client.get(url).json()['catalogue_cache'] == {}, (
+            f'Проверьте, что DELETE `{url}` обнуляет и счётчики кэша каталогов'
+        )
@@ -0,0 +1,78 @@
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Avg
+
+SCALE = {
+    'users': 20, 'categories': 3, 'genres': 5, 'titles': 30,
+    'genres_per_title': 2, 'reviews_per_title': 4, 'comments_per_review': 2,
+    'batch_size': 7, 'verbosity': 0,
+}
+
+
+def dump():
+    from reviews.models import Comment, Review, Title
+
+    return (
+        list(Title.objects.order_by('pk').values_list(
+            'name', 'year', 'category__slug', 'rating')),
+        list(Review.objects.order_by('pk').values_list(
+            'title__name', 'author__username', 'score')),
+        list(Comment.objects.order_by('pk').values_list(
+            'review__text', 'author__username', 'text')),
+    )
+
+
+class Test27GenData:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_scale(self, client):
+        from reviews.models import Comment, Genre, Review, Title, TitleRank
+        from users.models import User
+
+        call_command('gendata', **SCALE)
+        assert (
+            User.objects.count(), Genre.objects.count(), Title.objects.count(),
+            Title.genre.through.objects.count(), Review.objects.count(),
+            Comment.objects.count()
+        ) == (20, 5, 30, 60, 120, 240), (
+            'Проверьте, что `gendata` создаёт объекты в заданном масштабе'
+        )
+        title = Title.objects.annotate(
+            actual=Avg('reviews__score')).order_by('pk').first()
+        assert title.rating == title.actual, (
+            'Проверьте, что после `gendata` рейтинги пересчитаны'
+        )
+        assert TitleRank.objects.filter(score__isnull=False).count() == 30 * 4, (
+            'Проверьте, что после `gendata` перестроены списки лучших'
+        )
+        response = client.get('/api/v1/search/', {'q': title.name.split()[0]})
+        assert response.status_code == 200 and response.json()['results'], (
+            'Проверьте, что созданные произведения попадают в поисковый индекс'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_seed_reproducible(self):
+        call_command('gendata', seed=3, **SCALE)
+        first = dump()
+        call_command('gendata', seed=3, clear_base=True, **SCALE)
+        assert dump() == first, (
+            'Проверьте, что `gendata` с тем же `--seed` создаёт те же данные'
+        )
+        call_command('gendata', seed=4, clear_base=True, **SCALE)
+        assert dump() != first, (
+            'Проверьте, что `--seed` меняет создаваемые данные'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_appends_and_validates(self):
+        from reviews.models import Title
+
+        call_command('gendata', **SCALE)
+        call_command('gendata', **SCALE)
+        assert Title.objects.count() == 60, (
+            'Проверьте, что `gendata` без `--clear_base` добавляет данные'
+        )
+        with pytest.raises(CommandError):
+            call_command('gendata', **{**SCALE, 'reviews_per_title': 21})
+        with pytest.raises(CommandError):
+            call_command('gendata', **{**SCALE, 'genres_per_title': 6})
@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+
+
+def new_connection(tmp_path):
+    from django.db.backends.sqlite3.base import DatabaseWrapper
+
+    return DatabaseWrapper({
+        **connection.settings_dict, 'NAME': str(tmp_path / 'db.sqlite3')
+    })
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class Test28SQLiteProfile:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_new_connection_pragmas(self, tmp_path, settings):
+        settings.SQLITE_PRAGMAS = {
+            'journal_mode': 'wal', 'synchronous': 'normal',
+            'cache_size': -2000, 'busy_timeout': 1234,
+        }
+        wrapper = new_connection(tmp_path)
+        try:
+            assert pragma(wrapper, 'journal_mode') == 'wal', (
+                'Проверьте, что новое соединение с SQLite включает режим WAL'
+            )
+            assert (
+                pragma(wrapper, 'synchronous'),
+                pragma(wrapper, 'cache_size'),
+                pragma(wrapper, 'busy_timeout'),
+            ) == (1, -2000, 1234), (
+                'Проверьте, что новое соединение выполняет SQLITE_PRAGMAS'
+            )
+        finally:
+            wrapper.close()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_pragmas_not_counted(self, tmp_path):
+        wrapper = new_connection(tmp_path)
+        wrapper.force_debug_cursor = True
+        try:
+            wrapper.ensure_connection()
+        finally:
+            wrapper.close()
+        assert not wrapper.queries_log, (
+            'Проверьте, что PRAGMA не попадают в счётчики запросов к БД'
+        )
+
+    def test_03_persistent_connections(self):
+        from django.conf import settings
+
+        assert settings.DATABASES['default']['CONN_MAX_AGE'] > 0, (
+            'Проверьте, что соединения с БД переиспользуются между запросами'
+        )
+
+    def test_04_project_level_receiver(self):
+        from django.db.backends.signals import connection_created
+
+        from api_yamdb.db import configure_sqlite
+
+        assert any(
+            receiver() is configure_sqlite
+            for _, receiver in connection_created.receivers
+        ), (
+            'Проверьте, что `configure_sqlite` из `api_yamdb.db` подключён '
+            'к сигналу `connection_created` на уровне проекта'
+        )
@@ -0,0 +1,117 @@
+import pytest
+from django.core.cache import caches
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+from .common import auth_client, create_titles, create_users_api, run_django
+
+
+def count_queries(client, method, url, **kwargs):
+    """Запросы к основной БД и к реплике за один запрос к API."""
+    with CaptureQueriesContext(connections['default']) as primary, \
+            CaptureQueriesContext(connections['replica']) as replica:
+        response = getattr(client, method)(url, **kwargs)
+    return response, len(primary), len(replica)
+
+
+class Test29Replicas:
+
+    @pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+    def test_01_reads_from_replica(self, client, admin_client, settings):
+        settings.DATABASE_REPLICAS = ['replica']
+        titles, categories, genres = create_titles(admin_client)
+        for url in (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            '/api/v1/genres/',
+        ):
+            response, primary, replica = count_queries(client, 'get', url)
+            assert response.status_code == 200, (
+                f'Проверьте, что `{url}` доступен при чтении с реплики'
+            )
+            assert replica and not primary, (
+                f'Проверьте, что чтения GET `{url}` идут на реплику'
+            )
+        assert response.json()['results'], (
+            'Проверьте, что ответ с реплики содержит данные'
+        )
+
+    @pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+    def test_02_writes_stick_to_primary(self, client, admin_client, settings):
+        settings.DATABASE_REPLICAS = ['replica']
+        settings.REPLICA_STICKY_SECONDS = 60
+        titles, categories, genres = create_titles(admin_client)
+        user, _ = create_users_api(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        user_client = auth_client(user)
+        response, primary, replica = count_queries(
+            user_client, 'post', url, data={'text': 'Отзыв', 'score': 7}
+        )
+        assert response.status_code == 201 and primary and not replica, (
+            'Проверьте, что запись и чтения в том же запросе идут в основную БД'
+        )
+        response, primary, replica = count_queries(user_client, 'get', url)
+        assert response.json()['results'] and primary and not replica, (
+            'Проверьте, что после записи чтения пользователя идут '
+            'в основную БД в течение `REPLICA_STICKY_SECONDS`'
+        )
+        response, primary, replica = count_queries(client, 'get', url)
+        assert replica and not primary, (
+            'Проверьте, что запись одного пользователя не уводит '
+            'с реплики остальных'
+        )
+        caches[settings.REPLICA_STICKY_CACHE].clear()
+        response, primary, replica = count_queries(user_client, 'get', url)
+        assert replica and not primary, (
+            'Проверьте, что по истечении окна пользователь снова читает с реплики'
+        )
+
+    @pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+    def test_03_users_from_primary(self, admin_client, settings):
+        from users.cache import user_cache
+
+        settings.DATABASE_REPLICAS = ['replica']
+        create_titles(admin_client)
+        user, _ = create_users_api(admin_client)
+        user_cache.clear()
+        settings.QUERY_BUDGETS = {
+            **settings.QUERY_BUDGETS, 'GET api:titles-list': 4
+        }
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = auth_client(user).get('/api/v1/titles/')
+        assert response.status_code == 200 and len(replica), (
+            'Проверьте, что чтения аутентифицированного пользователя '
+            'идут на реплику'
+        )
+        assert primary and all(
+            'FROM "users_user"' in query['sql'] for query in primary
+        ), (
+            'Проверьте, что пользователь при аутентификации загружается '
+            'из основной БД'
+        )
+
+    @pytest.mark.django_db(transaction=True, databases=['default', 'replica'])
+    def test_04_outside_requests(self, settings):
+        from api.replicas import ReplicaRouter
+        from reviews.models import Title
+
+        settings.DATABASE_REPLICAS = ['replica']
+        router = ReplicaRouter()
+        assert router.db_for_read(Title) == 'default', (
+            'Проверьте, что вне запросов к API чтения идут в основную БД'
+        )
+        assert router.allow_migrate('replica', 'reviews') is False, (
+            'Проверьте, что миграции не применяются к репликам'
+        )
+
+    def test_05_stickiness_shared(self):
+        from api.replicas import is_sticky
+
+        run_django('from api.replicas import stick_to_primary; '
+                   'stick_to_primary(42)')
+        assert is_sticky(42), (
+            'Проверьте, что отметка о записи видна всем процессам сервера: '
+            '`REPLICA_STICKY_CACHE` по умолчанию общий кэш'
+        )
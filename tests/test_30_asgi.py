@@ -0,0 +1,131 @@
+import asyncio
+import importlib
+import json
+import threading
+
+import pytest
+
+from .common import create_titles
+
+
+def call(app, method, path, query_string=b'', body=b'', headers=()):
+    """Ответ ASGI-приложения: статус, заголовки и тело."""
+    messages = [
+        {'type': 'http.request', 'body': body[:1], 'more_body': True},
+        {'type': 'http.request', 'body': body[1:], 'more_body': False},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app({
+        'type': 'http', 'method': method, 'path': path,
+        'query_string': query_string, 'http_version': '1.1',
+        'scheme': 'http', 'server': ('testserver', 80),
+        'client': ('127.0.0.1', 5000),
+        'headers': [(b'host', b'testserver'), *headers],
+    }, receive, send))
+    start, content = sent
+    return start['status'], dict(start['headers']), content['body']
+
+
+class Test30ASGI:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_same_response_as_wsgi(self, client, admin_client):
+        from api_yamdb.asgi import application
+
+        create_titles(admin_client)
+        status, headers, body = call(
+            application, 'GET', '/api/v1/titles/', b'year=2000'
+        )
+        expected = client.get('/api/v1/titles/', {'year': 2000})
+        assert status == 200 and json.loads(body) == expected.json(), (
+            'Проверьте, что ASGI-приложение отвечает так же, как WSGI'
+        )
+        assert headers[b'content-type'] == b'application/json', (
+            'Проверьте, что ASGI-приложение передаёт заголовки ответа'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_request_body_and_headers(self, token_admin):
+        from api_yamdb.asgi import application
+
+        status, headers, body = call(
+            application, 'POST', '/api/v1/genres/',
+            body=json.dumps({'name': 'Нуар', 'slug': 'noir'}).encode(),
+            headers=[
+                (b'content-type', b'application/json'),
+                (b'authorization', f'Bearer {token_admin["access"]}'.encode()),
+            ]
+        )
+        assert status == 201 and json.loads(body)['slug'] == 'noir', (
+            'Проверьте, что ASGI-приложение передаёт тело и заголовки запроса'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_read_pool(self, admin_client):
+        from api.metrics import request_measured
+        from api_yamdb.asgi import application
+
+        threads = {}
+
+        def remember_thread(sender, route, method, **kwargs):
+            threads[f'{method} {route}'] = threading.current_thread().name
+
+        request_measured.connect(remember_thread)
+        try:
+            call(application, 'GET', '/api/v1/genres/')
+            call(application, 'GET', '/api/v1/search/', b'q=test')
+            call(application, 'POST', '/api/v1/genres/')
+        finally:
+            request_measured.disconnect(remember_thread)
+        assert threads['GET api:genres-list'].startswith('asgi-read'), (
+            'Проверьте, что чтения из `ASGI_READ_ROUTES` выполняются '
+            'в пуле чтений'
+        )
+        assert not threads['GET api:search'].startswith('asgi-read'), (
+            'Проверьте, что остальные маршруты выполняются в общем пуле'
+        )
+        assert not threads['POST api:genres-list'].startswith('asgi-read'), (
+            'Проверьте, что запись не занимает пул чтений'
+        )
+
+    def test_04_lifespan(self):
+        from api_yamdb.asgi import application
+
+        messages = [
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(application({'type': 'lifespan'}, receive, send))
+        assert sent == [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'
+        ], 'Проверьте, что ASGI-приложение поддерживает протокол lifespan'
+
+    def test_05_warms_autocomplete(self, settings, monkeypatch):
+        from api_yamdb import asgi, wsgi
+        from reviews import autocomplete
+
+        warmed = []
+        monkeypatch.setattr(autocomplete, 'warm', lambda: warmed.append(1))
+        settings.AUTOCOMPLETE_WARM_ON_START = True
+        importlib.reload(wsgi)
+        importlib.reload(asgi)
+        assert warmed and asgi.application.wsgi_application is (
+            wsgi.application
+        ), (
+            'Проверьте, что ASGI-приложение оборачивает `api_yamdb.wsgi` '
+            'и прогревает индексы по `AUTOCOMPLETE_WARM_ON_START`'
+        )